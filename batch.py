@@ -0,0 +1,43 @@
+# -------------------------------------------------------------------------------
+# Name:        batch
+# Purpose:     Batch entry point: synthesizes every line of a file
+#              (or of the standard input) over a pool of processes
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Global imports
+import argparse
+import sys
+# Local imports
+from src.utils import extractFileInfo
+from src.mediator import synthesize_batch
+
+
+def main(utterances, processes=None, ordered=True):
+    failures = 0
+    for utterance, path, failure in synthesize_batch(utterances, processes, ordered):
+        if failure:
+            failures += 1
+            print("Unable to synthesize " + utterance + " because:\n  " + failure)
+        else:
+            print("'" + utterance + "' has been synthesized in " + path)
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Synthesizes a list of utterances, one per line")
+    parser.add_argument('file', nargs='?', help="file of utterances; the standard input is used if omitted")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help="number of worker processes; defaults to the number of cores")
+    parser.add_argument('-u', '--unordered', action='store_true',
+                        help="report utterances as they are completed rather than in order")
+    args = parser.parse_args()
+
+    if args.file:
+        inp = extractFileInfo(args.file)
+    else:
+        # The same filtering as extractFileInfo: no blank lines, no comments
+        inp = list(line.strip() for line in sys.stdin if line.strip() and line.strip()[0] != '#')
+    sys.exit(1 if main(inp, args.processes, not args.unordered) else 0)
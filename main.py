@@ -11,29 +11,46 @@
 
 # Global imports
 import sys
+import argparse
+import itertools
 from queue import Queue
 # Local imports
-from src.user_interface import UserInterface
-from src.mediator import Mediator
+from src.user_interface import UserInterface, InputGate
+from src.mediator import Mediator, MediatorProcess, serve_daemon, load_config
 
 
-def main(input_inputs=None):  # inputs used for testing purposes
+# If process is True, the mediator runs in a process of its own (see MediatorProcess), rather than as a thread
+# The inputs are read from stream (stdin by default) one line at a time, as they are needed: once the inputs
+# waiting for the interface, or the commands waiting for the mediator, are as many as the configuration allows,
+# reading waits for them, so that inputs of any size can be piped in
+def main(input_inputs=None, process=False, stream=None):  # inputs used for testing purposes
     if input_inputs is None:
         inputs = []
     else:
         inputs = input_inputs
+    try:
+        conf = load_config()  # raises FileNotFound
+    except Exception as ex:
+        print("Failure loading the configuration:\n" + str(ex) + '\nExiting...')
+        sys.exit()
+    # The queues between the interface and a mediator process must be shared with the process
+    make_queue = MediatorProcess.context.JoinableQueue if process else Queue
     # Creates queue for user commands
-    mediator_input = Queue(0)
+    mediator_input = make_queue(max(conf['command_queue'], 0))
     # Creates return queue for mediator's message passing
-    interface_input = Queue(0)
+    interface_input = make_queue(0)
 
     try:  # Create the mediator
-        mediator = Mediator(mediator_input, interface_input)  # raises Exception, unrecoverable
+        if process:
+            mediator = MediatorProcess(mediator_input, interface_input)  # raises Exception, unrecoverable
+        else:
+            mediator = Mediator(mediator_input, interface_input)  # raises Exception, unrecoverable
     except Exception as ex:
         print("Failure initializing the mediator:\n" + str(ex) + '\nExiting...')
         sys.exit()
     try:  # Create the interface
-        interface = UserInterface(interface_input, mediator_input)
+        gate = InputGate(conf['input_queue']) if conf['input_queue'] > 0 else None
+        interface = UserInterface(interface_input, mediator_input, gate)
     except Exception as ex:
         print("Failure initializing the interface:\n" + str(ex) + "\nExiting...")
         if mediator.is_alive():
@@ -56,20 +73,22 @@ def main(input_inputs=None):  # inputs used for testing purposes
 
     print("System ready.\n"
           "Type 'help commands' for a list of available commands")
-    while interface.is_alive():
-        try:
-            # For testing purposes:
-            while len(inputs) != 0:
-                u_input = inputs.pop(0)
-                interface_input.put(("input", u_input))
-            # Actual user input:
-            u_input = input()
-            interface_input.put(("input", u_input))
-
-        except Exception as ex:
-            if not isinstance(ex, EOFError):
-                print("Unexpected exception:\n" + str(ex) + "\nExiting...")
+    try:
+        # The inputs for testing purposes come first
+        for u_input in itertools.chain(inputs, stream if stream is not None else sys.stdin):
+            # Waits for room, as long as there's an interface to make it
+            while gate is not None and not gate.enter(timeout=0.1):
+                if not interface.is_alive():
+                    break
+            if not interface.is_alive():
                 break
+            interface_input.put(("input", u_input.rstrip('\n')))
+        # Once the input is over, the interface is left to work through what's been read, until it's exited
+        interface.join()
+    except KeyboardInterrupt:
+        pass
+    except Exception as ex:
+        print("Unexpected exception:\n" + str(ex) + "\nExiting...")
 
     try:
         if mediator.is_alive():
@@ -87,5 +106,20 @@ def main(input_inputs=None):  # inputs used for testing purposes
 
 
 if __name__ == '__main__':
-    inp = list(line.replace('\n', '') for line in sys.stdin.readlines())
-    main(inp)
+    parser = argparse.ArgumentParser(description='Articulatory synthesis of utterances, typed at the prompt')
+    parser.add_argument('--process', action='store_true',
+                        help='run the mediator in a process of its own, rather than as a thread of the interface')
+    parser.add_argument('--daemon', action='store_true',
+                        help='stay resident, synthesizing the utterances requested on a Unix domain socket '
+                             '(see src/mediator/_daemon.py)')
+    parser.add_argument('--socket', default=None,
+                        help='socket of the daemon; defaults to the one of the configuration')
+    args = parser.parse_args()
+    if args.daemon:
+        try:
+            serve_daemon(args.socket)  # raises Exception, unrecoverable
+        except Exception as ex:
+            print("Failure running the daemon:\n" + str(ex) + "\nExiting...")
+            sys.exit(1)
+        sys.exit()
+    main(process=args.process)
@@ -1 +1,5 @@
 from ._mediator import Mediator
+from ._batch import synthesize_batch
+from ._process import MediatorProcess
+from ._daemon import SynthesisDaemon, serve_daemon
+from ._init_utils import load_config
@@ -0,0 +1,74 @@
+# -------------------------------------------------------------------------------
+# Name:        batch
+# Purpose:     Synthesizes lists of utterances over a pool of processes.
+#              VocalTractLab keeps a global state per process, so each worker
+#              holds its own mediator, initialized once, and renders offline
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Global imports
+import os
+import contextlib
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+from queue import Queue
+# Local imports
+from ._mediator import Mediator
+
+_mediator = None  # The mediator of the worker process
+_failure = None  # The reason why the mediator of the worker process could not be initialized
+
+
+# Initializes the mediator of a worker process, and with it the VocalTractLab instance
+# The factory creates the mediator from its queues; it's passed to the worker, rather than looked up in it,
+# so that it must be picklable, but any start method of the processes will do
+def _initialize_worker(factory, quiet):
+    global _mediator, _failure
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.ExitStack() as redirect:
+            if quiet:  # Initialization messages would be repeated by every worker
+                redirect.enter_context(contextlib.redirect_stdout(devnull))
+            _mediator = factory(Queue(0), Queue(0))  # raises UnrecoverableException
+        # Closes the api when the worker exits
+        Finalize(_mediator, _mediator.close, exitpriority=10)
+    except Exception as ex:
+        _failure = str(ex)
+
+
+# Synthesizes one utterance in the worker process
+# Returns (utterance, path of the audio file, reason of the failure)
+def _synthesize(utterance):
+    if _mediator is None:
+        return utterance, None, "Failure initializing the mediator:\n  " + str(_failure)
+    try:
+        # Every utterance starts from rest, so that the results don't depend on scheduling
+        _mediator.restart()  # raises UnrecoverableException
+        audio = _mediator.render(utterance)  # raises RecoverableException, UnrecoverableException, ValueError
+        a_file = _mediator.save(utterance, audio)  # raises OSError
+        # The file must exist once its path is reported
+        failures = _mediator.flush()
+        if a_file in failures:
+            return utterance, None, "Unable to write " + a_file + ":\n  " + failures[a_file]
+        return utterance, a_file, None
+    except Exception as ex:  # A failure of one utterance must not abort the whole batch
+        return utterance, None, str(ex)
+
+
+# Synthesizes the utterances over a pool of processes (by default, one per core), each with its own mediator,
+# created by factory (see _initialize_worker())
+# Results are yielded as they are available, as (utterance, path, failure);
+# if ordered is True, they follow the order of the utterances
+def synthesize_batch(utterances, processes=None, ordered=True, quiet=True, factory=Mediator):
+    pool = Pool(processes, _initialize_worker, (factory, quiet))
+    try:
+        results = pool.imap if ordered else pool.imap_unordered
+        for result in results(_synthesize, utterances):
+            yield result
+        pool.close()  # Lets the workers exit, closing their api
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
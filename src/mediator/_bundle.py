@@ -0,0 +1,84 @@
+# -------------------------------------------------------------------------------
+# Name:        bundle
+# Purpose:     Binary bundle of the resources parsed at startup: the targets and
+#              time constants of resources/targets and resources/targetpars, and
+#              the parameters information of the api, so that they are neither
+#              parsed nor retrieved again until any of their sources changes
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Global imports
+import os
+import hashlib
+import numpy as np
+# Local imports
+from ._cache import fileDigest
+
+SOURCES = ['resources/targets', 'resources/targetpars']  # Text resources parsed at startup
+VERSION = 1  # Layout of the bundle: bundles of other versions are rebuilt
+
+
+# Key of the bundle for the given configuration, which changes whenever any of its sources does
+# The api isn't hashed, as it's large: it's told apart by its path, size and modification time
+def bundleKey(conf):
+    sources = fileDigest(conf['speaker'], *SOURCES)  # raises FileNotFound
+    api = conf['apipath']
+    if os.path.exists(api):
+        api += ' %d %d' % (os.stat(api).st_size, os.stat(api).st_mtime_ns)
+    return hashlib.sha1(' '.join([str(VERSION), api, sources]).encode()).hexdigest()
+
+
+# The resources are stored as two arrays, written one after the other in the .npy format, with no pickled
+# objects; an .npz archive is avoided, as opening it takes longer than parsing the text resources.
+# The first array holds the key and the names of the targets, time constants and parameters, in this order.
+# The second one holds the number of targets, of parameters per target, of vowel and consonant constants
+# and of vocal and glottal parameters, followed by the targets, aligned to the working labels,
+# the values of the time constants, and the minima, defaults and maxima of the parameters
+class ResourceBundle:
+    __slots__ = ('key', 'tables', 'bounds')
+
+    def __init__(self, key, tables, bounds):
+        self.key = key
+        self.tables = tables  # (targets, vowel constants, consonant constants), see SomatoPhonemeTargets
+        self.bounds = bounds  # (vocal labels, glottal labels, minima, defaults, maxima), see VTParametersInfo
+
+    # Returns the bundle stored at path, or None if it's missing, unreadable, or not the one for key
+    @staticmethod
+    def load(path, key):
+        try:
+            with open(path, 'rb') as b_file:
+                names = np.load(b_file, allow_pickle=False).tolist()
+                if not names or names[0] != key:
+                    return None
+                values = np.load(b_file, allow_pickle=False).tolist()
+            targets, width, vowels, consonants, vocal, glottal = (int(c) for c in values[:6])
+            names, values = iter(names[1:]), iter(values[6:])
+
+            def take(items, n):
+                return list(next(items) for i in range(n))
+            table = dict(zip(take(names, targets), (take(values, width) for i in range(targets))))
+            vow_constants = dict(zip(take(names, vowels), take(values, vowels)))
+            con_constants = dict(zip(take(names, consonants), take(values, consonants)))
+            vlabels, glabels = take(names, vocal), take(names, glottal)
+            bounds = tuple(take(values, vocal + glottal) for i in range(3))
+        except (OSError, ValueError, RuntimeError):  # RuntimeError: fewer names or values than expected
+            return None
+        return ResourceBundle(key, (table, vow_constants, con_constants), (vlabels, glabels) + bounds)
+
+    # Stores the bundle at path; it's written aside and then moved, so that it's never read incomplete
+    def save(self, path):
+        targets, vow_constants, con_constants = self.tables
+        vlabels, glabels, mins, defs, maxs = self.bounds
+        table = np.array(list(targets.values()), dtype='f8')  # raises ValueError if they differ in length
+        counts = [len(targets), table.shape[-1], len(vow_constants), len(con_constants), len(vlabels), len(glabels)]
+        names = [self.key] + list(targets) + list(vow_constants) + list(con_constants) + list(vlabels) + list(glabels)
+        values = np.concatenate([np.array(counts, dtype='f8'), table.ravel(),
+                                 np.array(list(vow_constants.values()) + list(con_constants.values()), dtype='f8'),
+                                 np.array(list(mins) + list(defs) + list(maxs), dtype='f8')])
+        temporary = path + '.' + str(os.getpid()) + '.tmp'
+        with open(temporary, 'wb') as b_file:
+            np.save(b_file, np.array(names, dtype='U'), allow_pickle=False)
+            np.save(b_file, values, allow_pickle=False)
+        os.replace(temporary, path)
@@ -0,0 +1,164 @@
+# -------------------------------------------------------------------------------
+# Name:        cache
+# Purpose:     Bounded cache of produced utterances, so that repeated utterances
+#              are neither planned, nor moved through, nor (optionally) synthesized
+#              again. Entries are kept in memory, and optionally on disk
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Global imports
+import os
+import hashlib
+from collections import OrderedDict
+import numpy as np
+# Local imports
+from ..model_components import ENGINES
+
+VERSION = 1  # Layout of the entries on disk: entries of other versions are misses
+_ENGINES = dict((engine.__name__, engine) for engine in ENGINES.values())
+
+
+# Hash of the contents of the given files, used to tell apart different resources
+def fileDigest(*paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as r_file:
+            digest.update(r_file.read())
+    return digest.hexdigest()
+
+
+# What is needed to reproduce an utterance without producing it again
+class CachedUtterance:
+    __slots__ = ('vframes', 'gframes', 'audio', 'frames', 'command', 'state')
+
+    def __init__(self, vframes, gframes, audio, frames, command, state):
+        self.vframes = vframes  # The vocal tract frames dumped in the synthesizer
+        self.gframes = gframes  # The glottal frames dumped in the synthesizer
+        self.audio = audio  # The synthesized audio, if it's cached as well
+        self.frames = frames  # Number of frames the utterance took
+        self.command = command  # Motor command at the end of the utterance (see MPP.snapshot())
+        self.state = state  # Vocal tract parameters at the end of the utterance (see VocalTract.snapshot())
+
+
+# Entries are stored on disk as a sequence of arrays in the .npy format, with no pickled objects,
+# as the folder may be shared: loading an entry must never run code. The first array holds the version,
+# the class of the command and the names of the arrays that follow: the fields of the entry,
+# then the state of the command (see MotorCommand.getState()). None is stored as an empty array of strings
+def _encode(value):
+    return np.empty(0, dtype='U1') if value is None else np.asarray(value)
+
+
+def _decode(array):
+    if array.dtype.kind == 'U':
+        return None if array.ndim else str(array)
+    return array.item() if array.ndim == 0 else array
+
+
+def _storeEntry(c_file, entry):
+    command = {} if entry.command is None else entry.command.getState()
+    fields = [('vframes', entry.vframes), ('gframes', entry.gframes), ('audio', entry.audio),
+              ('frames', entry.frames), ('state', entry.state)] + list(command.items())
+    engine = '' if entry.command is None else type(entry.command).__name__
+    np.save(c_file, np.array([str(VERSION), engine] + list(name for name, value in fields), dtype='U'),
+            allow_pickle=False)
+    for name, value in fields:
+        np.save(c_file, _encode(value), allow_pickle=False)
+
+
+# Returns the entry, or None if it's of another version
+def _loadEntry(c_file):
+    names = np.load(c_file, allow_pickle=False).tolist()
+    if len(names) < 7 or names[0] != str(VERSION):
+        return None
+    values = dict((name, _decode(np.load(c_file, allow_pickle=False))) for name in names[2:])
+    fields = list(values.pop(name) for name in ('vframes', 'gframes', 'audio', 'frames', 'state'))
+    command = _ENGINES[names[1]].fromState(values) if names[1] else None  # raises KeyError
+    return CachedUtterance(fields[0], fields[1], fields[2], int(fields[3]), command, fields[4])
+
+
+# Least recently used entries are discarded first
+# An utterance is produced differently depending on the configuration, which is summarized by signature,
+# and on the state of the system when it's started, which is part of each key (see key())
+class UtteranceCache:
+    def __init__(self, capacity, signature, path=None, audio=True):
+        self.audio = audio  # Whether the audio of the utterances is cached, rather than synthesized again
+        self.__entries = OrderedDict()  # Keys to CachedUtterance, from the least recently used
+        self.__capacity = capacity  # Maximum number of entries held in memory
+        self.__signature = signature
+        self.__path = path  # Folder of the entries stored on disk; if None, they are only held in memory
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        # Statistics:
+        self.hits = 0
+        self.disk_hits = 0  # Hits that were found on disk only
+        self.misses = 0
+        self.evictions = 0
+
+    # Key of the utterance, when started from the given state (any sequence of np.arrays and numbers)
+    def key(self, utterance, start):
+        digest = hashlib.sha1(self.__signature.encode())
+        digest.update(utterance.encode())
+        for item in start:
+            digest.update(memoryview(item).tobytes() if hasattr(item, 'shape') else repr(item).encode())
+        return digest.hexdigest()
+
+    def __file(self, key):
+        return os.path.join(self.__path, key + '.npy')
+
+    # Returns the entry of the key, or None if it's not cached
+    def get(self, key):
+        entry = self.__entries.get(key, None)
+        if entry is not None:
+            self.__entries.move_to_end(key)
+        elif self.__path is not None:
+            entry = self.__load(key)
+            if entry is not None:
+                self.__hold(key, entry)
+                self.disk_hits += 1
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self.__hold(key, entry)
+        if self.__path is not None:
+            self.__store(key, entry)
+
+    def __hold(self, key, entry):
+        self.__entries[key] = entry
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__capacity:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    # A damaged or unreadable entry is simply a miss
+    def __load(self, key):
+        try:
+            with open(self.__file(key), 'rb') as c_file:
+                return _loadEntry(c_file)
+        except Exception:
+            return None
+
+    # Entries are written to a temporary file first, so that concurrent processes never read partial ones
+    def __store(self, key, entry):
+        temporary = self.__file(key) + '.' + str(os.getpid()) + '.tmp'
+        try:
+            with open(temporary, 'wb') as c_file:
+                _storeEntry(c_file, entry)
+            os.replace(temporary, self.__file(key))
+        except (OSError, ValueError):
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self.__entries), 'capacity': self.__capacity,
+                'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hits / lookups if lookups else 0.0}
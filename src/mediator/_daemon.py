@@ -0,0 +1,206 @@
+# -------------------------------------------------------------------------------
+# Name:        daemon
+# Purpose:     Keeps a mediator, and with it the VocalTractLab instance, resident,
+#              synthesizing the utterances requested over a Unix domain socket,
+#              so that the cost of starting up is paid once for many requests
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Requests and responses are lines of JSON; any number of requests can be sent over a connection,
+# and they are answered in order. Requests are either:
+#   {"command": "say", "utterance": "ba_da", "audio": false}
+# answered with {"utterance": ..., "path": ..., "error": ..., "bytes": n}, where path is the audio file
+# (or None, along with the error, if the utterance failed); if audio is true, the response is followed
+# by the n bytes of the audio, as a .wav file, or:
+#   {"command": "stats"}
+# answered with {"stats": ...}, the statistics of the mediator (see Mediator.stats()) and of the requests.
+# Clients are served concurrently, but the utterances are rendered one at a time, by a single thread
+# that owns the mediator (see Mediator.render()); the utterances waiting to be rendered are held by a bounded
+# queue, and clients wait for room once it's full, so that no more requests are accepted than can be served
+
+# Global imports
+import io
+import os
+import sys
+import json
+import signal
+import socket
+import socketserver
+from queue import Queue
+from threading import Thread, Event, Lock
+# Local imports
+from . import _init_utils as init
+from ._mediator import Mediator
+
+
+# An utterance waiting to be rendered, and then its result
+class _Request:
+    __slots__ = ('utterance', 'audio', 'path', 'error', 'done')
+
+    def __init__(self, utterance):
+        self.utterance = utterance
+        self.audio = None
+        self.path = None
+        self.error = None
+        self.done = Event()
+
+
+# The audio as the content of a .wav file
+def wavBytes(sampling_rate, audio):
+    from scipy.io import wavfile  # Only loaded when needed, as it's slow to import
+    content = io.BytesIO()
+    wavfile.write(content, sampling_rate, audio)
+    return content.getvalue()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.daemon
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                command = request.get('command')
+                if command == 'stats':
+                    self.__reply({'stats': daemon.stats()})
+                elif command == 'say':
+                    self.__say(daemon, str(request['utterance']), bool(request.get('audio', False)))
+                else:
+                    self.__reply({'error': 'Unknown command: ' + str(command)})
+            except (ValueError, KeyError, AttributeError) as ex:  # Malformed request
+                self.__reply({'error': 'Malformed request: ' + str(ex)})
+            except OSError:  # The client has gone
+                return
+
+    def __say(self, daemon, utterance, audio):
+        request = daemon.submit(utterance)
+        request.done.wait()
+        content = b''
+        if audio and request.audio is not None:
+            content = wavBytes(daemon.sampling_rate, request.audio)
+        self.__reply({'utterance': utterance, 'path': request.path, 'error': request.error, 'bytes': len(content)})
+        self.wfile.write(content)
+
+    def __reply(self, response):
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+        self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True  # Clients still connected don't hold the daemon up when it's shut down
+
+
+# Serves the requests on the socket at path, rendering them with the mediator, which must not be running
+# (see Mediator.render()); at most queue_size utterances wait to be rendered
+class SynthesisDaemon:
+    def __init__(self, mediator, path, queue_size=64):
+        self.__mediator = mediator
+        self.__path = path
+        self.__requests = Queue(max(queue_size, 1))
+        self.__lock = Lock()  # Guards the counters
+        self.__served = 0
+        self.__failed = 0
+        self.sampling_rate = mediator.getSamplingRate()
+        if os.path.exists(path):  # Left by a daemon that didn't exit cleanly, unless it's still running
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                if probe.connect_ex(path) == 0:
+                    raise OSError("A daemon is already listening on " + path)
+            os.unlink(path)
+        self.__server = _Server(path, _Handler)  # raises OSError
+        self.__server.daemon = self
+        self.__worker = Thread(target=self.__work, daemon=True)
+
+    # Queues an utterance to be rendered, waiting for room if the queue is full; returns its request
+    def submit(self, utterance):
+        request = _Request(utterance)
+        self.__requests.put(request)
+        return request
+
+    def __work(self):
+        while True:
+            request = self.__requests.get()
+            if request is None:
+                break
+            try:
+                # Every utterance starts from rest, so that the results don't depend on the order of the requests
+                self.__mediator.restart()  # raises UnrecoverableException
+                request.audio = self.__mediator.render(request.utterance)  # raises RecoverableException...
+                a_file = self.__mediator.save(request.utterance, request.audio)  # raises OSError
+                # The file must exist once its path is sent to the client (see Mediator.flush())
+                failures = self.__mediator.flush()
+                if a_file in failures:
+                    request.error = "Unable to write " + a_file + ":\n  " + failures[a_file]
+                else:
+                    request.path = a_file
+            except Exception as ex:  # A failure of one utterance must not stop the daemon
+                request.error = str(ex)
+            with self.__lock:
+                if request.error is None:
+                    self.__served += 1
+                else:
+                    self.__failed += 1
+            request.done.set()
+        # Requests still waiting are failed, rather than left waiting forever
+        while not self.__requests.empty():
+            request = self.__requests.get()
+            if request is not None:
+                request.error = "The daemon has been shut down"
+                request.done.set()
+
+    # Statistics of the mediator (see Mediator.stats()), along with those of the requests
+    def stats(self):
+        with self.__lock:
+            requests = {'served': self.__served, 'failed': self.__failed, 'queued': self.__requests.qsize(),
+                        'capacity': self.__requests.maxsize}
+        stats = self.__mediator.stats()
+        stats['requests'] = requests
+        return stats
+
+    # Serves the requests until shutdown() is called from another thread, or the serving thread is interrupted
+    # The mediator is closed at the end, and the socket removed
+    def serve(self):
+        self.__worker.start()
+        try:
+            self.__server.serve_forever()
+        finally:
+            self.__server.server_close()
+            if os.path.exists(self.__path):
+                os.unlink(self.__path)
+            self.__requests.put(None)
+            self.__worker.join()
+            self.__mediator.close()
+
+    def shutdown(self):
+        self.__server.shutdown()
+
+
+# Runs the daemon with a mediator of its own, on the socket of the configuration unless a path is given,
+# until it's interrupted or terminated
+def serve_daemon(path=None):
+    conf = init.load_config()  # raises FileNotFound
+    mediator = Mediator(Queue(0), Queue(0))  # raises UnrecoverableException
+    try:
+        daemon = SynthesisDaemon(mediator, path or conf['daemon_socket'], conf['daemon_queue'])  # raises OSError
+    except OSError:
+        mediator.close()
+        raise
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # Exits cleanly, through serve()
+    print("Listening on " + (path or conf['daemon_socket']))
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+
+
+# Requests the synthesis of the utterance from the daemon listening at path, for clients written in Python
+# Returns (path of the audio file, reason of the failure, content of the .wav file if audio is True)
+def request(path, utterance, audio=False):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        stream = client.makefile('rwb')
+        stream.write(json.dumps({'command': 'say', 'utterance': utterance, 'audio': audio}).encode() + b'\n')
+        stream.flush()
+        response = json.loads(stream.readline())
+        content = stream.read(response['bytes']) if response.get('bytes') else None
+        return response['path'], response['error'], content
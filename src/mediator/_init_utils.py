@@ -12,10 +12,51 @@
 # Global imports
 import sys
 # Local imports
-from ..model_components import MotorPhonemePrograms, SomatoPhonemeTargets, MotorSyllablePrograms
+from ..model_components import MotorPhonemePrograms, SomatoPhonemeTargets, MotorSyllablePrograms, ENGINES
 from ..model_components import Synthesizer, VocalTract
 from ..model_components import setIndexes, setValidation
-from ..utils import extractFileInfo
+from ..utils import extractFileInfo, AudioWriter
+from ._cache import UtteranceCache, fileDigest
+from ._bundle import ResourceBundle, bundleKey
+from ._pipeline import Pipeline
+
+
+# Optional paths are disabled by 'none'
+def _optional_path(value):
+    return None if value.lower() == 'none' else value
+
+
+# Optional weights are given as 'label:weight' pairs, separated by spaces, or disabled by 'none'
+def _optional_weights(value):
+    if value.lower() == 'none':
+        return None
+    return dict((label, float(weight)) for label, weight in (pair.split(':') for pair in value.split()))
+
+
+# Optional configuration entries, in the order of the configuration file: (key, type, default)
+OPTIONAL_CONFIG = [('stream_block', int, 0),  # Synthesized frames per streaming block, 0 disables streaming
+                   ('stream_overlap', int, 5),  # Synthesized frames around each streaming block
+                   ('cache_size', int, 64),  # Utterances held in the cache, 0 disables the cache
+                   ('cache_audio', int, 1),  # If not 0, the audio of the utterances is cached as well
+                   ('cache_path', _optional_path, None),  # Folder of the cache on disk, if any
+                   ('engine', str, 'closed'),  # Trajectory engine of the motor commands (see ENGINES)
+                   ('convergence', str, 'mse'),  # Distance from the targets (see MotorPhonemePrograms)
+                   ('convergence_err', float, 0.0004),  # Maximum achievable error for the 'range' distance
+                   ('convergence_weights', _optional_weights, None),  # Weights of the parameters in the distance
+                   ('max_frames', int, 0),  # Maximum frames per target, 0 for no maximum
+                   ('bundle_path', _optional_path, 'resources/bundle.npy'),  # Resource bundle, if any
+                   ('writer_threads', int, 1),  # Threads writing audio files, 0 writes them synchronously
+                   ('writer_queue', int, 8),  # Utterances waiting to be written before the mediator waits
+                   ('writer_sync', int, 8),  # Audio files written before they are synced to disk
+                   ('pipeline', int, 0),  # Utterances queued between the stages of the pipeline, 0 disables it
+                   ('log_decimation', int, 1),  # Frames per logged frame of the trajectories (see TrajectoryLog)
+                   ('stats_path', _optional_path, 'resources/stats.json'),  # Statistics saved on exit, if any
+                   ('trace_path', _optional_path, None),  # Folder of the timelines of the sessions, if traced
+                   ('daemon_socket', str, 'resources/daemon.sock'),  # Socket of the daemon (see SynthesisDaemon)
+                   ('daemon_queue', int, 64),  # Utterances waiting to be rendered by the daemon
+                   ('input_queue', int, 64),  # Inputs read ahead of the interface, 0 for no limit
+                   ('command_queue', int, 64),  # Commands waiting for the mediator, 0 for no limit
+                   ('sparse_qred', int, 0)]  # Quality reduction from which motion is sparse, 0 for never
 
 
 # Loads the configuration file, assuming it's not been moved
@@ -35,39 +76,107 @@ def load_config():
             'frate': int(c_info[4]),  # The frame rate
             'qred': int(c_info[5]),  # The quality reduction
             'err': float(c_info[6])}  # Maximum achievable error
+    # Entries appended after the original ones are optional, and take their default if missing
+    for i, (key, cast, default) in enumerate(OPTIONAL_CONFIG):
+        conf[key] = cast(c_info[7+i]) if len(c_info) > 7+i else default
     return conf
 
 
+# The resource bundle of the configuration, or None if it's disabled, or needs to be built
+def bundle_initialization(conf):
+    if conf['bundle_path'] is None:
+        return None
+    return ResourceBundle.load(conf['bundle_path'], bundleKey(conf))  # raises FileNotFound
+
+
+# Stores the resources as parsed and retrieved, unless they've been loaded from the bundle
+def bundle_update(conf, bundle, spt, param_info):
+    if conf['bundle_path'] is None or bundle is not None:
+        return
+    try:
+        ResourceBundle(bundleKey(conf), spt.getTables(), param_info.getBounds()).save(conf['bundle_path'])
+    except (OSError, ValueError) as e:  # The resources are still usable, only the next startup is slower
+        print('  Building the resource bundle failed: ' + str(e))
+
+
 # Pre-initialization configuration, initializes certain class variables
+# Returns the resource bundle as well, if any (see bundle_initialization())
 def preliminary_initialization():
     print('Loading configuration...')
     conf = load_config()  # raises FileNotFound
+    bundle = bundle_initialization(conf)  # raises FileNotFound
     # Even though this is not a configuration, the api requires
     # to be initialized before parameters information can be extracted
     print('Initializing syntesizer...')
     synthesizer = Synthesizer(conf['apipath'], conf['speaker'], conf['frate'], conf['qred'])
     synthesizer.display()
     print('Loading parameters information...')
-    param_info = synthesizer.getParametersInfo()
+    param_info = synthesizer.getParametersInfo(bundle.bounds if bundle is not None else None)
     param_info.display()
     print('  Initializing parameters lists and related methods...')
-    setIndexes(param_info.getVocalLabels() + param_info.getGlottalLabels(), param_info.getWorkingLabels())
-    setValidation(param_info.validate)
+    setIndexes(param_info.getVocalLabels() + param_info.getGlottalLabels(), param_info.getWorkingLabels(),
+               param_info.getVocalLabels(), param_info.getGlottalLabels())
+    setValidation(param_info.validate, param_info.validate_array)
     MotorPhonemePrograms.setSanitizingFunction(param_info.sanitize_parameter_list)
-    return conf, synthesizer, param_info
+    return conf, synthesizer, param_info, bundle
+
+
+# The background writer of the audio files, or None if they're written synchronously
+# Failed writes are reported through the given function, with the path and the exception
+def writer_initialization(conf, failed=None):
+    if conf['writer_threads'] <= 0:
+        return None
+    return AudioWriter(conf['writer_threads'], conf['writer_queue'], conf['writer_sync'], failed)
 
 
-def component_initialization(conf, synth, param_info):
+def component_initialization(conf, synth, param_info, bundle=None, failed=None):
     print('Initializing submodules...')
     print('  Loading somatophoneme targets...')
-    spt = SomatoPhonemeTargets(conf['err'])
+    spt = SomatoPhonemeTargets(conf['err'], bundle.tables if bundle is not None else None)
+    bundle_update(conf, bundle, spt, param_info)
     print('  Initializing motor planner...')
     msp = MotorSyllablePrograms(
         spt.targets, spt.vow_constants, spt.con_constants)
     print('  Initializing vocal tract...')
-    vt = VocalTract(synth, conf['qred'], param_info.getDefaults(), conf['audiopath'])
+    vt = VocalTract(synth, conf['qred'], param_info.getDefaults(), conf['audiopath'],
+                    conf['stream_block'], conf['stream_overlap'], writer_initialization(conf, failed))
     print('  Initializing motor controller...')
     s0 = vt.getState()
+    if conf['engine'] not in ENGINES:
+        raise ValueError("Unknown trajectory engine '" + conf['engine'] + "', "
+                         "available engines are: " + ', '.join(ENGINES))
+    weights = None
+    if conf['convergence_weights'] is not None:
+        unknown = set(conf['convergence_weights']) - set(param_info.getWorkingLabels())
+        if unknown:
+            raise ValueError("Unknown parameters in the convergence weights: " + ', '.join(sorted(unknown)))
+        weights = list(conf['convergence_weights'].get(k, 1.0) for k in param_info.getWorkingLabels())
+    # The range distance is on a different scale than the mean square error
+    err = spt.err if conf['convergence'] == 'mse' else conf['convergence_err']
     # raises ValueError, unrecoverable:
-    mpp = MotorPhonemePrograms(s0, conf['frate'], spt.err)
+    mpp = MotorPhonemePrograms(s0, conf['frate'], err, ENGINES[conf['engine']], metric=conf['convergence'],
+                               weights=weights, max_frames=conf['max_frames'])
     return spt, msp, vt, mpp
+
+
+# The pipeline of the interactive path (see Pipeline), or None if disabled
+# It takes over the production queue, passes the messages of the synthesis process to report,
+# and records its stages in stats; its processes run on the given api, if not on the one of the configuration
+def pipeline_initialization(conf, production_queue, msp, report, stats, api=None):
+    if conf['pipeline'] <= 0:
+        return None
+    if conf['stream_block'] > 0:
+        raise ValueError("Streaming synthesis can't be pipelined, as it synthesizes while moving: "
+                         "either pipeline or stream_block must be 0")
+    return Pipeline(conf, production_queue, msp, report, api, stats)
+
+
+# The cache of the utterances, or None if disabled
+# Its signature summarizes everything, besides the utterance and the starting state, that the audio depends on
+def cache_initialization(conf):
+    if conf['cache_size'] <= 0:
+        return None
+    print('Initializing utterance cache...')
+    signature = ' '.join(str(conf[k]) for k in ('apipath', 'frate', 'qred', 'err')) + ' ' + \
+        fileDigest(conf['speaker'], 'resources/targets', 'resources/targetpars')  # raises FileNotFound
+    return UtteranceCache(conf['cache_size'], signature, conf['cache_path'], conf['cache_audio'] != 0)
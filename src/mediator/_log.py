@@ -0,0 +1,69 @@
+# -------------------------------------------------------------------------------
+# Name:        log
+# Purpose:     Logs the trajectories of the working parameters, and of their
+#              targets, while an utterance is being produced, so that they can
+#              be plotted or exported
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Global imports
+import os
+import hashlib
+import numpy as np
+
+
+# The states and targets are held in a buffer allocated once, shaped (2, frame, parameter), which doubles
+# whenever it's full; clear() keeps it, so that the next utterances reuse it.
+# With decimation n, only one in n frames is logged, starting from the first one
+class TrajectoryLog:
+    def __init__(self, parameters, decimation=1, capacity=1024):
+        self.decimation = max(decimation, 1)
+        self.__buffer = np.empty((2, max(capacity, 1), parameters), dtype='f8')
+        self.__size = 0  # Frames logged
+        self.__frames = 0  # Frames appended, including the ones left out by decimation
+
+    def __len__(self):
+        return self.__size
+
+    # Logs the state of a frame and the target it's moving to
+    def append(self, state, target):
+        if self.__frames % self.decimation == 0:
+            if self.__size == self.__buffer.shape[1]:
+                grown = np.empty((2, 2 * self.__size, self.__buffer.shape[2]), dtype='f8')
+                grown[:, :self.__size] = self.__buffer[:, :self.__size]
+                self.__buffer = grown
+            self.__buffer[0, self.__size] = state
+            self.__buffer[1, self.__size] = target
+            self.__size += 1
+        self.__frames += 1
+
+    # Logged states, shaped (frame, parameter); this is a view of the buffer, valid until the next append()
+    def states(self):
+        return self.__buffer[0, :self.__size]
+
+    # Logged targets, as states()
+    def targets(self):
+        return self.__buffer[1, :self.__size]
+
+    # Frame of each logged state, counted from the first one
+    def frames(self):
+        return np.arange(self.__size) * self.decimation
+
+    def clear(self):
+        self.__size = 0
+        self.__frames = 0
+
+    # Saves the states and targets in the path, as a single .npy array shaped (2, frame, parameter)
+    # The file is named after the label and its content, as audio files are (see contentFile()),
+    # and written aside and then moved; returns its path
+    def save(self, path, label):
+        trajectories = np.ascontiguousarray(self.__buffer[:, :self.__size])
+        digest = hashlib.sha1(str(self.decimation).encode() + trajectories.tobytes()).hexdigest()
+        l_file = path + (label + ' - ' if label else '') + 'trajectories - ' + digest[:16] + '.npy'
+        temporary = l_file + '.' + str(os.getpid()) + '.tmp'
+        with open(temporary, 'wb') as t_file:
+            np.save(t_file, trajectories, allow_pickle=False)
+        os.replace(temporary, l_file)
+        return l_file
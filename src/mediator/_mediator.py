@@ -12,89 +12,300 @@
 # -------------------------------------------------------------------------------
 
 # Global imports
-from queue import Empty, Queue
+import os
+import time
+from datetime import datetime
+from queue import Queue
 import numpy as np
-from matplotlib import pyplot as pl
 # Local imports:
 from . import _init_utils as init
+from ._cache import CachedUtterance
+from ._log import TrajectoryLog
+from ._profile import UtteranceProfiler
 from ..model_components import WorkingParList, getWorkingLabels
-from ..utils import UnrecoverableException, RecoverableException, HSFCThread
+from ..utils import UnrecoverableException, RecoverableException, HSFCThread, Stats, formatStats, dumpStats
+from ..utils import tracer, startTracing, stopTracing
 
 
 class Mediator(HSFCThread):
+    # The components can be given as (msp, vt, mpp, cache), along with the configuration they've been initialized
+    # from (see load_config()), rather than initialized here from the configuration file: e.g. on another
+    # synthesizer than the api, for testing purposes. The pipeline, if any, then runs its processes on api
     def __init__(self, production_queue: Queue,  # Input to the mediator
-                 results_queue: Queue):  # Output from the mediator
+                 results_queue: Queue,  # Output from the mediator
+                 conf=None, components=None, api=None):
         super(Mediator, self).__init__(production_queue, results_queue)
 
-        # Loading configurations and pre-initialization:
-        try:
-            # raises FileNotFound, unrecoverable:
-            conf, synth, self.param_info = init.preliminary_initialization()
-        except Exception as e:
-            raise UnrecoverableException('Loading configuration failed: \n  '+str(e))
+        self.param_info = None
+        if components is None:
+            # Loading configurations and pre-initialization:
+            try:
+                # raises FileNotFound, unrecoverable:
+                conf, synth, self.param_info, bundle = init.preliminary_initialization()
+            except Exception as e:
+                raise UnrecoverableException('Loading configuration failed: \n  '+str(e))
+        self._stats = Stats()  # Counters and timers of production
+        self._stats_path = conf['stats_path']  # The statistics are saved here on close(), if any
+        self._trace_file = None  # The timeline of the session is saved here on close(), if traced (see Tracer)
+        if conf['trace_path'] is not None:
+            self._trace_file = os.path.join(conf['trace_path'],
+                                            'trace - ' + datetime.now().strftime("%d-%m-%Y-%H.%M.%S") + '.json')
+            startTracing()
 
         # Components initialization:
+        self._spt = None
         try:
-            self._spt, self._msp, self._vt, self._mpp = \
-                init.component_initialization(conf, synth, self.param_info)
+            if components is None:
+                self._spt, self._msp, self._vt, self._mpp = \
+                    init.component_initialization(conf, synth, self.param_info, bundle, self._write_failed)
+            else:
+                self._msp, self._vt, self._mpp, self._cache = components
+            # Stages running alongside the mediator, if any; they're started by run()
+            self._pipeline = init.pipeline_initialization(conf, production_queue, self._msp, self._synthesized,
+                                                          self._stats, api)
         except Exception as e:
             raise UnrecoverableException('Initialization failed: \n  '+str(e))
             if self._vt:
                 self._vt.close()
+        if components is None:
+            self._cache = init.cache_initialization(conf)  # raises FileNotFound, unrecoverable
 
         # Logging variables
         self._current_utterance = None
-        self._current_log = []  # Temporary storage for logs
-        self._targets_log = []  # Temporary storage for logs
+        self._log = TrajectoryLog(len(getWorkingLabels()), conf['log_decimation'])  # Trajectories, when requested
+        self._output_path = conf['audiopath']  # Folder of the exported trajectories and profiles
+        self._profiler = None  # Profiler of the current utterance, if requested
+        self._motion_time = 0.0  # Seconds spent moving through the current utterance, frame by frame
+        self._motion_frames = 0
+        self._utterance_start = 0  # When the current utterance was started, for tracing purposes (see Tracer.now())
+        # Caching variables, for the utterance being produced (see _lookup())
+        self._key = None  # Key under which it will be cached, if it will be
+        self._start = 0  # Vocal tract counter when it was started
         # Other variables
-        self._toPlot = False  # If true, each utterance will be plotted before being synthesized
+        # Options of the current utterance: 'plot' to plot it, 'log' to export its trajectories, 'profile' to profile it
+        self._options = {}
+        self._logging = False  # If true, the trajectories of the current utterance are logged
         self._max_time_letter = int(conf['frate']/2)  # Maximum frames allowed per character (0.5s)
+        self._sparse_qred = conf['sparse_qred']  # Quality reduction from which motion is sparse (see _move())
 
-    # Moves on to the next command if available, otherwise it waits
+    # Moves on to the next command, waiting for it if necessary
+    # Commands are ('say', (options, utterance)) or ('stats', queues), which is answered with the statistics,
+    # along with the depths of the given queues (e.g. those of the interface)
+    # With a pipeline, commands come already planned, and are moved through all at once (see _move());
+    # only plotted or logged ones are moved through frame by frame, and profiled ones are planned
+    # and synthesized by the mediator itself, so that they can be profiled
     def _command_switch(self):
+        # Extract next command
+        if self._pipeline is None:
+            command = self._next()
+            if command is None:
+                return  # The mediator has been killed while waiting
+            (kind, argument), plan = command, None
+        else:
+            command = self._pipeline.next()
+            if command is None:
+                self._kill.set()  # The planner has been stopped while the mediator was waiting
+                return
+            (kind, argument), plan = command
+        if kind == 'stats':
+            stats = self.stats()
+            stats['queues'].update(argument or {})
+            self._output.put(("message", formatStats(stats)))
+            return
+        self._options, self._current_utterance = argument
+        self._utterance_start = tracer().now()
+        self._key = None
+        self._logging = self._options.get('plot', False) or self._options.get('log', False)
+        if self._options.get('profile', False):
+            self._profiler = UtteranceProfiler()
+            self._profiler.start()
+        # Logging, profiling and streaming need the utterance to be actually produced
+        if not self._logging and self._profiler is None and not self._vt.streaming():
+            entry = self._lookup(self._current_utterance)
+            if entry is not None:
+                if self._pipeline is not None:
+                    self._restore(entry)
+                    if entry.audio is not None:
+                        self._pipeline.write(self._current_utterance, np.array(entry.audio), ' from the cache')
+                    else:
+                        self._pipeline.synthesize(self._current_utterance, entry.vframes, entry.gframes,
+                                                  ' from the cache')
+                else:
+                    self._output_audio(self._current_utterance, self._replay(entry))
+                    self._output.put(('message',
+                                      "'" + self._current_utterance + "' has been synthesized from the cache"))
+                self._stats.count('cached')
+                self._reset()
+                return
         try:
-            # Extract next utterance
-            self._toPlot, self._current_utterance = self._input.get(timeout=1)
-            self._input.task_done()
-            try:
-                # Plan for next utterance
-                plan = self._msp.makePlan(self._current_utterance)  # raises RecoverableException
-                # Adds utterance to plan, creating the appropriate motor commands
-                self._mpp.addPlan(plan)  # raises UnrecoverableException
-            except UnrecoverableException as e:
-                self._output.put(("terminate", "An error has been encountered while planning for " +
-                                   self._current_utterance+':\n  '+str(e)))
-                self._kill.set()
-            except RecoverableException as e:
-                self._output.put(("message", "Unable to plan for " + self._current_utterance +
-                                   " because:\n  "+str(e)))
-                self._current_utterance = None  # Skip the utterance
-        except Empty:
-            pass  # This is only needed in case the user terminates the program while in wait
+            # Plan for next utterance
+            if plan is None:
+                plan = self._makePlan(self._current_utterance)  # raises RecoverableException
+            elif isinstance(plan, Exception):  # Raised by the planner
+                raise plan
+            # Adds utterance to plan, creating the appropriate motor commands
+            self._mpp.addPlan(plan)  # raises UnrecoverableException
+            self._vt.begin(self._current_utterance)
+            if self._pipeline is not None and not self._logging:
+                self._output.put(("message", "Started production of '" + self._current_utterance + "'"))
+                if self._move(self._current_utterance):  # raises UnrecoverableException
+                    self.speak()
+                else:
+                    self._output.put(("message", "The current command for " + self._current_utterance +
+                                      " has been reset because of timeout"))
+                    self._stats.count('timeouts')
+                    self._vt.flush()
+                    self._reset()
+        except UnrecoverableException as e:
+            self._output.put(("terminate", "An error has been encountered while planning for " +
+                               self._current_utterance+':\n  '+str(e)))
+            self._kill.set()
+        except RecoverableException as e:
+            self._output.put(("message", "Unable to plan for " + self._current_utterance +
+                               " because:\n  "+str(e)))
+            self._stats.count('failures')
+            self._reset()  # Skip the utterance
+
+    # Maximum number of frames an utterance is allowed to take before being reset
+    def _frame_limit(self, utterance):
+        # Gives 0.5 seconds per letter, +0.5 seconds (for initial and final targets), which is more than enough
+        return (len(utterance)+1) * self._max_time_letter
 
     # Merely a wrapper for the time function to avoid clogging the run() method
     def _safe_time(self, safe):
-        # Gives 0.5 seconds per letter, +0.5 seconds (for initial and final targets), which is more than enough
-        if safe > len(self._current_utterance)+1 * self._max_time_letter:
+        if safe > self._frame_limit(self._current_utterance):
             self._output.put(("message",
                                "The current command for " + self._current_utterance +
                                " has been reset because of timeout"))
+            self._stats.count('timeouts')
             self._reset()
             self._vt.speak(self._current_utterance)  # This flushes the synthesizer; it's unknown if it may get stuck
         else:
             self.time()
 
-    # Resets logging variables
+    # Resets logging variables, recording the motion through the utterance, if any
+    # The profile of an utterance that hasn't been completed is discarded
+    # When tracing, the utterance is traced as a span of the 'utterances' track, however it ended
     def _reset(self):
-        self._current_log = []
-        self._targets_log = []
+        if self._current_utterance:
+            tracer().complete(self._current_utterance, self._utterance_start, tracer().now(), 'mediator', 'utterances')
+        if self._profiler is not None:
+            self._profiler.stop()
+            self._profiler = None
+        if self._motion_frames:
+            self._stats.record('motion', self._motion_time, self._motion_frames)
+            self._motion_time, self._motion_frames = 0.0, 0
+        self._log.clear()
         self._current_utterance = None
+        self._key = None
+
+    # Looks the utterance up in the cache, as started from the current state of the system
+    # Returns its entry, or None; in the latter case, the utterance is cached once produced (see _store())
+    def _lookup(self, utterance):
+        self._key = None
+        if self._cache is None:
+            return None
+        parameters, phase = self._vt.snapshot()
+        key = self._cache.key(utterance, (self._mpp.getFinalValues(), parameters, phase))
+        entry = self._cache.get(key)
+        if entry is None:
+            self._key = key
+            self._start = self._vt.counter
+        return entry
+
+    # Brings the system to the end of a cached utterance
+    def _restore(self, entry):
+        self._mpp.restore(entry.command)
+        self._vt.restore(entry.state, entry.frames)
+
+    # Brings the system to the end of a cached utterance, returning its audio
+    def _replay(self, entry):
+        self._restore(entry)
+        if entry.audio is not None:
+            return np.array(entry.audio)
+        return self._vt.resynthesize(entry.vframes, entry.gframes)
+
+    # Caches the utterance just produced, given the frames it dumped in the synthesizer and its audio
+    def _store(self, frames, audio):
+        vframes, gframes = frames
+        self._cache.put(self._key, CachedUtterance(vframes, gframes,
+                                                   np.array(audio) if self._cache.audio and audio is not None
+                                                   else None,
+                                                   self._vt.counter - self._start,
+                                                   self._mpp.snapshot(), self._vt.snapshot()[0]))
+        self._key = None
+
+    # Plans for the utterance, recording the time it takes
+    def _makePlan(self, utterance):
+        start = time.perf_counter()
+        with tracer().span('planning', 'mediator', args={'utterance': utterance}):
+            plan = self._msp.makePlan(utterance)  # raises RecoverableException
+        self._stats.record('planning', time.perf_counter() - start, len(plan))
+        return plan
+
+    # Synthesizes the frames dumped so far, recording the time it takes
+    def _synthesize(self):
+        start = time.perf_counter()
+        with tracer().span('synthesis', 'mediator'):
+            audio = self._vt.synthesize()
+        self._stats.record('synthesis', time.perf_counter() - start, len(audio) / self._vt.getSamplingRate())
+        return audio
+
+    # Outputs the audio of an utterance to file, recording the time it takes; returns the path of the file
+    def _output_audio(self, utterance, audio):
+        start = time.perf_counter()
+        with tracer().span('output', 'mediator', args={'utterance': utterance}):
+            a_file = self._vt.output(utterance, audio)
+        self._stats.record('output', time.perf_counter() - start, len(audio) / self._vt.getSamplingRate())
+        return a_file
+
+    # Returns the statistics of production (see Stats.snapshot()), along with those of the cache,
+    # of the audio files written in the background and of the pipeline, each None if there's none,
+    # and the commands waiting in the input queue
+    def stats(self):
+        try:
+            commands = self._input.qsize()
+        except NotImplementedError:  # Not available for the queues of a process on every platform
+            commands = None
+        return {'production': self._stats.snapshot(), 'cache': self.cacheStats(), 'writer': self.writerStats(),
+                'pipeline': self._pipeline.stats() if self._pipeline is not None else None,
+                'queues': {'commands': commands}}
+
+    # Returns the sampling rate of the audio returned by render()
+    def getSamplingRate(self):
+        return self._vt.getSamplingRate()
+
+    # Returns the targets of the last utterance, as (label, frames, capped) (see MotorPhonemePrograms.getReport())
+    # Utterances from the cache have no report
+    def targetsReport(self):
+        return self._mpp.getReport()
+
+    # Returns the statistics of the cache, or None if there's no cache
+    def cacheStats(self):
+        return self._cache.stats() if self._cache is not None else None
+
+    # Returns the statistics of the audio files written in the background, or None if they're written synchronously
+    # With a pipeline, they're written by the synthesis process instead (see Pipeline.stats())
+    def writerStats(self):
+        if self._pipeline is not None:
+            return self._pipeline.stats()['writer']
+        return self._vt.outputStats()
+
+    # Reports of the synthesis process of the pipeline
+    def _synthesized(self, message):
+        self._output.put(("message", message))
+
+    # Audio files are written in the background, while the next utterances are produced: failures are reported late
+    def _write_failed(self, path, exception):
+        self._output.put(("message", "Unable to write " + path + ":\n  " + str(exception)))
 
     # This function creates a plot of the vocal tract state, including its targets
     def _plot(self):
+        from matplotlib import pyplot as pl  # Only loaded when plotting, as it's slow to import
         # HARDCODED
-        toPlot = np.array(self._current_log).T
-        targets = np.array(self._targets_log).T
+        frames = self._log.frames()
+        toPlot = self._log.states().T
+        targets = self._log.targets().T
         labels = np.array(getWorkingLabels())
         # Some indexes are removed because they don't seem to contribute to production
         rem_idxs = [21, 22, 23, 27]
@@ -105,19 +316,68 @@ class Mediator(HSFCThread):
         figure, subplots = pl.subplots(6, 4)
         for i in range(6):
             for k in range(4):
-                subplots[i][k].plot(toPlot[4*i+k], 'b')  # State in blue
-                subplots[i][k].plot(targets[4*i+k], 'g')  # Targets in green
+                subplots[i][k].plot(frames, toPlot[4*i+k], 'b')  # State in blue
+                subplots[i][k].plot(frames, targets[4*i+k], 'g')  # Targets in green
                 subplots[i][k].set_title(labels[4*i+k])
 
         figure.suptitle(self._current_utterance)
         pl.subplots_adjust(left=0.05, right=0.99, top=0.90, bottom=0.05, hspace=1.0)
         return pl
 
+    # Saves the logged trajectories of the current utterance in the output folder (see TrajectoryLog.save())
+    def _export(self):
+        try:
+            l_file = self._log.save(self._output_path, self._current_utterance)
+            self._output.put(("message", "The trajectories of '" + self._current_utterance +
+                              "' have been saved in " + l_file))
+        except OSError as e:
+            self._output.put(("message", "Unable to save the trajectories of " + self._current_utterance +
+                              ":\n  " + str(e)))
+
+    # Stops profiling the current utterance, and saves its profile next to its audio file (see UtteranceProfiler.save())
+    # Streamed audio files are named as they're opened: the profile is then named after the utterance and the time
+    def _saveProfile(self, a_file):
+        profiler, self._profiler = self._profiler, None
+        profiler.stop()
+        if a_file is not None:
+            base = os.path.splitext(a_file)[0]
+        else:
+            base = self._output_path + self._current_utterance + ' - ' + datetime.now().strftime("%d-%m-%Y-%H.%M.%S")
+        try:
+            p_file, s_file = profiler.save(base)
+            self._output.put(("message", "The profile of '" + self._current_utterance + "' has been saved in " +
+                              p_file + " and " + s_file))
+        except OSError as e:
+            self._output.put(("message", "Unable to save the profile of " + self._current_utterance +
+                              ":\n  " + str(e)))
+
     # Once a motor plan has been executed, the utterance is synthesized and its data is logged and flushed
     # At the end, the system is ready for a new word
+    # With a pipeline, the frames are synthesized by its process instead, which reports it once done;
+    # the utterance is then cached without its audio. Profiled utterances are synthesized here
     def speak(self):
-        self._vt.speak(self._current_utterance)
+        if self._pipeline is not None and self._profiler is None:
+            frames = self._vt.getFrames()
+            self._vt.flush()
+            self._pipeline.synthesize(self._current_utterance, *frames)
+            if self._key is not None:
+                self._store(frames, None)
+            self._stats.count('utterances')
+            self._reset()
+            return
+        frames = self._vt.getFrames() if self._key is not None else None  # Needed before they're synthesized
+        a_file = None
+        if self._vt.streaming():  # The audio has been synthesized and written while moving
+            audio = self._vt.speak(self._current_utterance)
+        else:
+            audio = self._synthesize()
+            a_file = self._output_audio(self._current_utterance, audio)
+        if frames is not None:
+            self._store(frames, audio)
+        if self._profiler is not None:
+            self._saveProfile(a_file)
         self._output.put(('message', "'" + self._current_utterance + "' has been synthesized"))
+        self._stats.count('utterances')
         self._reset()
 
     # Function called in a loop, representing the effect of time on the system
@@ -125,17 +385,22 @@ class Mediator(HSFCThread):
     def time(self):
         done = True  # If an unrecoverable exception is thrown
         try:
+            start = time.perf_counter()
             # The motor phoneme program is executed
             done, newState = self._mpp.time(self._vt.getState())  # raises UnrecoverableException
-            # The results are logged
-            self._current_log.append(newState)
-            self._targets_log.append(self._mpp.getCurrentTarget())
             # Vocal tract is updated: this is the actual vocal tract movement
             self._vt.time(WorkingParList(newState))  # raises UnrecoverableException
+            self._motion_time += time.perf_counter() - start
+            self._motion_frames += 1
+            # The results are logged, if requested
+            if self._logging:
+                self._log.append(newState, self._mpp.getCurrentTarget())
             # End of the utterance
             if done:
-                if self._toPlot:
+                if self._options.get('plot', False):
                     self._plot().show()
+                if self._options.get('log', False):
+                    self._export()
                 self.speak()
         except UnrecoverableException as e:
             self._output.put(("termination", "An error has been encountered while executing " +
@@ -143,18 +408,109 @@ class Mediator(HSFCThread):
             self._kill.set()
         return done  # This is needed when command switch is external (e.g. for testing purposes)
 
+    # Offline rendering: the utterance is planned and its whole trajectory is computed in chunks of frames,
+    # bypassing the per-frame loop of run() (see _move()); only the frames on the quality reduction grid reach the
+    # synthesizer, and the audio is returned instead of being written to file.
+    # This produces the same audio as the interactive path, as it drives the same components;
+    # for the same reason, it must not be used while the thread is running
+    # If the utterance times out, its frames are discarded and RecoverableException is raised
+    # Cached utterances are not produced again, but the system is brought to the state they end in
+    def render(self, utterance, chunk=1000):
+        entry = self._lookup(utterance)
+        if entry is not None:
+            self._stats.count('cached')
+            return self._replay(entry)
+        plan = self._makePlan(utterance)  # raises RecoverableException
+        self._mpp.addPlan(plan)  # raises UnrecoverableException
+        if not self._move(utterance, chunk):  # raises UnrecoverableException
+            self._vt.flush()
+            self._key = None
+            self._stats.count('timeouts')
+            raise RecoverableException("The production of " + utterance + " has been reset because of timeout")
+        frames = self._vt.getFrames() if self._key is not None else None  # Needed before they're synthesized
+        audio = self._synthesize()
+        if frames is not None:
+            self._store(frames, audio)
+        self._stats.count('utterances')
+        return audio
+
+    # Moves through the plan just added in chunks of frames, as the interactive path does frame by frame
+    # From the quality reduction of sparse_qred on, if any, only the frames that reach the synthesizer
+    # are evaluated (see MotorPhonemePrograms.sparseBlock()); below it, evaluating them all is faster
+    # Returns whether it's been completed within the frame limit of the utterance
+    def _move(self, utterance, chunk=1000):
+        # The interactive path executes at most limit+1 frames before resetting the command
+        limit = self._frame_limit(utterance) + 1
+        remaining = limit
+        done = False
+        start = time.perf_counter()
+        with tracer().span('motion', 'mediator', args={'utterance': utterance}):
+            while not done and remaining > 0:
+                phase, qred = self._vt.getGrid()
+                if 0 < self._sparse_qred <= qred:
+                    done, count, indices, frames, last = \
+                        self._mpp.sparseBlock(self._vt.getState(), min(chunk, remaining), phase, qred)
+                    self._vt.sparseBlock(count, indices, frames, last)  # raises UnrecoverableException
+                else:
+                    done, frames = self._mpp.block(self._vt.getState(), min(chunk, remaining))
+                    self._vt.block(frames)  # raises UnrecoverableException
+                    count = len(frames)
+                remaining -= count
+        self._stats.record('motion', time.perf_counter() - start, limit - remaining)
+        return done
+
+    # Outputs the audio of an utterance to file, returning its path
+    # The file may still be being written in the background until flush()
+    def save(self, utterance, audio):
+        return self._output_audio(utterance, audio)
+
+    # Waits until the audio files output so far have been written, so that their paths can be handed out
+    # Returns the reasons of the writes that failed since the last flush, by path of their files
+    def flush(self):
+        return dict((path, str(ex)) for path, ex in self._vt.flushOutput().items())
+
+    # Returns the articulators to their initial state, so that the next utterance
+    # does not depend on the ones produced before it
+    def restart(self):
+        self._reset()
+        self._vt.reset()
+        self._mpp.reset(self._vt.getState())  # raises UnrecoverableException
+
+    # This is needed because of the c_types in the api
+    # The utterances already given to the pipeline are completed, and the statistics and the timeline
+    # of the session are saved, if requested
+    def close(self):
+        if self._pipeline is not None:
+            self._pipeline.close()
+        if self._trace_file is not None:
+            try:
+                os.makedirs(os.path.dirname(self._trace_file) or '.', exist_ok=True)
+                stopTracing().save(self._trace_file)
+            except OSError as e:
+                print("Unable to save the trace in " + self._trace_file + ":\n  " + str(e))
+            self._trace_file = None
+        if self._stats_path is not None:
+            self._vt.flushOutput()
+            try:
+                dumpStats(self._stats_path, self.stats())
+            except OSError as e:
+                print("Unable to save the statistics in " + self._stats_path + ":\n  " + str(e))
+        if self._vt:
+            self._vt.close()
+
     # Run method for the thread
     def run(self):
+        if self._pipeline is not None:
+            self._pipeline.start()
         safe = 0
         while self.live():
             if self._current_utterance:
                 self._safe_time(safe)
                 safe += 1
             else:
-                self._command_switch()
+                with tracer().span('command switch', 'mediator'):  # Including the wait for the command
+                    self._command_switch()
                 if self._current_utterance:
                     self._output.put(("message", "Started production of '" + self._current_utterance + "'"))
                 safe = 0
-        # This is needed because of the c_types in the api
-        if self._vt:
-            self._vt.close()
+        self.close()
@@ -0,0 +1,202 @@
+# -------------------------------------------------------------------------------
+# Name:        pipeline
+# Purpose:     Runs the production of utterances as a pipeline: utterances are
+#              planned ahead on a thread, moved through by the mediator, and
+#              synthesized and written by a separate process, so that each stage
+#              works on a different utterance at the same time
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The stages are connected by bounded queues, so that none of them gets too far ahead of the next one.
+# Synthesis runs in its own process, with its own VocalTractLab instance, as the api holds the GIL
+# for the whole of vtlSynthBlock; the process writes the audio files as well
+
+# Global imports
+import os
+import time
+import contextlib
+import multiprocessing
+from queue import Queue, Empty
+from threading import Thread
+import numpy as np
+# Local imports
+from ..model_components import Synthesizer
+from ..utils import HSFCThread, AudioWriter, Stats, outputAudio, tracer, startTracing
+
+
+# Plans the commands of the production queue ahead of the mediator
+# Each command is forwarded with its plan, or with the exception raised by planning it, which the
+# mediator handles when it gets to the utterance; commands other than 'say', and profiled utterances
+# (which are planned by the mediator, see Mediator._command_switch()), are forwarded with no plan
+class Planner(HSFCThread):
+    def __init__(self, production_queue, planned_queue, msp, stats):
+        super(Planner, self).__init__(production_queue, planned_queue)
+        self._msp = msp
+        self._stats = stats
+
+    def run(self):
+        while self.live():
+            command = self._next()
+            if command is None:
+                break
+            kind, argument = command
+            plan = None
+            if kind == 'say' and not argument[0].get('profile', False):
+                try:
+                    start = time.perf_counter()
+                    with tracer().span('planning', 'planner', args={'utterance': argument[1]}):
+                        plan = self._msp.makePlan(argument[1])  # raises RecoverableException
+                    self._stats.record('planning', time.perf_counter() - start, len(plan))
+                except Exception as e:
+                    plan = e
+            if not self._forward((command, plan)):
+                break
+        self._forward(HSFCThread.stop_signal)  # Wakes the mediator up, if it's waiting
+
+
+# Synthesizes the jobs and writes their audio, until None is received
+# Each job is (label, note, vocal tract frames, glottal frames, audio): if the audio is given, it's only written
+# Reports are put in the results queue, followed by None once it's over; each is a message for the user,
+# the stages it took (see Stats.record()), the statistics of the writer, if any, and the events traced
+# by the process, which are only sent at the end
+def _synthesis_worker(conf, api, jobs, results):
+    # Initialization messages have already been displayed by the mediator
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        _synthesize_jobs(conf, api, jobs, results)
+
+
+def _synthesize_jobs(conf, api, jobs, results):
+    if conf['trace_path'] is not None:
+        startTracing()
+    try:
+        synth = Synthesizer(conf['apipath'], conf['speaker'], conf['frate'], conf['qred'], api)
+        writer = None
+        if conf['writer_threads'] > 0:
+            writer = AudioWriter(conf['writer_threads'], conf['writer_queue'], conf['writer_sync'],
+                                 lambda path, ex: results.put(("Unable to write " + path + ":\n  " + str(ex),
+                                                               [], None, [])))
+    except Exception as ex:
+        results.put(("Failure initializing the synthesis process:\n  " + str(ex), [], None, []))
+        results.put(None)
+        return
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        label, note, vframes, gframes, audio = job
+        stages = []
+        try:
+            start = time.perf_counter()
+            if audio is None:
+                with tracer().span('synthesis', 'synthesizer', args={'utterance': label}):
+                    synth.dumpBlock(vframes, gframes)
+                    audio = np.array(synth(), dtype=np.int16)
+                    synth.flush()
+                stages.append(('synthesis', time.perf_counter() - start, len(audio) / synth.audio_sampling_rate))
+                start = time.perf_counter()
+            with tracer().span('output', 'synthesizer', args={'utterance': label}):
+                if writer is not None:
+                    writer.submit(conf['audiopath'], label, synth.audio_sampling_rate, audio)
+                else:
+                    outputAudio(conf['audiopath'], label, synth.audio_sampling_rate, audio)
+            stages.append(('output', time.perf_counter() - start, len(audio) / synth.audio_sampling_rate))
+            results.put(("'" + label + "' has been synthesized" + note, stages,
+                         writer.stats() if writer is not None else None, []))
+        except Exception as ex:  # A failure of one utterance must not stop the process
+            synth.flush()
+            results.put(("Unable to synthesize " + label + " because:\n  " + str(ex), stages, None, []))
+    if writer is not None:
+        writer.close()
+    results.put((None, [], writer.stats() if writer is not None else None, tracer().events()))
+    synth.close()
+    results.put(None)
+
+
+# The stages around the mediator: the planner thread, and the synthesis process along with the thread
+# that collects its reports. Nothing is started until start(), so that a mediator that only renders
+# (see Mediator.render()) doesn't start any
+# The stages of planning, synthesis and output are recorded in stats
+class Pipeline:
+    def __init__(self, conf, production_queue, msp, report, api=None, stats=None):
+        self.__conf = conf
+        self.__depth = conf['pipeline']  # Utterances held by each queue between the stages
+        self.__stats = Stats() if stats is None else stats
+        self.__planned = Queue(self.__depth)
+        self.__planner = Planner(production_queue, self.__planned, msp, self.__stats)
+        self.__report = report  # Receives the messages of the synthesis process
+        self.__api = api  # Api for the synthesis process, the VocalTractLabAPI binary if None
+        self.__writer_stats = None  # Last statistics of the writer of the synthesis process
+        # Set by start():
+        self.__jobs = None
+        self.__results = None
+        self.__process = None
+        self.__collector = None
+
+    def start(self):
+        # The process is spawned rather than forked, as the mediator is a thread, and the api holds global state
+        context = multiprocessing.get_context('spawn')
+        self.__jobs = context.Queue(self.__depth)
+        self.__results = context.Queue()
+        self.__process = context.Process(target=_synthesis_worker,
+                                         args=(self.__conf, self.__api, self.__jobs, self.__results), daemon=True)
+        self.__process.start()
+        self.__collector = Thread(target=self.__collect, daemon=True)
+        self.__collector.start()
+        self.__planner.start()
+
+    def __collect(self):
+        while True:
+            try:
+                message = self.__results.get(timeout=0.5)
+            except Empty:
+                if not self.__process.is_alive():  # It's been terminated without notice
+                    return
+                continue
+            if message is None:
+                return
+            message, stages, writer_stats, events = message
+            self.__writer_stats = writer_stats or self.__writer_stats
+            for stage in stages:
+                self.__stats.record(*stage)
+            tracer().extend(events)
+            if message is not None:
+                self.__report(message)
+
+    # Utterances waiting to be moved through and to be synthesized, and the statistics of the writer
+    # of the synthesis process, if any (see AudioWriter.stats())
+    def stats(self):
+        try:
+            queued = self.__jobs.qsize() if self.__jobs is not None else 0
+        except NotImplementedError:  # Not available on every platform
+            queued = None
+        return {'planned': self.__planned.qsize(), 'queued': queued, 'writer': self.__writer_stats}
+
+    # Waits for the next planned command, as (command, plan or exception)
+    # Returns None once the planner has stopped
+    def next(self):
+        command = self.__planned.get()
+        if command is HSFCThread.stop_signal:
+            return None
+        return command
+
+    # Queues the frames of an utterance, as dumped in the synthesizer, to be synthesized and written
+    # The note is appended to the message reporting its synthesis
+    def synthesize(self, label, vframes, gframes, note=''):
+        self.__jobs.put((label, note, vframes, gframes, None))
+
+    # Queues the audio of an utterance to be written
+    def write(self, label, audio, note=''):
+        self.__jobs.put((label, note, None, None, audio))
+
+    # Stops the planner, then lets the synthesis process complete the utterances it's been given
+    def close(self):
+        if self.__planner.is_alive():
+            self.__planner.kill()
+            self.__planner.join()
+        if self.__process is not None:
+            self.__jobs.put(None)
+            self.__collector.join()
+            self.__process.join()
+            self.__process = None
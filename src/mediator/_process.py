@@ -0,0 +1,81 @@
+# -------------------------------------------------------------------------------
+# Name:        process
+# Purpose:     Runs the mediator in a process of its own, so that the production
+#              of utterances doesn't compete with the interface for the GIL
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The mediator is created, run and closed in the process, and with it the VocalTractLab instance.
+# It communicates through multiprocessing queues, as it does through the queues of its thread:
+# the queues must be JoinableQueues of the context of the process (see MediatorProcess.context)
+
+# Global imports
+import multiprocessing
+from threading import Thread
+# Local imports
+from ._mediator import Mediator
+from ..utils import UnrecoverableException
+
+
+# Creates the mediator, reports whether it succeeded through status, then runs it once started, until killed
+# The mediator is run on the main thread of the process, and closes itself once it's done (see Mediator.run())
+def _serve(factory, production_queue, results_queue, status, go, kill):
+    try:
+        mediator = factory(production_queue, results_queue)  # raises UnrecoverableException
+    except Exception as ex:
+        status.send(str(ex))
+        return
+    status.send(None)
+    go.wait()
+    if kill.is_set():  # Killed before being started
+        mediator.close()
+        return
+    # The mediator is killed from another thread, as its own is busy running it
+    def watch():
+        kill.wait()
+        mediator.kill()
+    Thread(target=watch, daemon=True).start()
+    mediator.run()
+
+
+# Stands for a mediator thread, with the same lifecycle: the mediator is created along with this,
+# raising UnrecoverableException if it fails, and runs from start() until it's killed.
+# The factory creates the mediator from its queues; it must be picklable, as the process is spawned
+class MediatorProcess:
+    # The process is spawned rather than forked, as the api holds global state, and the parent has threads
+    context = multiprocessing.get_context('spawn')
+
+    def __init__(self, production_queue, results_queue, factory=Mediator):
+        self.__go = MediatorProcess.context.Event()
+        self.__kill = MediatorProcess.context.Event()
+        status, child_status = MediatorProcess.context.Pipe(duplex=False)
+        # Not a daemon, as the mediator may start processes of its own (see Pipeline)
+        self.__process = MediatorProcess.context.Process(target=_serve, args=(factory, production_queue, results_queue,
+                                                                              child_status, self.__go, self.__kill))
+        self.__process.start()
+        child_status.close()
+        try:
+            failure = status.recv()  # Initialization messages are displayed by the process meanwhile
+        except EOFError:  # The process has exited without a word
+            self.__process.join()
+            failure = "The process of the mediator has exited with code " + str(self.__process.exitcode)
+        status.close()
+        if failure is not None:
+            self.__process.join()
+            raise UnrecoverableException(failure)
+
+    def start(self):
+        self.__go.set()
+
+    def is_alive(self):
+        return self.__process.is_alive()
+
+    # Stops the mediator once it's done with the current utterance, as HSFCThread.kill() does
+    def kill(self):
+        self.__kill.set()
+        self.__go.set()
+
+    def join(self, timeout=None):
+        self.__process.join(timeout)
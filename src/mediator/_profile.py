@@ -0,0 +1,55 @@
+# -------------------------------------------------------------------------------
+# Name:        profile
+# Purpose:     Profiles the production of single utterances, both in time and
+#              in memory, so that slow or memory-hungry ones can be looked into
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Global imports
+import io
+import pstats
+import cProfile
+import tracemalloc
+
+
+# Runs cProfile and tracemalloc from start() to stop(), on the thread that started it.
+# Nothing is profiled, and nothing is traced, outside of them
+class UtteranceProfiler:
+    def __init__(self, top=25):
+        self.top = top  # Lines of the allocations and functions reported
+        self.__profile = cProfile.Profile()
+        self.__snapshot = None  # Allocations still alive at stop()
+        self.__peak = 0  # Peak of the traced memory, in bytes
+        self.__tracing = False  # Whether tracemalloc was started here, rather than by someone else
+
+    def start(self):
+        self.__tracing = not tracemalloc.is_tracing()
+        if self.__tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.__profile.enable()
+
+    def stop(self):
+        self.__profile.disable()
+        self.__snapshot = tracemalloc.take_snapshot()
+        self.__peak = tracemalloc.get_traced_memory()[1]
+        if self.__tracing:
+            tracemalloc.stop()
+
+    # Saves the profile as base.pstats, to be read with pstats, and a summary of the slowest functions
+    # and of the largest allocations as base - profile.txt; returns their paths
+    def save(self, base):
+        p_file, s_file = base + '.pstats', base + ' - profile.txt'
+        self.__profile.dump_stats(p_file)
+        functions = io.StringIO()
+        pstats.Stats(self.__profile, stream=functions).sort_stats('cumulative').print_stats(self.top)
+        with open(s_file, 'w') as summary:
+            summary.write('Peak traced memory: %.1f KiB\n\n' % (self.__peak / 1024))
+            summary.write('Largest allocations still alive at the end, by line:\n')
+            for statistic in self.__snapshot.statistics('lineno')[:self.top]:
+                summary.write('  ' + str(statistic) + '\n')
+            summary.write('\nSlowest functions, by cumulative time:\n')
+            summary.write(functions.getvalue())
+        return p_file, s_file
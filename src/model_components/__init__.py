@@ -1,5 +1,5 @@
 from ._parameters_lists import WorkingParList, setIndexes, setValidation
 from .vocal_tract import getWorkingLabels
-from .phonological_level import MotorPhonemePrograms, SomatoPhonemeTargets
+from .phonological_level import MotorPhonemePrograms, SomatoPhonemeTargets, ENGINES
 from .syllable_level import MotorSyllablePrograms
 from .vocal_tract import Synthesizer, VocalTract
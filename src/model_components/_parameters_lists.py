@@ -16,21 +16,41 @@ import numpy as np
 from abc import abstractmethod
 # Local imports
 from ..utils import UnrecoverableException
-from ..model_components.vocal_tract import getWorkingLabels, getGlottalLabels, getVocalLabels
+from ..model_components.vocal_tract import getGlottalLabels, getVocalLabels
 
 
 # This is an abstract class
 class ParList(object):
+    __slots__ = ('_idx', '_parameters')
     # The internal representation is an np.array,
     # so there needs to be a conversion between parameter label and index
     _wl_indexes = {}  # Used to index the internal representation for all parameters
     _al_indexes = {}  # Used to index the internal representation for working parameters
+    # Index vectors into the internal representation for all parameters, computed once:
+    _working_labels = ()  # Labels of the working parameters, in order
+    _working_vector = np.empty(0, dtype=int)  # of the working parameters
+    _vocal_vector = np.empty(0, dtype=int)  # of the vocal tract parameters, in the order of the api
+    _glottal_vector = np.empty(0, dtype=int)  # of the glottis parameters, in the order of the api
 
     # Used to set the indexingg variables
+    # Vocal and glottal labels default to the ones known by VTParametersInfo
     @staticmethod
-    def setIndexes(all_labels, working_labels):
+    def setIndexes(all_labels, working_labels, vocal_labels=None, glottal_labels=None):
+        if vocal_labels is None:
+            vocal_labels = getVocalLabels()
+        if glottal_labels is None:
+            glottal_labels = getGlottalLabels()
         ParList._al_indexes = {all_labels[idx]: idx for idx in range(len(all_labels))}
         ParList._wl_indexes = {working_labels[idx]: idx for idx in range(len(working_labels))}
+        ParList._working_labels = tuple(working_labels)
+        ParList._working_vector = ParList.indexes(working_labels)
+        ParList._vocal_vector = ParList.indexes(vocal_labels)
+        ParList._glottal_vector = ParList.indexes(glottal_labels)
+
+    # Returns the index vector of the given labels into the internal representation for all parameters
+    @staticmethod
+    def indexes(labels):
+        return np.array(list(ParList._al_indexes[k] for k in labels), dtype=int)
 
     @abstractmethod
     def __init__(self):
@@ -44,7 +64,7 @@ class ParList(object):
         req_par = len(idxs)  # The number of required parameters
         # zero-list originally meant for initial velocity of the system
         if init is None:  # Zero full-list
-            self._parameters = np.array([0.0]*req_par)
+            self._parameters = np.zeros(req_par, dtype='f8')
         # Construct a parameter list from another one
         elif isinstance(init, ParList) and \
                 len(init._parameters) == req_par:
@@ -65,7 +85,7 @@ class ParList(object):
 
     # Returns a copy of only the working parameters, independently of the subclass
     def asTargetParameters(self):
-        return np.array(list(self._parameters[self._idx[k]] for k in getWorkingLabels()), 'f8')
+        return self._parameters[self._working_vector]
 
     # This is a "safe" update of a parameter (if they're not in the object, they are not added)
     def update(self, k, value):
@@ -75,53 +95,91 @@ class ParList(object):
 
 # A State must have all the parameters, as can be converted to a frame
 class State(ParList):
+    __slots__ = ()
     _validate = None  # Validation function, from _parameters_information.py
+    _validate_array = None  # Validation function for arrays of working parameters, from _parameters_information.py
 
     def __init__(self, init=None):
         super(State, self).__init__()
         super(State, self)._init(self._al_indexes, init)  # raises UnrecoverableException
 
     @staticmethod
-    def setValidationFunction(function):
+    def setValidationFunction(function, array_function=None):
         if State._validate is None:
             State._validate = function
+        if State._validate_array is None:
+            State._validate_array = array_function
+
+    # Validates arrays of working parameters, shaped (parameter) or (frame, parameter), as update() does
+    # If labels are given, or no array validation function is set, the bounds are found through _validate
+    @staticmethod
+    def validateArray(values, labels=None):
+        if labels is None and State._validate_array is not None:
+            return State._validate_array(values)
+        mins, maxs = State.bounds(State._working_labels if labels is None else labels)
+        return np.clip(values, mins, maxs)
+
+    # Returns the minimum and maximum values of the given parameters, as enforced by update()
+    @staticmethod
+    def bounds(labels):
+        mins = np.array(list(State._validate(k, -np.inf) for k in labels), dtype='f8')
+        maxs = np.array(list(State._validate(k, np.inf) for k in labels), dtype='f8')
+        return mins, maxs
+
+    # Returns the vocal tract and glottal frames of states given as internal representations,
+    # shaped (state, parameter), as two arrays shaped (state, vocal parameter) and (state, glottal parameter)
+    @staticmethod
+    def asFrames(states):
+        return states[:, State._vocal_vector], states[:, State._glottal_vector]
+
+    # Returns a copy of all the parameters, as stored internally
+    def asArray(self):
+        return np.array(self._parameters)
 
     # Returns a the vocal tract and glottal frames, as required by the api
     def asFrame(self):
-        idx = self._idx
-        v = list(self._parameters[idx[k]] for k in getVocalLabels())
-        g = list(self._parameters[idx[k]] for k in getGlottalLabels())
-        return [v, g]
+        return [self._parameters[self._vocal_vector], self._parameters[self._glottal_vector]]
 
     # Since this is the vocal tract state, its parameters must be validated for minimum and maximum values
     def update(self, k, value: float):
         super(State, self).update(k, State._validate(k, value))
 
+    # Updates all the working parameters at once, from an array in the order of the working labels
+    def updateWorking(self, values):
+        self._parameters[self._working_vector] = State.validateArray(values)
+
 
 # Helper class for parameter lists only requiring working parameters
 class WorkingParList(ParList):
+    __slots__ = ()
+
     def __init__(self, init):
         super(WorkingParList, self).__init__()
         # raises UnrecoverableException:
         super(WorkingParList, self)._init(super(WorkingParList, self)._wl_indexes, init)
 
-    # No need to check (see superclass)
+    # No need to index (see superclass)
     def asTargetParameters(self):
         return np.array(self._parameters)
 
 
 # This was meant to be used with the original motor control (see MPP), but now States are set directly
 class Velocity(WorkingParList):
+    __slots__ = ()
+
     def __init__(self, init=None):
         super(Velocity, self).__init__(init)  # raises UnrecoverableException
 
 
 # A target has not only a parameter list, but also an "effort"
 class Target(WorkingParList):
-    def __init__(self, t_constant, init=None):
+    __slots__ = ('__effort', 'label')
+
+    def __init__(self, t_constant, init=None, label=None):
         super(Target, self).__init__(init)  # raises UnrecoverableException
         # As specified in Birkholz's paper. Used for MotorCommand calculations:
         self.__effort = -1/t_constant
+        self.label = label  # The phoneme the target stands for, for reporting purposes
 
     def getEffort(self):
         return self.__effort
@@ -129,15 +187,15 @@ class Target(WorkingParList):
     # A "nonphonatory" target is a target with pressure 0.0, that is,
     # it is reached but it doesn't produce sound
     def makeNonPhonatory(self, t_constant):
-        pp = Target(t_constant, self)
+        pp = Target(t_constant, self, None if self.label is None else self.label + ' (non-phonatory)')
         super(Target, pp).update('pressure', 0.0)
         return pp
 
 
 # Definitions for interface purposes
-def setIndexes(all_labels, working_labels):
-    ParList.setIndexes(all_labels, working_labels)
+def setIndexes(all_labels, working_labels, vocal_labels=None, glottal_labels=None):
+    ParList.setIndexes(all_labels, working_labels, vocal_labels, glottal_labels)
 
 
-def setValidation(function):
-    State.setValidationFunction(function)
+def setValidation(function, array_function=None):
+    State.setValidationFunction(function, array_function)
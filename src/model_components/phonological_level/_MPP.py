@@ -12,44 +12,102 @@
 # -------------------------------------------------------------------------------
 
 # Global imports
+import copy
 import numpy as np
 # Local imports
 from ._motor_command import MotorCommand
 from .._parameters_lists import Target
+from ...utils import tracer
 
 
 class MotorPhonemePrograms:
     _expected_target = None  # This function "sanitizes" possibly unreachable targets
     # for the purpose of judging when it's time to move on, set from _parameters_information.py
 
-    def __init__(self, initial_state, frate=1000.0, err=0.04):
-        self.__plan = []
-        self.__progression = -1  # Index of the current command
+    # The engine is the class of the motor commands, MotorCommand or one of its subclasses
+    # The window is the number of frames first evaluated at once when looking for a command switch (see segment())
+    # The metric is the distance from the target (see setConvergence())
+    def __init__(self, initial_state, frate=1000.0, err=0.04, engine=MotorCommand, window=32,
+                 metric='mse', weights=None, max_frames=0):
+        self.__engine = engine
+        self.__window = window
         self.__dt = 1000.0/frate  # time increment is in ms (see MotorCommand)
         self.__max_error = err  # Maximum achievable error:
         # if the distance from the target is less than this number, the plan advances
+        self.reset(initial_state)  # raises UnrecoverableException
+        self.setConvergence(metric, weights, max_frames)
+
+    # Sets how the distance from the target is measured, and how long a target can be approached:
+    # 'mse' is the mean square error over the parameters, 'range' divides each parameter by its range first,
+    # so that parameters with large values (e.g. pressure) don't hide the others.
+    # Weights, if given, are the relative importance of each parameter in the mean
+    # If max_frames is not 0, a command is given at most that many frames before the plan advances anyway
+    def setConvergence(self, metric='mse', weights=None, max_frames=0):
+        if metric not in ['mse', 'range']:
+            raise ValueError("Unknown convergence metric: " + str(metric))
+        self.__max_frames = max_frames
+        factors = np.ones(len(self.__mins), dtype='f8')
+        if metric == 'range':
+            ranges = self.__maxs - self.__mins
+            bounded = np.isfinite(ranges) & (ranges > 0)  # Unbounded parameters are not scaled
+            factors[bounded] = 1.0 / np.square(ranges[bounded])
+        if weights is not None:
+            factors *= np.asarray(weights, dtype='f8') / np.sum(weights)
+        else:
+            factors /= len(factors)
+        # The plain mean square error is computed as it always was, so that its results are unchanged
+        self.__factors = None if metric == 'mse' and weights is None else factors
+
+    # Discards the plan, and holds the articulators still in the given state
+    def reset(self, initial_state):
+        self.__plan = []
+        self.__progression = -1  # Index of the current command
+        self.__elapsed = 0  # Frames produced by the current command
+        self.__started = 0  # When the current command was started, for tracing purposes (see Tracer.now())
+        self.__report = []  # (label, frames, capped) of each target of the current plan (see getReport())
 
         # Initialize the command as a "static" command, by using the initial state as target
         len_is = len(initial_state)
         initial_dstate = np.array(list(initial_state) + [0.0] * len_is * (MotorCommand.N-1), dtype='f8'
                                   ).reshape(MotorCommand.N, len_is)
         # "Static" command, which means the MPP simply doesn't move the articulators
-        self.__command = MotorCommand(Target(10.0, initial_state),  # raises UnrecoverableException
-                                      initial_dstate, self.__dt)  # raises UnrecoverableException
+        self.__command = self.__engine(Target(10.0, initial_state),  # raises UnrecoverableException
+                                       initial_dstate, self.__dt)  # raises UnrecoverableException
         self.__current_expected_target = MotorPhonemePrograms._expected_target(self.__command.target)
+        # The bounds of the parameters, as enforced by the sanitizing function
+        self.__mins = np.array(MotorPhonemePrograms._expected_target(np.full(len_is, -np.inf)), dtype='f8')
+        self.__maxs = np.array(MotorPhonemePrograms._expected_target(np.full(len_is, np.inf)), dtype='f8')
 
-    # Calculates the distance from the expected target as Mean Square Error
+    # Calculates the distance from the expected target as Mean Square Error, possibly scaled (see setConvergence())
+    # For an array of states shaped (frame, parameter), the distance of each frame is returned
     def __error(self, state):
-        return (np.square(state - self.__current_expected_target)).mean()
+        return self.__measure(state - self.__current_expected_target)
+
+    # The distance corresponding to the given differences from the target
+    def __measure(self, difference):
+        if self.__factors is None:
+            return (np.square(difference)).mean(axis=-1)
+        return (np.square(difference) * self.__factors).sum(axis=-1)
+
+    # Whether the plan should advance from the given state of the vocal tract
+    def __switch(self, state):
+        return self.__error(state) < self.__max_error or 0 < self.__max_frames <= self.__elapsed
 
     # Advances to the next command in the plan, if available
     # Returns True if the plan has been executed, False if there's steps left
+    # When tracing, each command of the plan is traced as a span of the 'targets' track
     def __advance(self):
+        if self.__progression >= len(self.__report):  # The current command is part of the plan
+            self.__report.append((self.__command.label, self.__elapsed, 0 < self.__max_frames <= self.__elapsed))
+            tracer().complete(self.__command.label, self.__started, tracer().now(), 'motion', 'targets',
+                              {'frames': self.__elapsed})
         if self.__progression < len(self.__plan) - 1:
             self.__progression += 1
-            self.__command = MotorCommand(self.__plan[self.__progression],
-                                          self.__command.getFinalValues(),
-                                          self.__dt)  # raises UnrecoverableException
+            self.__elapsed = 0
+            self.__started = tracer().now()
+            self.__command = self.__engine(self.__plan[self.__progression],
+                                           self.__command.getFinalValues(),
+                                           self.__dt)  # raises UnrecoverableException
             self.__current_expected_target = MotorPhonemePrograms._expected_target(self.__command.target)
             return False
         return True
@@ -61,9 +119,16 @@ class MotorPhonemePrograms:
 
     # Adds a plan to the MPP, which is consumed at the next timeframe
     def addPlan(self, targets):
-        self.__plan += targets
+        self.__plan = self.__plan[self.__progression+1:] + targets
+        self.__progression = -1
+        self.__report = []
         self.__advance()  # raises UnrecoverableException
 
+    # Returns the targets of the current plan reached so far, as (label, frames, capped): frames is the number
+    # of frames spent approaching the target, and capped tells whether the plan advanced because of max_frames
+    def getReport(self):
+        return list(self.__report)
+
     # Used for logging purposes
     def getCurrentTarget(self):
         return np.array(self.__command.target)
@@ -73,17 +138,176 @@ class MotorPhonemePrograms:
     def time(self, state):
         end = False
         # Condition for plan advancement
-        if self.__error(state) < self.__max_error:
+        if self.__switch(state):
             # end "requests" a new plan
             end = self.__advance()  # raises UnrecoverableException
+        self.__elapsed += 1
         return end, self.__command.y()
 
+    # Moves the current command along until the vocal tract is close enough to its expected target,
+    # for up to n frames, from where the last frame left it.
+    # The vocal tract clamps its parameters to the same bounds as the sanitizing function, so the state
+    # it will be in after each frame is known in advance: frames are evaluated in windows, doubling in size,
+    # and the first state close enough to the target is found in each whole window at once
+    # Returns whether the target has been reached, and the frames of the segment as (frame, parameter)
+    # If max_frames is set, the segment also ends once the command has been given that many frames
+    def segment(self, n):
+        if self.__max_frames > 0:
+            n = min(n, self.__max_frames - self.__elapsed)
+        frames = []
+        produced = 0
+        size = self.__window
+        while produced < n:
+            window = self.__command.block(min(size, n - produced))
+            states = np.clip(window, self.__mins, self.__maxs)
+            reached = np.flatnonzero(self.__error(states) < self.__max_error)
+            if len(reached):
+                k = int(reached[0]) + 1
+                self.__command.keep(k)
+                self.__elapsed += k
+                frames.append(window[:k])
+                return True, np.concatenate(frames)
+            frames.append(window)
+            produced += len(window)
+            self.__elapsed += len(window)
+            size *= 2
+        return 0 < self.__max_frames <= self.__elapsed, np.concatenate(frames)
+
+    # Moves the plan along for up to n frames at once, segment by segment, starting from the given
+    # state of the vocal tract; the frames are the same as those produced by time(), frame by frame
+    # Returns whether the plan has been executed, and the frames up to that point as (frame, parameter)
+    def block(self, state, n):
+        frames = []
+        produced = 0
+        while produced < n:
+            # Condition for plan advancement, as in time()
+            if self.__switch(state):
+                if self.__advance():  # raises UnrecoverableException
+                    self.__elapsed += 1
+                    frames.append(self.__command.block(1))
+                    return True, np.concatenate(frames)
+            reached, segment = self.segment(n - produced)
+            frames.append(segment)
+            state = np.clip(segment[-1], self.__mins, self.__maxs)
+            produced += len(segment)
+        return False, np.concatenate(frames)
+
+    # As block(), but only the frames that the vocal tract dumps in the synthesizer are returned, those on
+    # its quality reduction grid: frames j such that (phase + j + 1) % q == 0, along with the last frame.
+    # Frames off the grid are only evaluated where a command switch may happen (see __sparseSegment()),
+    # so switches, and the frames on the grid, are the same as with block()
+    # Returns whether the plan has been executed, the number of frames, the indices of the frames on the grid,
+    # those frames as (frame, parameter), and the last frame
+    def sparseBlock(self, state, n, phase, q):
+        indices, frames = [np.empty(0, dtype=int)], [np.empty((0, len(state)), dtype='f8')]
+        produced = 0
+        last = None
+        while produced < n:
+            # Condition for plan advancement, as in time()
+            if self.__switch(state):
+                if self.__advance():  # raises UnrecoverableException
+                    self.__elapsed += 1
+                    last = self.__command.block(1)[0]
+                    produced += 1
+                    if (phase + produced) % q == 0:
+                        indices.append(np.array([produced - 1]))
+                        frames.append(last[np.newaxis])
+                    return True, produced, np.concatenate(indices), np.concatenate(frames), last
+            reached, count, grid, values, last = self.__sparseSegment(n - produced, phase + produced, q)
+            indices.append(grid + produced)
+            frames.append(values)
+            state = np.clip(last, self.__mins, self.__maxs)
+            produced += count
+        return False, produced, np.concatenate(indices), np.concatenate(frames), last
+
+    # As segment(), returning the number of frames of the segment, the indices of the frames on the grid
+    # (see sparseBlock()) and those frames, and the last frame.
+    # Each window is only evaluated on the grid and at its ends. Between two of these frames, each parameter
+    # can't be any closer to the target than its distance at the two frames allows, given the bound of its speed:
+    # the frames in between are only evaluated when such a lower bound of the error is below the maximum error
+    def __sparseSegment(self, n, phase, q):
+        if not self.__command.sparse:  # The frames are all evaluated anyway
+            reached, segment = self.segment(n)
+            grid = np.flatnonzero((phase + np.arange(len(segment)) + 1) % q == 0)
+            return reached, len(segment), grid, segment[grid], segment[-1]
+        if self.__max_frames > 0:
+            n = min(n, self.__max_frames - self.__elapsed)
+        indices, frames = [np.empty(0, dtype=int)], [np.empty((0, len(self.__mins)), dtype='f8')]
+        produced = 0
+        size = self.__window * q  # About as many frames are evaluated as in segment()
+        while produced < n:
+            m = min(size, n - produced)
+            ts = self.__command.skip(m)
+            grid = np.flatnonzero((phase + produced + np.arange(m) + 1) % q == 0)
+            samples = np.union1d(grid, [0, m-1])
+            values = self.__command.at(samples)
+            k, last = self.__firstReached(ts, samples, values)
+            if k is not None:
+                self.__command.keep(k + 1)
+                self.__elapsed += k + 1
+                grid = grid[grid <= k]
+                indices.append(grid + produced)
+                frames.append(values[np.searchsorted(samples, grid)])
+                return True, produced + k + 1, np.concatenate(indices), np.concatenate(frames), last
+            indices.append(grid + produced)
+            frames.append(values[np.searchsorted(samples, grid)])
+            last = values[-1]
+            produced += m
+            self.__elapsed += m
+            size *= 2
+        return 0 < self.__max_frames <= self.__elapsed, produced, np.concatenate(indices), np.concatenate(frames), last
+
+    # Finds the first frame of the last window of the command whose state is close enough to the target,
+    # given the frames evaluated at the samples; the frames between samples are evaluated where needed
+    # Returns its index in the window and its value, or (None, None)
+    def __firstReached(self, ts, samples, values):
+        states = np.clip(values, self.__mins, self.__maxs)
+        reached = np.flatnonzero(self.__error(states) < self.__max_error)
+        first = reached[0] if len(reached) else len(samples)
+        if len(samples) > 1:
+            distances = np.abs(states - self.__current_expected_target)
+            t0, t1 = ts[samples[:-1]], ts[samples[1:]]
+            travel = (t1 - t0)[:, np.newaxis] * self.__command.speedBound(t0, t1)
+            closest = np.maximum(0.0, (distances[:-1] + distances[1:] - travel) / 2)
+            # Intervals with frames in between, which may be close enough
+            suspect = np.flatnonzero((self.__measure(closest) < self.__max_error * (1 + 1e-6)) &
+                                     (samples[1:] - samples[:-1] > 1))
+            suspect = suspect[suspect < first]
+            if len(suspect):  # Evaluated all at once, in order
+                between = np.concatenate(list(np.arange(samples[j] + 1, samples[j+1]) for j in suspect))
+                frames = self.__command.at(between)
+                close = np.flatnonzero(self.__error(np.clip(frames, self.__mins, self.__maxs)) < self.__max_error)
+                if len(close):
+                    return int(between[close[0]]), frames[close[0]]
+        if first < len(samples):
+            return int(samples[first]), values[first]
+        return None, None
+
+    # Returns the dynamic state of the MPP once its plan has been executed, i.e. its last command
+    def snapshot(self):
+        return copy.deepcopy(self.__command)
+
+    # Returns to a dynamic state saved by snapshot(), with no plan left to execute
+    # The next plan is then executed exactly as it would have been after the one that led to that state
+    def restore(self, command):
+        self.__plan = []
+        self.__progression = -1
+        self.__elapsed = 0
+        self.__report = []
+        self.__command = copy.deepcopy(command)
+        self.__current_expected_target = MotorPhonemePrograms._expected_target(self.__command.target)
+
+    # The values from which the next plan would start, shaped (derivative, parameter)
+    def getFinalValues(self):
+        return self.__command.getFinalValues()
+
     # This function was meant to control the vocal tract through velocity
     # It is not currently in use as the system uses trajectory functions
     def vtime(self, state):
         end = False
-        if self.__error(state) < self.__max_error:
+        if self.__switch(state):
             end = self.__advance()  # raises UnrecoverableException
+        self.__elapsed += 1
         acc = self.__command.time()
         return end, acc
 
@@ -16,12 +16,20 @@ from ...utils import extractFileInfo
 
 
 class SomatoPhonemeTargets:
-    def __init__(self, err):
+    def __init__(self, err, tables=None):
         self.targets = {}  # Known targets
         self.vow_constants = {}  # Known constant times for vowels
         self.con_constants = {}  # Known constant times for consonants
         self.err = err  # Known maximum achievable error
 
+        # Already parsed, e.g. from a resource bundle (see getTables())
+        if tables is not None:
+            targets, vow_constants, con_constants = tables
+            self.targets.update((k, list(v)) for k, v in targets.items())
+            self.vow_constants.update(vow_constants)
+            self.con_constants.update(con_constants)
+            return
+
         # Targets as specified in VocalTractLabAPI and by Birkholz (see Report)
         targets_raw = extractFileInfo('resources/targets')  # raises FileNotFound, unrecoverable
         for i in range(int(len(targets_raw)/2)):
@@ -37,3 +45,8 @@ class SomatoPhonemeTargets:
         # Constant times as worked out in parameters testing
         for i in range(int(len(con_const_raw)/2)):
             self.vow_constants[con_const_raw[i*2]] = float(con_const_raw[i*2+1])
+
+    # Returns the targets and the time constants, as they can be given back to the constructor
+    def getTables(self):
+        return (dict((k, list(v)) for k, v in self.targets.items()),
+                dict(self.vow_constants), dict(self.con_constants))
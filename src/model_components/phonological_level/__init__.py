@@ -1,2 +1,3 @@
 from ._MPP import MotorPhonemePrograms, setTargetSanitizer
 from ._SPT import SomatoPhonemeTargets
+from ._motor_command import MotorCommand, StateSpaceCommand, ENGINES
@@ -13,9 +13,8 @@
 # -------------------------------------------------------------------------------
 
 # Global imports
-from scipy.special import binom as ch
 import numpy as np
-from math import e as e
+from math import comb as ch
 from math import factorial as fact
 # Local imports
 from ...utils import UnrecoverableException
@@ -24,6 +23,8 @@ from ...utils import UnrecoverableException
 class MotorCommand:
     N = 6  # The order of the differential system representing the command,
     # as recommended in a separate paper (see Report)
+    _tensors = {}  # Coefficient tensors of the equation, computed once per order N
+    sparse = True  # Whether any frame can be evaluated on its own (see at())
 
     def __init__(self, target,  # The target of the command
                  fn_t0,         # List of initial values (list of parameters) for the function and its derivatives
@@ -32,9 +33,12 @@ class MotorCommand:
         # Command variables:
         self.target = target.asTargetParameters()  # Target to reach
         self.a = target.getEffort()  # Effort
+        self.label = target.label  # Label of the target, for reporting purposes
         self.p_no = self.target.shape[0]  # Number of parameters in the target
         self.c = np.empty((self.N, self.p_no), dtype='f8')  # Constants for the equation
         self.t = 0.0  # Internal time, used in the equation
+        self._ts = None  # Internal times of the last block of frames
+        self._speed = None  # Absolute coefficients of the 1st derivative, for speedBound()
         self.dt = dt  # Time increment, dependent on the framerate of the system
 
         # Validation; any failure does not depend on user input here
@@ -43,45 +47,201 @@ class MotorCommand:
                 "Wrong number of initial parameters when building the commands. This is a bug.")
 
         # Calculate all the constants, as specified in the paper
-        self.c[0] = fn_t0[0] - self.target
-        for i in range(1, self.N):
-            d = np.array([0.0]*self.p_no, dtype='f8')
-            for k in range(i):
-                d += self.c[k] * (self.a**(i-k)) * fact(i) / fact(i-k)
-            cn = (fn_t0[i] - d) / fact(i)
-            self.c[i] = cn
-
-    # Calculates the derivative of order der up to self.N
-    # This equation is specified in the paper
-    def __y(self, t, der=0):
-        y = np.array([0.0]*self.p_no, dtype='f8')
-        for i in range(self.N):
-            qi = np.array([0.0]*self.p_no, dtype='f8')
-            for k in range(min(self.N-i, der + 1)):
-                qi += (self.a**(der-k)) * (ch(der, k)) * self.c[i+k] * (fact(k+i)) / (fact(i))
-            y += qi*(t**i)
-        y = y*(e**(self.a*t))
-        if der is 0: y += self.target
+        deviation = np.array(fn_t0, dtype='f8')
+        deviation[0] -= self.target
+        self.c[:] = self._constants(self.a, deviation)
+        # Polynomial coefficients of every derivative, shaped (derivative, power of t, parameter)
+        self.p = self._polynomial(self.a, self.c)
+
+    # Returns the state of the command, as numbers, strings and arrays, so that it can be stored with no pickling
+    # fromState() rebuilds the same command from it, whose frames are the same to the last bit
+    def getState(self):
+        return {'target': self.target, 'a': self.a, 'label': self.label, 'c': self.c, 't': self.t, 'dt': self.dt}
+
+    @classmethod
+    def fromState(cls, state):
+        command = cls.__new__(cls)
+        command.target = np.array(state['target'], dtype='f8')
+        command.a = float(state['a'])
+        command.label = state['label']
+        command.p_no = command.target.shape[0]
+        command.c = np.array(state['c'], dtype='f8')
+        command.t = float(state['t'])
+        command._ts = None
+        command._speed = None
+        command.dt = float(state['dt'])
+        command.p = cls._polynomial(command.a, command.c)
+        return command
+
+    # Returns the constants of the equation for the given initial deviation from the target
+    # and its derivatives, shaped (derivative, parameter)
+    @classmethod
+    def _constants(cls, a, deviation):
+        c = np.empty(deviation.shape, dtype='f8')
+        c[0] = deviation[0]
+        for i in range(1, cls.N):
+            # The sum over k of c[k] * a^(i-k) * i!/(i-k)!, divided by i!
+            d = (a ** np.arange(i, 0, -1) / cls._factorials(i)).dot(c[:i])
+            c[i] = deviation[i] / fact(i) - d
+        return c
+
+    # Returns the polynomial coefficients of every derivative, shaped (derivative, power of t, parameter)
+    @classmethod
+    def _polynomial(cls, a, c):
+        weights, exponents = cls._coefficients(cls.N)
+        return np.einsum('dij,jp->dip', weights * (a ** exponents), c)
+
+    # Returns the factorials (i-k)! for k in [0, i), which divide the terms of the constants
+    @staticmethod
+    def _factorials(i):
+        return np.array(list(fact(i-k) for k in range(i)), dtype='f8')
+
+    # Builds (once per order) the tensor of the constant factors binom(der, k) * (i+k)!/i!
+    # and the exponents of the effort der-k, for each derivative der, power i and constant i+k
+    @classmethod
+    def _coefficients(cls, n):
+        if n not in cls._tensors:
+            weights = np.zeros((n, n, n), dtype='f8')
+            exponents = np.zeros((n, n, n), dtype='f8')
+            for der in range(n):
+                for i in range(n):
+                    for k in range(min(n-i, der + 1)):
+                        weights[der, i, i+k] = ch(der, k) * fact(k+i) / fact(i)
+                        exponents[der, i, i+k] = der - k
+            cls._tensors[n] = (weights, exponents)
+        return cls._tensors[n]
+
+    # Calculates the derivatives of order [0, ders) at every time in ts,
+    # returning an array shaped (derivative, time, parameter)
+    # This equation is specified in the paper; the polynomial is evaluated through Horner's method
+    def evaluate(self, ts, ders=1):
+        y = self._horner(self.p, self.a, ts, ders)
+        y[0] += self.target
         return y
 
+    # Evaluates the deviation from the target given by the polynomial coefficients p and the effort a
+    @staticmethod
+    def _horner(p, a, ts, ders):
+        n = p.shape[1]
+        ts = np.asarray(ts, dtype='f8').reshape(1, -1, 1)
+        y = np.broadcast_to(p[:ders, n-1, np.newaxis, :], (ders, ts.shape[1], p.shape[2]))
+        for i in range(n-2, -1, -1):
+            y = y * ts + p[:ders, i, np.newaxis, :]
+        return y * np.exp(a * ts)
+
+    # Returns the internal times of the next n frames, accumulated as y() would
+    def times(self, n):
+        return np.add.accumulate(np.array([self.t] + [self.dt] * n, dtype='f8'))[1:]
+
+    # Advances the command by n frames at once,
+    # returning the 0th derivative of each as an array shaped (frame, parameter)
+    def block(self, n):
+        self._ts = self.times(n)
+        self.t = self._ts[-1]
+        return self.evaluate(self._ts)[0]
+
+    # Keeps only the first k frames of the last block, as if the command had only been advanced by those
+    def keep(self, k):
+        self.t = self._ts[k-1]
+
+    # Advances the command by n frames at once, as block() does, but without evaluating them (see at())
+    # Returns the internal times of the frames
+    def skip(self, n):
+        self._ts = self.times(n)
+        self.t = self._ts[-1]
+        return self._ts
+
+    # Returns the 0th derivative of the given frames of the last block, shaped (frame, parameter)
+    # These are the same values block() would have returned for those frames
+    def at(self, frames):
+        return self.evaluate(self._ts[frames])[0]
+
+    # Returns an upper bound of the absolute speed of each parameter over each interval of time [t0, t1],
+    # shaped (interval, parameter): with a < 0 and t >= 0, |y'(t)| <= e^(a*t0) * sum_i |p_i| * t1^i
+    def speedBound(self, t0, t1):
+        if self._speed is None:
+            self._speed = np.abs(self.p[1:2])
+        bound = self._horner(self._speed, 0.0, t1, 1)[0] * np.exp(self.a * np.asarray(t0, dtype='f8'))[:, np.newaxis]
+        return bound * (1 + 1e-9)  # Covers the rounding errors
+
     # shorthand for the 0th derivative, which is the target function
     def y(self):
-        self.t += self.dt
-        return self.__y(self.t)
+        return self.block(1)[0]
 
     # This function was meant to calculate the instantaneous acceleration of the system
     # Not currently in use, as the system is using direct trajectories
     def time(self):
-        acc = self.__y(self.t+self.dt, 1) - self.__y(self.t, 1)
+        vel = self.evaluate([self.t, self.t+self.dt], 2)[1]
         self.t += self.dt
-        return acc
+        return vel[1] - vel[0]
 
     # Provides the "final values"; to be used during command switch
     # in order to provide the initial dynamic state for the next command
     def getFinalValues(self):
-        fin = np.empty((self.N, self.target.shape[0]))
-        for i in range(self.N):
-            fin[i] = self.__y(self.t, i)
-        return fin
+        return self.evaluate([self.t], self.N)[:, 0, :]
+
+
+# The same system, advanced through its dynamic state rather than re-evaluated at every time:
+# the deviation from the target and its N-1 derivatives are multiplied at each frame by the
+# transition matrix of the system over dt, which only depends on the effort.
+# The trajectories agree with those of MotorCommand up to rounding errors, which accumulate
+# over the frames of a command; each frame only costs a (N, N) by (N, parameter) product
+class StateSpaceCommand(MotorCommand):
+    _transitions = {}  # Transition matrices, computed once per (N, effort, dt)
+    sparse = False  # Frames can only be reached one after the other
+
+    def __init__(self, target, fn_t0, dt):
+        super(StateSpaceCommand, self).__init__(target, fn_t0, dt)  # raises UnrecoverableException
+        self.x = np.array(fn_t0, dtype='f8')  # Dynamic state: deviation from the target and its derivatives
+        self.x[0] -= self.target
+        self._xs = None  # Dynamic states of the last block of frames
+        self.phi = self._transition(self.a, dt)
+
+    def getState(self):
+        state = super(StateSpaceCommand, self).getState()
+        state['x'] = self.x
+        return state
+
+    @classmethod
+    def fromState(cls, state):
+        command = super(StateSpaceCommand, cls).fromState(state)
+        command.x = np.array(state['x'], dtype='f8')
+        command._xs = None
+        command.phi = cls._transition(command.a, command.dt)
+        return command
+
+    # Builds (once per effort and time increment) the transition matrix of the system,
+    # whose column j is the dynamic state reached after dt from the unit state e_j, as given by the equation
+    @classmethod
+    def _transition(cls, a, dt):
+        key = (cls.N, a, dt)
+        if key not in cls._transitions:
+            p = cls._polynomial(a, cls._constants(a, np.eye(cls.N)))
+            cls._transitions[key] = np.ascontiguousarray(cls._horner(p, a, [dt], cls.N)[:, 0, :])
+        return cls._transitions[key]
+
+    # Advances the command by n frames at once, one transition at a time,
+    # returning the 0th derivative of each as an array shaped (frame, parameter)
+    def block(self, n):
+        self._ts = self.times(n)
+        self.t = self._ts[-1]
+        self._xs = np.empty((n, self.N, self.p_no), dtype='f8')
+        x = self.x
+        for k in range(n):
+            x = np.dot(self.phi, x, out=self._xs[k])
+        self.x = x
+        return self._xs[:, 0, :] + self.target
+
+    def keep(self, k):
+        super(StateSpaceCommand, self).keep(k)
+        self.x = self._xs[k-1]
+
+    # The dynamic state is already known
+    def getFinalValues(self):
+        values = np.array(self.x)
+        values[0] += self.target
+        return values
+
 
-# Tests are not being implemented for this module as it's merely the implementation of mathematical functions
+# Trajectory engines, as named in the configuration
+ENGINES = {'closed': MotorCommand, 'statespace': StateSpaceCommand}
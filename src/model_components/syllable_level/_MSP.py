@@ -125,7 +125,7 @@ class MotorSyllablePrograms:
                     first_lab = syll[0][0] + (syll[1] if syll[0][0] in self.consonants else '')
                     # raises UnrecoverableException
                     first = Target(self.con_approach.get(syll[0][0], 10.0),
-                                   self.targets.get(first_lab, []))  # First target, vocalized
+                                   self.targets.get(first_lab, []), first_lab)  # First target, vocalized
                     plan.append(first.makeNonPhonatory(10.0))  # Prevocalization target
                     plan.append(first)  # Vocalization target
                     offset = 1
@@ -134,16 +134,18 @@ class MotorSyllablePrograms:
                     if syll[0][i] in self.vowels:
                         # The constant time for a vowel target depends on the consonant preceding it
                         ct = self.vow_approach.get(syll[0][i-1], 15.0)  # Defaults to 15.0
-                        plan.append(Target(ct, self.targets.get(syll[0][i], [])))  # raises UnrecoverableException
+                        # raises UnrecoverableException
+                        plan.append(Target(ct, self.targets.get(syll[0][i], []), syll[0][i]))
                     elif syll[0][i] in self.consonants:
                         coart_label = syll[0][i] + syll[1]  # The label of the coarticulated consonant
                         ct = self.con_approach.get(syll[0][i], 15.0)  # The constant time for the consonant
-                        plan.append(Target(ct, self.targets.get(coart_label, [])))  # raises UnrecoverableException
+                        # raises UnrecoverableException
+                        plan.append(Target(ct, self.targets.get(coart_label, []), coart_label))
                     else:
                         raise UnrecoverableException("Unexpected target label: " + syll[0][i] + ". This is a bug.")
             # After the utterance is over, pressure goes to 0 and the vocal tract "relaxes"
             plan.append(plan[-1].makeNonPhonatory(15.0))
-            plan.append(Target(10.0, self.targets.get('_', [])))
+            plan.append(Target(10.0, self.targets.get('_', []), '_'))
             ret += plan
 
         return ret
@@ -12,6 +12,7 @@
 # Global imports
 import copy
 import ctypes
+import numpy as np
 
 
 # This assumes vt and glottis parameters have different names
@@ -22,11 +23,37 @@ class VTParametersInfo:
     # Working labels are the ones actually used for motion
     _working_labels = []  # vlabels + pressure + lower_rest_displacement + upper_rest_displacement + f0
 
-    def __init__(self, vt, vtp_no, gp_no):
+    def __init__(self, vt, vtp_no, gp_no, bounds=None):
         self._mins = {}  # Minimum values the articulator parameters can take
         self._defs = {}  # Default or "rest" values
         self._maxs = {}  # Maximum values the articulator parameters can take
 
+        # The information is retrieved from the api, unless it's given (see getBounds())
+        if bounds is None:
+            bounds = self._retrieve(vt, vtp_no, gp_no)
+        self._bounds = bounds
+        vlabels, glabels, mins, defs, maxs = bounds
+
+        # Store labels in the appropriate class variables
+        VTParametersInfo._vlabels = list(vlabels)
+        VTParametersInfo._working_labels.extend(VTParametersInfo._vlabels)
+        VTParametersInfo._glabels = list(glabels)
+        VTParametersInfo._working_labels.extend(
+            ['pressure', 'lower_rest_displacement', 'upper_rest_displacement', 'f0'])
+
+        # Save vocal tract and glottis parameters information
+        for i, l in enumerate(VTParametersInfo._vlabels + VTParametersInfo._glabels):
+            self._mins[l] = mins[i]
+            self._defs[l] = defs[i]
+            self._maxs[l] = maxs[i]
+        # Pressure adjustment:
+        self._defs['pressure'] = 0.0
+        self._alignBounds()
+
+    # Retrieves the labels of the vocal tract and glottis parameters from the api, along with
+    # their minima, defaults and maxima, as lists aligned to the vocal labels followed by the glottal ones
+    @staticmethod
+    def _retrieve(vt, vtp_no, gp_no):
         # Types for the api
         TRACT_PARAM_TYPE = ctypes.c_double * vtp_no
         GLOTTIS_PARAM_TYPE = ctypes.c_double * gp_no
@@ -40,19 +67,6 @@ class VTParametersInfo:
         # Extract vocal tract parameters information
         vt.vtlGetTractParamInfo(tract_param_names, ctypes.byref(tract_param_min),
                                 ctypes.byref(tract_param_max), ctypes.byref(tract_param_neutral))
-        # Store labels in the appropriate class variables
-        VTParametersInfo._vlabels = tract_param_names.value.decode().split()
-        VTParametersInfo._working_labels.extend(VTParametersInfo._vlabels)
-
-        # Save vocal tract parameters information
-        vtp_max = list(tract_param_max)
-        vtp_min = list(tract_param_min)
-        vtp_def = list(tract_param_neutral)
-        for i in range(len(VTParametersInfo._vlabels)):
-            l = VTParametersInfo._vlabels[i]
-            self._mins[l] = vtp_min[i]
-            self._defs[l] = vtp_def[i]
-            self._maxs[l] = vtp_max[i]
 
         # Glottis parameters
         glottis_param_names = ctypes.c_char_p((' ' * 32 * gp_no).encode())
@@ -64,35 +78,35 @@ class VTParametersInfo:
         vt.vtlGetGlottisParamInfo(glottis_param_names, ctypes.byref(glottis_param_min),
                                   ctypes.byref(glottis_param_max), ctypes.byref(glottis_param_neutral))
 
-        # Store labels in the appropriate class variables
-        VTParametersInfo._glabels = glottis_param_names.value.decode().split()
-        VTParametersInfo._working_labels.extend(
-            ['pressure', 'lower_rest_displacement', 'upper_rest_displacement', 'f0'])
+        vlabels = tract_param_names.value.decode().split()
+        glabels = glottis_param_names.value.decode().split()
+        v, g = len(vlabels), len(glabels)
+        return (vlabels, glabels,
+                list(tract_param_min)[:v] + list(glottis_param_min)[:g],
+                list(tract_param_neutral)[:v] + list(glottis_param_neutral)[:g],
+                list(tract_param_max)[:v] + list(glottis_param_max)[:g])
 
-        # Save glottis parameters information
-        g_max = list(glottis_param_max)
-        g_min = list(glottis_param_min)
-        g_def = list(glottis_param_neutral)
-        for i in range(len(VTParametersInfo._glabels)):
-            l = VTParametersInfo._glabels[i]
-            self._mins[l] = g_min[i]
-            self._defs[l] = g_def[i]
-            self._maxs[l] = g_max[i]
-        # Pressure adjustment:
-        self._defs['pressure'] = 0.0
+    # Returns the information as retrieved from the api, so that it can be given back to the constructor
+    def getBounds(self):
+        return copy.deepcopy(self._bounds)
+
+    # Stores minima and maxima as arrays aligned to the working labels, for validate_array()
+    def _alignBounds(self):
+        self._working_mins = np.array(list(self._mins[k] for k in VTParametersInfo._working_labels), dtype='f8')
+        self._working_maxs = np.array(list(self._maxs[k] for k in VTParametersInfo._working_labels), dtype='f8')
 
     # Getters:
     @staticmethod
     def getWorkingLabels():
-        return copy.deepcopy(VTParametersInfo._working_labels)
+        return list(VTParametersInfo._working_labels)
 
     @staticmethod
     def getVocalLabels():
-        return copy.deepcopy(VTParametersInfo._vlabels)
+        return list(VTParametersInfo._vlabels)
 
     @staticmethod
     def getGlottalLabels():
-        return copy.deepcopy(VTParametersInfo._glabels)
+        return list(VTParametersInfo._glabels)
 
     def getDefaults(self):
         return copy.deepcopy(self._defs)
@@ -105,14 +119,15 @@ class VTParametersInfo:
             return self._maxs[key]
         return new
 
+    # Validates all the working parameters at once, as validate() does for each of them
+    # NOTE: it assumes an array whose last dimension is len(_working_labels), e.g. (frame, parameter)
+    def validate_array(self, new):
+        return np.clip(new, self._working_mins, self._working_maxs)
+
     # This function "lowers" the expectation for a target by limiting it to its maxima and minima
     # NOTE: it assumes a np.array of len(_working_labels)
     def sanitize_parameter_list(self, parameter_list):
-        sanitized = []
-        for i in range(len(VTParametersInfo._working_labels)):
-            label = VTParametersInfo._working_labels[i]
-            sanitized.append(self.validate(label, parameter_list[i]))
-        return sanitized
+        return self.validate_array(np.asarray(parameter_list, dtype='f8'))
 
     # Displays information to the user
     def display(self):
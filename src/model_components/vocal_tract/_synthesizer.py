@@ -19,20 +19,32 @@ from ._parameters_information import VTParametersInfo
 
 
 class Synthesizer:
+    initial_capacity = 256  # Number of frames the buffers can initially hold
+
     # Construction (check the prints for details):
-    def __init__(self, apipath, speaker, f_rate, q_red):
+    # An already loaded api (e.g. a stand-in for testing) can be provided instead of its path
+    def __init__(self, apipath, speaker, f_rate, q_red, api=None):
         print('  Loading VocalTractLabApi binary...')
-        self.api = ctypes.cdll.LoadLibrary(apipath)
+        self.api = ctypes.cdll.LoadLibrary(apipath) if api is None else api
         # Parameters of the synthesizer
         self.audio_sampling_rate = 0  # Of the synthesizer
         self.number_tube_sections = 0  # Of the articulatory model
         self.vtp_no = 0  # Number of VT parameters
         self.gp_no = 0  # Number of glottis parameters
         self.frame_rate = int(f_rate/q_red)  # Synthesized frames per second of audio
-        # Frames to be synthesized:
-        self.__gframes = []  # Past (glottal) states ready to synthesize
-        self.__vframes = []  # Past (vocal) states ready to syntheisze
+        # Frames to be synthesized, in buffers shaped (frame, parameter) that grow as needed:
+        self.__gframes = None  # Past (glottal) states ready to synthesize
+        self.__vframes = None  # Past (vocal) states ready to syntheisze
         self.__noframes = 0  # Number of currently stored frames
+        # Output buffers of the synthesis, reused between utterances:
+        self.__audio = np.empty(0, dtype='f8')
+        self.__tube_areas = np.empty(0, dtype='f8')
+        self.__tube_articulators = np.empty(0, dtype=np.uint8)
+        # Streaming synthesis (see startStream()):
+        self.__sink = None  # Receives the chunks of audio; if None, the synthesizer is not streaming
+        self.__block = 0  # Number of frames synthesized in each chunk
+        self.__overlap = 0  # Number of frames synthesized before and after each chunk, not part of its audio
+        self.__emitted = 0  # Number of stored frames whose audio has already been passed to the sink
 
         print('  Initializing the synthesizer...')
         if self.api.vtlInitialize(ctypes.c_char_p(speaker.encode())) != 0:
@@ -50,11 +62,15 @@ class Synthesizer:
         self.number_tube_sections = TMPtubenos.value
         self.vtp_no = TMPvtparno.value
         self.gp_no = TMPgloparno.value
+        self.__vframes = np.empty((self.initial_capacity, self.vtp_no), dtype='f8')
+        self.__gframes = np.empty((self.initial_capacity, self.gp_no), dtype='f8')
 
     # Returns a VTParametersInfo object, stored in the mediator
-    def getParametersInfo(self):
-        print('  Retrieving parameters information...')
-        return VTParametersInfo(self.api, self.vtp_no, self.gp_no)
+    # The information is only retrieved from the api if it's not given (see VTParametersInfo.getBounds())
+    def getParametersInfo(self, bounds=None):
+        print('  Retrieving parameters information...' if bounds is None else
+              '  Reading parameters information from the resource bundle...')
+        return VTParametersInfo(self.api, self.vtp_no, self.gp_no, bounds)
 
     # Displays information to the user
     def display(self):
@@ -62,42 +78,117 @@ class Synthesizer:
         print('    Number of parameters vocal/glottis: ' + str(self.vtp_no) + '/' + str(self.gp_no))
         print('    Synthesis Frame Rate: ' + str(self.frame_rate) + 'Hz')
 
+    # Makes sure the frame buffers can hold the given number of frames, at least doubling them when they grow
+    def __reserve(self, frames):
+        capacity = self.__vframes.shape[0]
+        if frames > capacity:
+            capacity = max(frames, 2 * capacity)
+            vframes = np.empty((capacity, self.vtp_no), dtype='f8')
+            gframes = np.empty((capacity, self.gp_no), dtype='f8')
+            vframes[:self.__noframes] = self.__vframes[:self.__noframes]
+            gframes[:self.__noframes] = self.__gframes[:self.__noframes]
+            self.__vframes, self.__gframes = vframes, gframes
+
     # Recevies an array containing the vocal tract and glottal frames, used in the synthesis
     def dump(self, newFrame):
-        self.__vframes.extend(newFrame[0])
-        self.__gframes.extend(newFrame[1])
+        self.__reserve(self.__noframes + 1)
+        self.__vframes[self.__noframes] = newFrame[0]
+        self.__gframes[self.__noframes] = newFrame[1]
         self.__noframes += 1
+        if self.__sink is not None:
+            self.__stream()
+
+    # Receives a block of vocal tract and glottal frames, shaped (frame, parameter)
+    def dumpBlock(self, vframes, gframes):
+        end = self.__noframes + len(vframes)
+        self.__reserve(end)
+        self.__vframes[self.__noframes:end] = vframes
+        self.__gframes[self.__noframes:end] = gframes
+        self.__noframes = end
+        if self.__sink is not None:
+            self.__stream()
+
+    # Returns copies of the stored vocal tract and glottal frames, shaped (frame, parameter)
+    def getFrames(self):
+        return self.__vframes[:self.__noframes].copy(), self.__gframes[:self.__noframes].copy()
 
     # Empties the production frames and is ready to record a new utterance
     def flush(self):
-        self.__gframes = []
-        self.__vframes = []
         self.__noframes = 0
 
-    # Synthesize the audio from the stored frames
-    def __call__(self):
+    # Returns an output buffer holding at least the given number of elements
+    @staticmethod
+    def __buffer(buffer, size):
+        return buffer if buffer.shape[0] >= size else np.empty(size, dtype=buffer.dtype)
+
+    # Synthesizes the stored frames in [start, end), returning the audio as floats
+    # The frame buffers are passed to the api as they are, without copying
+    def __synthesize(self, start, end):
         # Parameters of the synthesis
-        duration_s = float(self.__noframes) / float(self.frame_rate)
-        tube_areas = (ctypes.c_double * (self.__noframes * self.number_tube_sections))()
-        tube_articulators = ctypes.c_char_p(b' ' * self.__noframes * self.number_tube_sections)
+        frames = end - start
+        duration_s = float(frames) / float(self.frame_rate)
+        audio_samples = int(duration_s * self.audio_sampling_rate)
+        self.__tube_areas = self.__buffer(self.__tube_areas, frames * self.number_tube_sections)
+        self.__tube_articulators = self.__buffer(self.__tube_articulators, frames * self.number_tube_sections)
+        self.__audio = self.__buffer(self.__audio, audio_samples)
         number_audio_samples = ctypes.c_int(0)
 
-        # init the arrays
-        v_offset, v_end = (0,  (self.__noframes-1) * self.vtp_no + 1)
-        tract_params = (ctypes.c_double * (self.__noframes * self.vtp_no))(*(self.__vframes[v_offset:v_end]))
-        g_offset, g_end = [0, (self.__noframes-1) * self.gp_no + 1]
-        glottis_params = (ctypes.c_double * (self.__noframes * self.gp_no))(*self.__gframes[g_offset:g_end])
-        audio = (ctypes.c_double * int(duration_s * self.audio_sampling_rate))()
+        def pointer(array):
+            return array.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
 
         # Call the synthesis function. It may calculate a few seconds.
-        failure = self.api.vtlSynthBlock(ctypes.byref(tract_params), ctypes.byref(glottis_params),  # inputs
-                                         ctypes.byref(tube_areas), tube_articulators,  # outputs
-                                         self.__noframes, ctypes.c_double(self.frame_rate),  # inputs
-                                         ctypes.byref(audio), ctypes.byref(number_audio_samples))  # outputs
+        failure = self.api.vtlSynthBlock(pointer(self.__vframes[start:end]),  # inputs
+                                         pointer(self.__gframes[start:end]),  # inputs
+                                         pointer(self.__tube_areas),  # outputs
+                                         self.__tube_articulators.ctypes.data_as(ctypes.c_char_p),
+                                         frames, ctypes.c_double(self.frame_rate),  # inputs
+                                         pointer(self.__audio), ctypes.byref(number_audio_samples))  # outputs
         if failure != 0: raise ValueError('Error in vtlSynthBlock! Errorcode: %i' % failure)
+        return self.__audio[:audio_samples]
+
+    # Synthesize the audio from the stored frames
+    def __call__(self):
+        return np.int16(self.__synthesize(0, self.__noframes) * (2 ** 15 - 1))
+
+    # Starts streaming the current utterance: rather than waiting for __call__(), frames are synthesized
+    # in blocks as soon as they arrive, and the audio of each block is passed to sink as np.int16.
+    # Each block is synthesized together with the overlap frames around it, so that the synthesizer
+    # has settled by the time the kept audio starts; only those frames are held in memory
+    def startStream(self, sink, block, overlap):
+        self.__sink = sink
+        self.__block = block
+        self.__overlap = overlap
+        self.__emitted = 0
+
+    # Passes on the audio of every block of frames which has enough frames after it
+    def __stream(self):
+        while self.__noframes - self.__emitted >= self.__block + self.__overlap:
+            self.__emit(self.__emitted + self.__block, self.__emitted + self.__block + self.__overlap)
+        # The frames before the overlap of the next block are not needed anymore
+        start = self.__emitted - self.__overlap
+        if start > 0:
+            kept = self.__noframes - start
+            self.__vframes[:kept] = self.__vframes[start:self.__noframes]
+            self.__gframes[:kept] = self.__gframes[start:self.__noframes]
+            self.__noframes = kept
+            self.__emitted -= start
+
+    # Synthesizes the frames up to end, and passes on the audio of the frames from the last emitted up to until
+    def __emit(self, until, end):
+        start = max(0, self.__emitted - self.__overlap)
+        audio = self.__synthesize(start, end)
+        samples_per_frame = self.audio_sampling_rate / float(self.frame_rate)
+        first = int(round((self.__emitted - start) * samples_per_frame))
+        last = int(round((until - start) * samples_per_frame)) if until < end else len(audio)
+        self.__sink(np.int16(audio[first:last] * (2 ** 15 - 1)))
+        self.__emitted = until
 
-        wav = np.array(audio)
-        return np.int16(wav * (2 ** 15 - 1))
+    # Passes on the audio of the remaining frames, and stops streaming
+    def endStream(self):
+        if self.__sink is not None and self.__emitted < self.__noframes:
+            self.__emit(self.__noframes, self.__noframes)
+        self.__sink = None
+        self.flush()
 
     def close(self):
         if self.api: self.api.vtlClose()
@@ -14,12 +14,13 @@
 import numpy as np
 # Local imports
 from .. import _parameters_lists as PL
-from ...utils import outputAudio
+from ...utils import outputAudio, AudioStream
 from ._parameters_information import getVocalLabels, getGlottalLabels, getWorkingLabels
 
 
 class VocalTract:
-    def __init__(self, synth, q_red, initial_state, audio_path="./"):
+    def __init__(self, synth, q_red, initial_state, audio_path="./", stream_block=0, stream_overlap=5,
+                 writer=None):
         self.__synth = synth  # The synthesizer
         # This provides some "quality reduction": only 1 in q_red states are "dumped" in the synthesizer
         # This is in order to speed up synthesis (see Report for more)
@@ -31,9 +32,21 @@ class VocalTract:
         else:  # Any inaccuracy will be taken care of State._init()'s exceptions
             init_state = initial_state
 
+        self.__initial_state = init_state
         self.__state = PL.State(init_state)  # raises ValueError, unrecoverable
 
         self.__audiopath = audio_path  # Folder in which audio is output
+        # Streaming synthesis: blocks of stream_block synthesized frames are written as they are produced
+        self.__stream_block = stream_block  # If 0, utterances are only synthesized once they are over
+        self.__stream_overlap = stream_overlap
+        self.__stream = None  # The audio file of the utterance being streamed
+        self.__writer = writer  # Writes the audio in the background (see AudioWriter); if None, it's written here
+
+    # Returns the vocal tract to its initial state, discarding any frames not yet synthesized
+    def reset(self):
+        self.flush()
+        self.counter = 0
+        self.__state = PL.State(self.__initial_state)
 
     # Originally meant for to be used for time()
     def __updateState(self, vel):
@@ -47,25 +60,143 @@ class VocalTract:
 
     # Advances "time" for the vocal tract, thus safely updating its state
     def time(self, new, labels=None):
-        if labels is None:  # For testing purposes, labels can be provided to the function
-            labels = getWorkingLabels()
         # Quality reduction
         if self.counter % self.__qred == 0:
             self.__synth.dump(self.__state.asFrame())  # Save the state as a frame
         self.counter += 1
         # State update
-        for k in labels:
-            # Defaults to the old parameter
-            self.__state.update(k, new.get(k, self.__state.get(k)))
+        if labels is None:
+            self.__state.updateWorking(new.asTargetParameters())
+        else:  # For testing purposes, labels can be provided to the function
+            for k in labels:
+                # Defaults to the old parameter
+                self.__state.update(k, new.get(k, self.__state.get(k)))
+
+    # Advances "time" for a whole block of frames, shaped (frame, working parameter)
+    # This is equivalent to calling time() for each frame, but only the states on the
+    # quality reduction grid are ever built and dumped in the synthesizer
+    def block(self, frames, labels=None):
+        if len(frames) == 0:
+            return
+        # For testing purposes, labels can be provided to the function
+        idx = PL.State._working_vector if labels is None else PL.State.indexes(labels)
+        # The state before frame i is the one reached after frame i-1
+        dumped = np.flatnonzero((self.counter + np.arange(len(frames))) % self.__qred == 0)
+        if len(dumped):
+            states = np.tile(self.__state.asArray(), (len(dumped), 1))
+            later = np.flatnonzero(dumped > 0)  # Dumps that happen after the first frame of the block
+            states[np.ix_(later, idx)] = PL.State.validateArray(frames[dumped[later]-1], labels)
+            self.__synth.dumpBlock(*PL.State.asFrames(states))
+        self.counter += len(frames)
+        # State update, to the last frame
+        if labels is None:
+            self.__state.updateWorking(frames[-1])
+        else:
+            for k, value in zip(labels, frames[-1]):
+                self.__state.update(k, value)
+
+    # As block(), given only the frames after which the state is dumped in the synthesizer, i.e. the frames j
+    # such that (counter + j + 1) % qred == 0, at the given indices, and the last frame (see getGrid())
+    def sparseBlock(self, count, indices, frames, last, labels=None):
+        if count == 0:
+            return
+        # For testing purposes, labels can be provided to the function
+        idx = PL.State._working_vector if labels is None else PL.State.indexes(labels)
+        dumped = np.flatnonzero(indices + 1 < count)  # The state after the last frame is dumped by the next block
+        first = 1 if self.counter % self.__qred == 0 else 0  # The state before the first frame
+        if first + len(dumped):
+            states = np.tile(self.__state.asArray(), (first + len(dumped), 1))
+            states[first:, idx] = PL.State.validateArray(frames[dumped], labels)
+            self.__synth.dumpBlock(*PL.State.asFrames(states))
+        self.counter += count
+        # State update, to the last frame
+        if labels is None:
+            self.__state.updateWorking(last)
+        else:
+            for k, value in zip(labels, last):
+                self.__state.update(k, value)
+
+    # Returns the position of the vocal tract on the quality reduction grid, and the quality reduction
+    def getGrid(self):
+        return self.counter % self.__qred, self.__qred
+
+    # Returns the parameters of the vocal tract, and its position on the quality reduction grid
+    def snapshot(self):
+        return self.__state.asArray(), self.counter % self.__qred
+
+    # Returns to parameters saved by snapshot(), as if the given number of frames had been produced
+    def restore(self, parameters, frames):
+        self.__state = PL.State(parameters)
+        self.counter += frames
+
+    # Returns the sampling rate of the synthesized audio
+    def getSamplingRate(self):
+        return self.__synth.audio_sampling_rate
+
+    # Whether utterances are streamed (see begin())
+    def streaming(self):
+        return self.__stream_block > 0
+
+    # Returns copies of the vocal tract and glottal frames not yet synthesized
+    def getFrames(self):
+        return self.__synth.getFrames()
+
+    # Synthesizes the given vocal tract and glottal frames, shaped (frame, parameter), on their own
+    def resynthesize(self, vframes, gframes):
+        self.flush()
+        self.__synth.dumpBlock(vframes, gframes)
+        return self.synthesize()
+
+    # Discards the frames produced up to this moment
+    def flush(self):
+        self.__synth.flush()
 
     # This function synthesizes the audio produced up to this moment
     # and clears the synthesizer
-    def speak(self, label):
+    def synthesize(self):
         utterance = np.array(self.__synth(), dtype=np.int16)
-        self.__synth.flush()
-        outputAudio(self.__audiopath, label, self.__synth.audio_sampling_rate, utterance)
+        self.flush()
+        return utterance
+
+    # Outputs the audio to file, returning its path
+    # With a writer, the file is written in the background, and may not exist yet (see flushOutput())
+    def output(self, label, audio):
+        if self.__writer is not None:
+            return self.__writer.submit(self.__audiopath, label, self.__synth.audio_sampling_rate, audio)
+        return outputAudio(self.__audiopath, label, self.__synth.audio_sampling_rate, audio)
+
+    # Waits until the audio output so far has been written to file
+    # Returns the writes failed since the last flush, as {path: exception} (see AudioWriter.flush())
+    def flushOutput(self):
+        if self.__writer is not None:
+            return self.__writer.flush()
+        return {}
+
+    # Statistics of the audio written in the background, or None if it's written synchronously
+    def outputStats(self):
+        return self.__writer.stats() if self.__writer is not None else None
+
+    # Signals the start of an utterance: if streaming, its audio file is opened and written as frames arrive
+    def begin(self, label):
+        if self.__stream_block > 0:
+            self.__stream = AudioStream(self.__audiopath, label, self.__synth.audio_sampling_rate)
+            self.__synth.startStream(self.__stream.write, self.__stream_block, self.__stream_overlap)
+
+    # Synthesizes the audio produced up to this moment and outputs it to file
+    # When streaming, the audio has already been written, and None is returned
+    def speak(self, label):
+        if self.__stream is not None:
+            self.__synth.endStream()
+            self.__stream.close()
+            self.__stream = None
+            return None
+        utterance = self.synthesize()
+        self.output(label, utterance)
         return utterance
 
     def close(self):
+        if self.__writer is not None:  # The audio still to be written is not lost
+            self.__writer.close()
+            self.__writer = None
         # Needed because of the ctypes and internal states:
         if self.__synth: self.__synth.close()
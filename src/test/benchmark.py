@@ -0,0 +1,286 @@
+# -------------------------------------------------------------------------------
+# Name:        benchmark
+# Purpose:     Reproducible benchmarks of the articulatory pipeline, run on the
+#              pure-Python stand-in of the VocalTractLabAPI (see fake_vtl.py)
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Run from the root of the application, as:
+#   python -m src.test.benchmark [-o results.json] [-c previous.json] [-r repeat] [-e engine]
+#                                [-m metric] [-f max_frames] [--report] [-t tolerance] [-s budget]
+# Each stage is timed over utterances of increasing length, taking the best of a number of
+# repetitions. The stages are: planning (MotorSyllablePrograms.makePlan()), motion frame by frame
+# (MotorPhonemePrograms.time() and VocalTract.time(), as in Mediator.time()), motion in blocks
+# (MotorPhonemePrograms.block() and VocalTract.block()), motion on the quality reduction grid only
+# (MotorPhonemePrograms.sparseBlock() and VocalTract.sparseBlock(), see Mediator._move()), frame dumping
+# (Synthesizer.dump() and Synthesizer.dumpBlock()), synthesis (Synthesizer.__call__()), and writing the
+# audio to file, synchronously (utils.outputAudio()) and in the background (utils.AudioWriter), where only
+# the time the caller waits for counts, as the next utterance is produced meanwhile.
+# The startup stage is the cold start of a new interpreter importing what main.py imports before
+# "System ready.": given a budget, in seconds, the exit code is 1 if it's exceeded, or if any of the
+# modules that are only needed on first use (LAZY) got imported.
+# The components are initialized as by the mediator, with the parameters layout of resources/targets.
+# Results are written as JSON; if a previous run is given, the stages that got slower than the
+# tolerance allows are reported, and the exit code is 1.
+# The frames spent on each target are part of the results, and can be displayed with --report:
+# this shows how the convergence metric and the maximum frames per target affect the utterances.
+
+# Global imports
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import shutil
+import tempfile
+import contextlib
+import numpy as np
+# Local imports
+from ..mediator import _init_utils as init
+from ..model_components import WorkingParList, Synthesizer
+from ..utils import outputAudio, AudioWriter
+from .fake_vtl import FakeVTL
+
+UTTERANCES = ['ba', 'mulina', 'mulina_dai_lu', 'mulina_dai_lu_glia_zia_vu_ba']
+CONFIG = {'apipath': '', 'speaker': '', 'audiopath': './', 'frate': 1000, 'qred': 10, 'err': 0.04,
+          'stream_block': 0, 'stream_overlap': 5, 'engine': 'closed',
+          'convergence': 'mse', 'convergence_err': 0.0004, 'convergence_weights': None, 'max_frames': 0,
+          'bundle_path': None, 'writer_threads': 0, 'writer_queue': 8, 'writer_sync': 8}
+# Modules that are only imported on first use (see Mediator._plot() and utils.writeAudio())
+LAZY = ['matplotlib', 'scipy']
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Of the application
+
+
+# The components, initialized on the fake api as the mediator does on the real one
+class Pipeline:
+    def __init__(self, conf):
+        with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+            self.synth = Synthesizer(conf['apipath'], conf['speaker'], conf['frate'], conf['qred'], FakeVTL())
+            param_info = self.synth.getParametersInfo()
+            init.setIndexes(param_info.getVocalLabels() + param_info.getGlottalLabels(),
+                            param_info.getWorkingLabels(), param_info.getVocalLabels(), param_info.getGlottalLabels())
+            init.setValidation(param_info.validate, param_info.validate_array)
+            init.MotorPhonemePrograms.setSanitizingFunction(param_info.sanitize_parameter_list)
+            self.spt, self.msp, self.vt, self.mpp = init.component_initialization(conf, self.synth, param_info)
+        self.limit = conf['frate'] // 2  # Frames per character, as in Mediator._frame_limit()
+
+    # Returns to the initial state, discarding any frames
+    def restart(self):
+        self.vt.reset()
+        self.mpp.reset(self.vt.getState())
+
+    def frames(self, utterance):
+        return (len(utterance) + 1) * self.limit
+
+    # Produces the utterance frame by frame, as Mediator.time(); returns the number of frames
+    def step(self, utterance):
+        self.mpp.addPlan(self.msp.makePlan(utterance))
+        done, n = False, 0
+        while not done and n <= self.frames(utterance):
+            done, state = self.mpp.time(self.vt.getState())
+            self.vt.time(WorkingParList(state))
+            n += 1
+        return n
+
+    # Produces the utterance in blocks, as Mediator.render(); returns the number of frames
+    def block(self, utterance, chunk=1000):
+        self.mpp.addPlan(self.msp.makePlan(utterance))
+        done, n = False, 0
+        while not done and n <= self.frames(utterance):
+            done, frames = self.mpp.block(self.vt.getState(), min(chunk, self.frames(utterance) + 1 - n))
+            self.vt.block(frames)
+            n += len(frames)
+        return n
+
+    # Produces the utterance in blocks, evaluating the frames on the grid only, as Mediator.render() can;
+    # returns the number of frames
+    def sparse(self, utterance, chunk=1000):
+        self.mpp.addPlan(self.msp.makePlan(utterance))
+        done, n = False, 0
+        while not done and n <= self.frames(utterance):
+            phase, qred = self.vt.getGrid()
+            done, count, indices, frames, last = \
+                self.mpp.sparseBlock(self.vt.getState(), min(chunk, self.frames(utterance) + 1 - n), phase, qred)
+            self.vt.sparseBlock(count, indices, frames, last)
+            n += count
+        return n
+
+    # The frames the synthesizer receives for the utterance
+    def dumped(self, utterance):
+        self.restart()
+        self.block(utterance)
+        frames = self.synth.getFrames()
+        self.synth.flush()
+        return frames
+
+
+# Best time, in seconds, of repeat runs of function, each preceded by setup
+def best(function, setup=None, repeat=5):
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# Best time, in seconds, of repeat cold starts of an interpreter importing what main.py imports,
+# and the modules of LAZY that were imported
+def startup(repeat=5):
+    code = 'import sys, src.user_interface, src.mediator; print(" ".join(m for m in %r if m in sys.modules))' % LAZY
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        loaded = subprocess.run([sys.executable, '-c', code], cwd=ROOT, stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True).stdout.split()
+        times.append(time.perf_counter() - start)
+    return min(times), loaded
+
+
+def run(repeat=5, conf=CONFIG, utterances=UTTERANCES):
+    pipeline = Pipeline(conf)
+    synth = pipeline.synth
+    results = []
+    targets = {}  # Frames spent on each target of the utterances (see MotorPhonemePrograms.getReport())
+
+    def record(stage, utterance, frames, seconds):
+        results.append({'stage': stage, 'utterance': utterance, 'frames': frames, 'seconds': seconds,
+                        'us_per_frame': seconds / frames * 1e6 if frames else None})
+
+    seconds, loaded = startup(repeat)
+    record('startup', '', 0, seconds)
+
+    for utterance in utterances:
+        record('plan', utterance, 0, best(lambda: pipeline.msp.makePlan(utterance), None, repeat))
+        # The frames are counted once, as they are the same at every run
+        pipeline.restart()
+        frames = pipeline.step(utterance)
+        pipeline.synth.flush()
+        record('motion_frame', utterance, frames,
+               best(lambda: pipeline.step(utterance), pipeline.restart, repeat))
+        record('motion_block', utterance, frames,
+               best(lambda: pipeline.block(utterance), pipeline.restart, repeat))
+        record('motion_sparse', utterance, frames,
+               best(lambda: pipeline.sparse(utterance), pipeline.restart, repeat))
+        targets[utterance] = list({'label': label, 'frames': int(n), 'capped': bool(capped)}
+                                  for label, n, capped in pipeline.mpp.getReport())
+        pipeline.restart()
+        vframes, gframes = pipeline.dumped(utterance)
+
+        def dump():
+            for v, g in zip(vframes, gframes):
+                synth.dump([v, g])
+        record('dump', utterance, len(vframes), best(dump, synth.flush, repeat))
+        record('dump_block', utterance, len(vframes),
+               best(lambda: synth.dumpBlock(vframes, gframes), synth.flush, repeat))
+        synth.flush()
+        synth.dumpBlock(vframes, gframes)
+        record('synthesize', utterance, len(vframes), best(synth, None, repeat))
+        audio = np.array(synth(), dtype=np.int16)
+        synth.flush()
+
+        folder = tempfile.mkdtemp()
+        writer = AudioWriter()
+
+        def empty():  # Files with the same content are only written once
+            writer.flush()
+            for name in os.listdir(folder):
+                os.remove(os.path.join(folder, name))
+        path = folder + os.sep
+        record('write', utterance, len(vframes),
+               best(lambda: outputAudio(path, utterance, synth.audio_sampling_rate, audio), empty, repeat))
+        record('write_submit', utterance, len(vframes),
+               best(lambda: writer.submit(path, utterance, synth.audio_sampling_rate, audio), empty, repeat))
+        writer.close()
+        shutil.rmtree(folder)
+
+    meta = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'frate': conf['frate'], 'qred': conf['qred'], 'engine': conf['engine'],
+            'convergence': conf['convergence'], 'max_frames': conf['max_frames'], 'repeat': repeat,
+            'startup_imports': loaded}
+    return {'meta': meta, 'results': results, 'targets': targets}
+
+
+# Returns the results that got slower than (1 + tolerance) times those of the previous run,
+# as (result, previous seconds)
+def compare(current, previous, tolerance=0.25):
+    old = dict(((r['stage'], r['utterance']), r['seconds']) for r in previous['results'])
+    slower = []
+    for result in current['results']:
+        seconds = old.get((result['stage'], result['utterance']), None)
+        if seconds is not None and result['seconds'] > seconds * (1 + tolerance):
+            slower.append((result, seconds))
+    return slower
+
+
+def display(results, previous=None):
+    old = {} if previous is None else \
+        dict(((r['stage'], r['utterance']), r['seconds']) for r in previous['results'])
+    print('%-14s %-30s %7s %12s %12s %8s' % ('stage', 'utterance', 'frames', 'seconds', 'us/frame', 'ratio'))
+    for r in results['results']:
+        seconds = old.get((r['stage'], r['utterance']), None)
+        print('%-14s %-30s %7d %12.6f %12s %8s' % (
+            r['stage'], r['utterance'], r['frames'], r['seconds'],
+            '%.3f' % r['us_per_frame'] if r['us_per_frame'] is not None else '-',
+            '%.2f' % (r['seconds'] / seconds) if seconds else '-'))
+
+
+# Displays the frames spent on each target of each utterance
+def report(results):
+    for utterance, targets in results['targets'].items():
+        print(utterance + ': ' + ' '.join('%s:%d%s' % (t['label'], t['frames'], '*' if t['capped'] else '')
+                                          for t in targets))
+    print('(* the target was not reached within the maximum frames)')
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the articulatory pipeline on a fake api.')
+    parser.add_argument('-o', '--output', help='file the results are written to, as JSON')
+    parser.add_argument('-c', '--compare', help='results of a previous run, to check for regressions')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='runs of each stage, the best is kept')
+    parser.add_argument('-e', '--engine', default=CONFIG['engine'], help='trajectory engine of the motor commands')
+    parser.add_argument('-m', '--metric', default=CONFIG['convergence'], choices=['mse', 'range'],
+                        help='convergence metric of the motor commands')
+    parser.add_argument('-f', '--max-frames', type=int, default=CONFIG['max_frames'],
+                        help='maximum frames per target, 0 for no maximum')
+    parser.add_argument('--report', action='store_true', help='displays the frames spent on each target')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.25,
+                        help='slowdown allowed with respect to the previous run (default 0.25, i.e. 25%%)')
+    parser.add_argument('-s', '--startup-budget', type=float, help='maximum cold start time, in seconds')
+    args = parser.parse_args(arguments)
+
+    results = run(args.repeat, dict(CONFIG, engine=args.engine, convergence=args.metric, max_frames=args.max_frames))
+    previous = None
+    if args.compare:
+        with open(args.compare) as p_file:
+            previous = json.load(p_file)
+    display(results, previous)
+    if args.report:
+        report(results)
+    if args.output:
+        with open(args.output, 'w') as o_file:
+            json.dump(results, o_file, indent=2)
+    failed = False
+    if args.startup_budget is not None:
+        seconds = next(r['seconds'] for r in results['results'] if r['stage'] == 'startup')
+        if seconds > args.startup_budget or results['meta']['startup_imports']:
+            print('Startup over budget: %.6fs (budget %.6fs), imported %s' %
+                  (seconds, args.startup_budget, ', '.join(results['meta']['startup_imports']) or 'nothing lazy'))
+            failed = True
+    if previous is not None:
+        slower = compare(results, previous, args.tolerance)
+        for result, seconds in slower:
+            print('Regression: %s on %s took %.6fs, previously %.6fs' %
+                  (result['stage'], result['utterance'], result['seconds'], seconds))
+        failed = failed or bool(slower)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# -------------------------------------------------------------------------------
+# Name:        conftest
+# Purpose:     Fixtures and factories shared by the tests of the mediator, and the
+#              isolation of the global state of the parameter lists between tests
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The api sets the layout and the bounds of the parameters once, for the whole process (see setIndexes());
+# the tests set their own, so they're restored after every test, whatever the order the tests are run in.
+# The mediators of the tests are built on the real targets and time constants, with a mock synthesizer
+# (or the fake api, see fake_vtl.py) instead of the api
+
+# Global imports
+from queue import Queue
+import numpy as np
+import pytest
+# Local imports
+from ..mediator import Mediator
+from ..mediator._init_utils import OPTIONAL_CONFIG, writer_initialization
+from ..model_components import MotorPhonemePrograms, SomatoPhonemeTargets, MotorSyllablePrograms, VocalTract
+from ..model_components.phonological_level import MotorCommand
+from ..model_components._parameters_lists import ParList, State
+from ..model_components.vocal_tract._parameters_information import VTParametersInfo
+
+# The parameters layout of resources/targets, with an unused glottal parameter
+VOCAL = 'HX HY JX JA LP LD VS VO WC TCX TCY TTX TTY TBX TBY TRX TRY TS1 TS2 TS3 TS4 MA1 MA2 MA3'.split()
+GLOTTAL = ['f0', 'pressure', 'lower_rest_displacement', 'upper_rest_displacement', 'aspiration_strength']
+WORKING = VOCAL + ['pressure', 'lower_rest_displacement', 'upper_rest_displacement', 'f0']
+
+# Class attributes set as the api would, by the tests: (owner, name)
+_GLOBAL_STATE = [(ParList, '_al_indexes'), (ParList, '_wl_indexes'), (ParList, '_working_labels'),
+                 (ParList, '_working_vector'), (ParList, '_vocal_vector'), (ParList, '_glottal_vector'),
+                 (State, '_validate'), (State, '_validate_array'), (State, 'asTargetParameters'),
+                 (VTParametersInfo, '_vlabels'), (VTParametersInfo, '_glabels'),
+                 (VTParametersInfo, '_working_labels'), (MotorPhonemePrograms, '_expected_target')]
+_MISSING = object()  # Attributes that are inherited, rather than set on their owner
+
+
+@pytest.fixture(autouse=True)
+def global_state():
+    # Lists are copied, as some of them are changed in place (e.g. VTParametersInfo._working_labels)
+    saved = list((owner, name, list(value) if isinstance(value, list) else value)
+                 for owner, name, value in ((o, n, o.__dict__.get(n, _MISSING)) for o, n in _GLOBAL_STATE))
+    yield
+    for owner, name, value in saved:
+        if value is not _MISSING:
+            setattr(owner, name, value)
+        elif name in owner.__dict__:
+            delattr(owner, name)
+
+
+@pytest.fixture
+def environment():
+    # Simulating execution environment, with bounds that make some targets unreachable
+    spt = SomatoPhonemeTargets(0.04)
+    targets = np.array(list(spt.targets.values()))
+    low, high = targets.min(axis=0), targets.max(axis=0)
+    mins = dict(zip(WORKING, low + (high - low) * 0.05))
+    maxs = dict(zip(WORKING, high - (high - low) * 0.05))
+    mins['aspiration_strength'], maxs['aspiration_strength'] = -40.0, 0.0
+
+    def validate(k, val):
+        return min(max(val, mins[k]), maxs[k])
+
+    VTParametersInfo._vlabels, VTParametersInfo._glabels, VTParametersInfo._working_labels = \
+        VOCAL, GLOTTAL, WORKING
+    ParList.setIndexes(VOCAL + GLOTTAL, WORKING)
+    if 'asTargetParameters' in State.__dict__:  # Replaced by a test that ran before (see test_motion)
+        del State.asTargetParameters
+    State._validate, State._validate_array = validate, None
+    MotorPhonemePrograms._expected_target = lambda p: list(validate(k, v) for k, v in zip(WORKING, p))
+    # Restored by global_state()
+
+
+class MockSynth:
+    audio_sampling_rate = 44100
+
+    def __init__(self):
+        self.frames = []  # Frames dumped since the last synthesis
+        self.synthesized = []  # Frames of each synthesis
+
+    def dump(self, frame):
+        self.frames.append(np.concatenate(frame))
+
+    def dumpBlock(self, vframes, gframes):
+        self.frames.extend(np.concatenate([vframes, gframes], axis=1))
+
+    def getFrames(self):
+        frames = np.array(self.frames).reshape(-1, len(VOCAL) + len(GLOTTAL))
+        return frames[:, :len(VOCAL)], frames[:, len(VOCAL):]
+
+    def flush(self):
+        self.frames = []
+
+    def close(self):
+        pass
+
+    # The audio depends on the frames, so that it can be compared
+    def __call__(self):
+        self.synthesized.append(np.array(self.frames))
+        return np.array(self.frames).reshape(-1, len(VOCAL) + len(GLOTTAL)).sum(axis=1)
+
+
+# The configuration of the mediators of the tests (see load_config()), with the given entries:
+# the optional entries take their defaults, except for those that would write outside of audio_path
+def make_config(audio_path, **entries):
+    conf = {'apipath': '', 'speaker': '', 'audiopath': str(audio_path) + '/', 'frate': 1000, 'qred': 10, 'err': 0.04}
+    conf.update((key, default) for key, cast, default in OPTIONAL_CONFIG)
+    conf.update(cache_size=0, bundle_path=None, writer_threads=0, stats_path=None)
+    conf.update(entries)
+    return conf
+
+
+# A mediator writing in audio_path, on the mock synthesizer unless another is given (see Mediator.__init__())
+# The synthesizer of the pipeline, if any (see the 'pipeline' entry), runs on api
+def make_mediator(audio_path, cache=None, engine=MotorCommand, synth=None, api=None, **entries):
+    conf = make_config(audio_path, **entries)
+    spt = SomatoPhonemeTargets(conf['err'])
+    rest = dict(zip(WORKING, spt.targets['_']))
+    initial_state = list(rest[k] for k in VOCAL) + list(rest.get(k, 0.0) for k in GLOTTAL)
+    msp = MotorSyllablePrograms(spt.targets, spt.vow_constants, spt.con_constants)
+    vt = VocalTract(MockSynth() if synth is None else synth, conf['qred'], initial_state, conf['audiopath'],
+                    conf['stream_block'], conf['stream_overlap'], writer_initialization(conf))
+    mpp = MotorPhonemePrograms(vt.getState(), conf['frate'], spt.err, engine)
+    return Mediator(Queue(0), Queue(0), conf, (msp, vt, mpp, cache), api)
+
+
+# Produces an utterance as run() does, frame by frame
+def interactive(mediator, utterance, options=None):
+    mediator._input.put(('say', ({} if options is None else options, utterance)))
+    mediator._command_switch()
+    safe = 0
+    while mediator._current_utterance:
+        mediator._safe_time(safe)
+        safe += 1
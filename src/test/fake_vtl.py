@@ -0,0 +1,90 @@
+# -------------------------------------------------------------------------------
+# Name:        fake_vtl
+# Purpose:     Pure-Python stand-in for the VocalTractLabAPI binary, used to test
+#              and benchmark the synthesizer without the real library
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The fake exposes the functions of the api used by Synthesizer and VTParametersInfo,
+# with the same arguments, and writes its outputs through the same ctypes objects.
+# The parameters layout is the one of resources/targets; bounds are derived from the
+# targets themselves, so that every target is reachable.
+# The audio depends on each frame alone: sample k only depends on the frame it falls in,
+# so that synthesizing in blocks gives the same audio as synthesizing at once.
+
+# Global imports
+import ctypes
+import numpy as np
+# Local imports
+from ..utils import extractFileInfo
+
+VOCAL = 'HX HY JX JA LP LD VS VO WC TCX TCY TTX TTY TBX TBY TRX TRY TS1 TS2 TS3 TS4 MA1 MA2 MA3'.split()
+GLOTTAL = ['f0', 'pressure', 'lower_rest_displacement', 'upper_rest_displacement', 'aspiration_strength']
+WORKING = VOCAL + ['pressure', 'lower_rest_displacement', 'upper_rest_displacement', 'f0']
+
+
+def _array(pointer, size):
+    return np.ctypeslib.as_array(ctypes.cast(pointer, ctypes.POINTER(ctypes.c_double)), shape=(size, ))
+
+
+def _write(reference, values):
+    reference._obj[:] = values
+
+
+class FakeVTL:
+    audio_sampling_rate = 44100
+    number_tube_sections = 40
+
+    def __init__(self, targets_path='resources/targets'):
+        raw = extractFileInfo(targets_path)
+        targets = np.array(list(list(float(p) for p in raw[i*2+1].split()) for i in range(len(raw)//2)))
+        working = dict(zip(WORKING, zip(targets.min(axis=0), targets.max(axis=0), targets[0])))
+        working['aspiration_strength'] = (-40.0, 0.0, 0.0)
+        margin = dict((k, (hi - lo) * 0.1 + 0.01) for k, (lo, hi, _) in working.items())
+        self.mins = dict((k, lo - margin[k]) for k, (lo, hi, _) in working.items())
+        self.maxs = dict((k, hi + margin[k]) for k, (lo, hi, _) in working.items())
+        self.neutral = dict((k, rest) for k, (lo, hi, rest) in working.items())
+        self.synthesized = []  # Number of frames of each call to vtlSynthBlock
+
+    def vtlInitialize(self, speaker):
+        return 0
+
+    def vtlClose(self):
+        return 0
+
+    def vtlGetConstants(self, sampling_rate, tube_sections, vtp_no, gp_no):
+        sampling_rate._obj.value = self.audio_sampling_rate
+        tube_sections._obj.value = self.number_tube_sections
+        vtp_no._obj.value = len(VOCAL)
+        gp_no._obj.value = len(GLOTTAL)
+        return 0
+
+    def __param_info(self, labels, names, mins, maxs, neutral):
+        # The real api writes the names in the buffer of the string it receives
+        ctypes.memmove(ctypes.cast(names, ctypes.c_void_p).value, ' '.join(labels).encode() + b'\0',
+                       len(' '.join(labels)) + 1)
+        _write(mins, list(self.mins[k] for k in labels))
+        _write(maxs, list(self.maxs[k] for k in labels))
+        _write(neutral, list(self.neutral[k] for k in labels))
+        return 0
+
+    def vtlGetTractParamInfo(self, names, mins, maxs, neutral):
+        return self.__param_info(VOCAL, names, mins, maxs, neutral)
+
+    def vtlGetGlottisParamInfo(self, names, mins, maxs, neutral):
+        return self.__param_info(GLOTTAL, names, mins, maxs, neutral)
+
+    def vtlSynthBlock(self, tract_params, glottis_params, tube_areas, tube_articulators,
+                      frames, frame_rate, audio, audio_samples):
+        rate = frame_rate.value if isinstance(frame_rate, ctypes.c_double) else frame_rate
+        samples = int(float(frames) / rate * self.audio_sampling_rate)
+        tract = _array(tract_params, frames * len(VOCAL)).reshape(frames, len(VOCAL))
+        glottis = _array(glottis_params, frames * len(GLOTTAL)).reshape(frames, len(GLOTTAL))
+        level = np.tanh(tract.mean(axis=1) + glottis.mean(axis=1) / 1000.0) * 0.5
+        per_frame = self.audio_sampling_rate / rate
+        _array(audio, samples)[:] = level[(np.arange(samples) // per_frame).astype(int)]
+        audio_samples._obj.value = samples
+        self.synthesized.append(frames)
+        return 0
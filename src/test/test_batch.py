@@ -0,0 +1,93 @@
+# -------------------------------------------------------------------------------
+# Name:        test_batch
+# Purpose:     Tests for the multi-process batch synthesis.
+#              The function to be tested is: synthesize_batch()
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# synthesize_batch() distributes utterances over worker processes, each holding
+# its own mediator. The mediator is replaced here by a stub, as VocalTractLab is
+# not needed to test the distribution; it's passed to the workers, which are spawned
+# at least once, as their start method must not matter.
+# Equivalence classes are: synthesizable utterances, utterances whose planning
+# fails, utterances whose synthesis fails, utterances whose audio file can't be written,
+# and workers that fail to initialize
+
+# Global imports
+import os
+import multiprocessing
+import pytest
+# Local imports
+from ..mediator import _batch
+from ..utils import RecoverableException
+
+
+class MockMediator:
+    def __init__(self, production_queue, results_queue):
+        self._utterance = None
+
+    def restart(self):
+        self._utterance = None
+
+    def render(self, utterance):
+        if utterance == 'fail':
+            raise RecoverableException("Unable to plan")
+        if utterance == 'boom':
+            raise ValueError('Error in vtlSynthBlock!')
+        return utterance
+
+    def save(self, utterance, audio):
+        return audio + ' - ' + str(os.getpid()) + '.wav'
+
+    # The audio of 'full' is written in the background, and fails
+    def flush(self):
+        return {'full - ' + str(os.getpid()) + '.wav': 'No space left on device'}
+
+    def close(self):
+        pass
+
+
+class FailingMediator(MockMediator):
+    def __init__(self, production_queue, results_queue):
+        raise RecoverableException("No api")
+
+
+def run_batch(mediator, utterances, ordered=True):
+    return list(_batch.synthesize_batch(utterances, 3, ordered, quiet=True, factory=mediator))
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_ordered(monkeypatch, method):
+    # synthesize_batch() uses the default start method, which depends on the platform and the version
+    monkeypatch.setattr(_batch, 'Pool', multiprocessing.get_context(method).Pool)
+    utterances = ['ba', 'da', 'li', 'mu', 'glia'] * 10
+    results = run_batch(MockMediator, utterances)
+    assert list(r[0] for r in results) == utterances
+    for utterance, path, failure in results:
+        assert failure is None and path.startswith(utterance + ' - ')
+
+
+def test_unordered():
+    utterances = ['ba', 'da', 'li', 'mu', 'glia'] * 10
+    results = run_batch(MockMediator, utterances, False)
+    assert sorted(r[0] for r in results) == sorted(utterances)
+    assert all(r[2] is None for r in results)
+
+
+def test_failures():
+    # Failures are reported per utterance, and the batch goes on
+    results = run_batch(MockMediator, ['ba', 'fail', 'boom', 'da', 'full'])
+    assert [r[0] for r in results] == ['ba', 'fail', 'boom', 'da', 'full']
+    assert results[0][2] is None and results[3][2] is None
+    assert 'No space left' in results[4][2] and results[4][1] is None
+    assert 'Unable to plan' in results[1][2] and results[1][1] is None
+    assert 'vtlSynthBlock' in results[2][2] and results[2][1] is None
+
+
+def test_initialization_failure():
+    results = run_batch(FailingMediator, ['ba', 'da'])
+    assert len(results) == 2
+    for _, path, failure in results:
+        assert path is None and 'Failure initializing the mediator' in failure
@@ -0,0 +1,35 @@
+# -------------------------------------------------------------------------------
+# Name:        test_benchmark
+# Purpose:     Tests for the comparison of benchmark results, and for the startup.
+#              The functions to be tested are: benchmark.compare() and benchmark.startup()
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Only the results that are slower than the tolerance allows are regressions;
+# stages or utterances missing from the previous run are not compared.
+# Starting the application must not import the modules that are only needed on first use
+
+# Local imports
+from .benchmark import compare, startup
+
+
+def results(*timings):
+    return {'meta': {}, 'results': list({'stage': s, 'utterance': u, 'frames': 1, 'seconds': t, 'us_per_frame': None}
+                                        for s, u, t in timings)}
+
+
+def test_compare():
+    previous = results(('plan', 'ba', 1.0), ('motion_block', 'ba', 1.0))
+    current = results(('plan', 'ba', 1.2), ('motion_block', 'ba', 1.3), ('plan', 'mulina', 9.0))
+    slower = compare(current, previous, 0.25)
+    assert len(slower) == 1
+    assert slower[0][0]['stage'] == 'motion_block' and slower[0][1] == 1.0
+    assert compare(current, previous, 0.5) == []
+
+
+def test_startup():
+    seconds, loaded = startup(1)
+    assert seconds > 0
+    assert loaded == []
@@ -0,0 +1,80 @@
+# -------------------------------------------------------------------------------
+# Name:        test_bundle
+# Purpose:     Tests for the resource bundle.
+#              The functions to be tested are: ResourceBundle, bundleKey() and
+#              the construction of SomatoPhonemeTargets and VTParametersInfo from it
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The resources loaded from a bundle must be exactly those parsed and retrieved from their sources,
+# and a bundle must only be loaded for the sources it was built from.
+# The parameters information is retrieved from the fake api (see fake_vtl.py)
+
+# Global imports
+import pytest
+# Local imports
+from ..mediator._bundle import ResourceBundle, bundleKey
+from ..model_components import SomatoPhonemeTargets
+from ..model_components.vocal_tract._parameters_information import VTParametersInfo
+from .fake_vtl import FakeVTL, VOCAL, GLOTTAL
+
+
+@pytest.fixture
+def labels():
+    # VTParametersInfo stores the labels in class variables
+    saved = (VTParametersInfo._vlabels, VTParametersInfo._glabels, VTParametersInfo._working_labels)
+    yield
+    VTParametersInfo._vlabels, VTParametersInfo._glabels, VTParametersInfo._working_labels = saved
+
+
+def information(bounds=None):
+    VTParametersInfo._working_labels = []
+    return VTParametersInfo(FakeVTL(), len(VOCAL), len(GLOTTAL), bounds)
+
+
+def test_bundle(labels, tmp_path):
+    path = str(tmp_path / 'bundle.npy')
+    spt = SomatoPhonemeTargets(0.04)
+    retrieved = information()
+    ResourceBundle('key', spt.getTables(), retrieved.getBounds()).save(path)
+    assert list(p.name for p in tmp_path.iterdir()) == ['bundle.npy']
+    bundle = ResourceBundle.load(path, 'key')
+
+    loaded = SomatoPhonemeTargets(0.04, bundle.tables)
+    assert loaded.targets == spt.targets
+    assert list(loaded.targets) == list(spt.targets)
+    assert loaded.vow_constants == spt.vow_constants and loaded.con_constants == spt.con_constants
+    working = retrieved.getWorkingLabels()
+    given = information(bundle.bounds)
+    assert given.getWorkingLabels() == working
+    assert (given._mins, given._defs, given._maxs) == (retrieved._mins, retrieved._defs, retrieved._maxs)
+    assert (given._working_mins == retrieved._working_mins).all()
+
+
+def test_stale(tmp_path):
+    path = str(tmp_path / 'bundle.npy')
+    assert ResourceBundle.load(path, 'key') is None  # Missing
+    ResourceBundle('key', SomatoPhonemeTargets(0.04).getTables(), ([], [], [], [], [])).save(path)
+    assert ResourceBundle.load(path, 'other') is None
+    with open(path, 'rb') as b_file:
+        content = b_file.read()
+    for corrupted in [b'corrupted', content[:-80]]:
+        with open(path, 'wb') as b_file:
+            b_file.write(corrupted)
+        assert ResourceBundle.load(path, 'key') is None
+
+
+def test_key(tmp_path):
+    speaker = tmp_path / 'speaker'
+    speaker.write_text('one')
+    conf = {'speaker': str(speaker), 'apipath': str(tmp_path / 'api')}
+    key = bundleKey(conf)
+    assert key == bundleKey(conf)
+    speaker.write_text('two')
+    assert key != bundleKey(conf)
+    speaker.write_text('one')
+    assert key == bundleKey(conf)
+    (tmp_path / 'api').write_text('api')
+    assert key != bundleKey(conf)
@@ -0,0 +1,116 @@
+# -------------------------------------------------------------------------------
+# Name:        test_cache
+# Purpose:     Tests for the cache of the produced utterances.
+#              The functions to be tested are: UtteranceCache, Mediator.render() and
+#              the interactive path with a cache
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# A cached utterance must give the same audio as producing it again, and leave the system in the
+# same state, so that the utterances that follow are produced exactly as without the cache.
+# The cache must be bounded, and its disk store must be shared between instances, with no pickled objects.
+# The mediator is built as in conftest, with a mock synthesizer
+
+# Global imports
+import os
+import pickle
+import numpy as np
+import pytest
+# Local imports
+from ..mediator._cache import UtteranceCache, CachedUtterance
+from ..model_components.phonological_level import MotorCommand, StateSpaceCommand
+from .conftest import make_mediator, interactive
+
+SEQUENCE = ['ba', 'mulina', 'ba', 'ba', 'glia', 'mulina', 'ba']
+
+
+def entry(i):
+    return CachedUtterance(np.zeros((1, 1)), np.zeros((1, 1)), np.full(3, i), i, None, np.zeros(1))
+
+
+def test_lru():
+    cache = UtteranceCache(2, 'signature')
+    keys = list(cache.key(u, (np.zeros(2), 0)) for u in ['a', 'b', 'c'])
+    cache.put(keys[0], entry(0))
+    cache.put(keys[1], entry(1))
+    assert cache.get(keys[0]).frames == 0  # a is now the most recently used
+    cache.put(keys[2], entry(2))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).frames == 0 and cache.get(keys[2]).frames == 2
+    stats = cache.stats()
+    assert (stats['entries'], stats['hits'], stats['misses'], stats['evictions']) == (2, 3, 1, 1)
+
+
+def test_keys():
+    cache = UtteranceCache(2, 'signature')
+    key = cache.key('ba', (np.zeros(2), 0))
+    assert key == cache.key('ba', (np.zeros(2), 0))
+    assert key != cache.key('ba', (np.ones(2), 0))
+    assert key != cache.key('ba', (np.zeros(2), 1))
+    assert key != cache.key('bu', (np.zeros(2), 0))
+    assert key != UtteranceCache(2, 'other').key('ba', (np.zeros(2), 0))
+
+
+def test_disk(tmp_path):
+    cache = UtteranceCache(2, 'signature', str(tmp_path))
+    key = cache.key('ba', (np.zeros(2), 0))
+    cache.put(key, entry(5))
+    shared = UtteranceCache(2, 'signature', str(tmp_path))
+    assert (shared.get(key).audio == entry(5).audio).all()
+    assert shared.stats()['disk_hits'] == 1
+    assert list(p.name for p in tmp_path.iterdir()) == [key + '.npy']
+
+
+class Payload:
+    def __reduce__(self):
+        return (os.makedirs, (self.path, ))
+
+
+# Entries on disk are never unpickled, as anyone who can write in the folder could run code with them
+def test_no_pickle(tmp_path):
+    cache = UtteranceCache(2, 'signature', str(tmp_path / 'cache'))
+    key = cache.key('ba', (np.zeros(2), 0))
+    payload = Payload()
+    payload.path = str(tmp_path / 'unpickled')
+    with open(str(tmp_path / 'cache' / (key + '.npy')), 'wb') as c_file:
+        pickle.dump(payload, c_file)
+    assert cache.get(key) is None
+    assert not os.path.exists(payload.path)
+
+
+@pytest.mark.parametrize('engine', [MotorCommand, StateSpaceCommand])
+def test_render(environment, tmp_path, engine):
+    store = str(tmp_path / 'cache')
+    for audio, path in [(True, None), (False, store), (True, store)]:  # The last one reads the disk store
+        plain = make_mediator(tmp_path, engine=engine)
+        cached = make_mediator(tmp_path, UtteranceCache(8, 'signature', path, audio), engine=engine)
+        for i in range(2):  # The second time, every utterance is cached
+            plain.restart()
+            cached.restart()
+            for utterance in SEQUENCE:
+                assert (plain.render(utterance) == cached.render(utterance)).all()
+                assert (plain._vt.getState() == cached._vt.getState()).all()
+        stats = cached.cacheStats()
+        assert stats['hits'] + stats['misses'] == 2 * len(SEQUENCE)
+        assert stats['hits'] >= len(SEQUENCE)
+    assert stats['misses'] == 0 and stats['disk_hits'] > 0
+
+
+def test_interactive(environment, tmp_path):
+    plain = make_mediator(tmp_path)
+    cached = make_mediator(tmp_path, UtteranceCache(8, 'signature'))
+    for i in range(2):
+        plain.restart()
+        cached.restart()
+        for utterance in SEQUENCE:
+            interactive(plain, utterance)
+            interactive(cached, utterance)
+            assert (plain._vt.getState() == cached._vt.getState()).all()
+            assert plain._vt.counter == cached._vt.counter
+    assert cached.cacheStats()['hits'] >= len(SEQUENCE)
+    # The first utterance after the cached ones is produced as it would have been
+    interactive(plain, 'dai_lu')
+    interactive(cached, 'dai_lu')
+    assert (plain._vt._VocalTract__synth.synthesized[-1] == cached._vt._VocalTract__synth.synthesized[-1]).all()
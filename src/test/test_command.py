@@ -0,0 +1,70 @@
+# -------------------------------------------------------------------------------
+# Name:        test_command
+# Purpose:     Tests for the trajectory engine of the motor commands.
+#              The functions to be tested are: MotorCommand.block(), MotorCommand.getFinalValues(),
+#              and the same for StateSpaceCommand
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# MotorCommand.block() evaluates a whole block of frames at once, and must be
+# indistinguishable from advancing the command one frame at a time through y().
+# MotorCommand.getFinalValues() must reproduce the initial dynamic state of the
+# command at time 0, as the constants of the equation are derived from it.
+# StateSpaceCommand must follow the trajectories of MotorCommand within tolerance,
+# and be as consistent between blocks and single frames.
+
+# Global imports
+import numpy as np
+# Local imports
+from ..model_components.phonological_level._motor_command import MotorCommand, StateSpaceCommand
+from ..model_components._parameters_lists import ParList, Target
+from . import testutils
+
+
+def generate_command(parameter_labels, t_constant):
+    target = Target(t_constant, np.random.uniform(-10.0, 10.0, len(parameter_labels)))
+    initial = np.random.uniform(-10.0, 10.0, (MotorCommand.N, len(parameter_labels)))
+    return target, initial
+
+
+def test_block():
+    parameter_labels = testutils.generate_parameter_labels()
+    ParList.setIndexes(parameter_labels, parameter_labels)
+    for t_constant in [7.0, 10.0, 15.0, 25.0]:
+        target, initial = generate_command(parameter_labels, t_constant)
+        stepped = MotorCommand(target, initial, 1.0)
+        blocked = MotorCommand(target, initial, 1.0)
+        frames = np.array(list(stepped.y() for _ in range(300)))
+        assert (blocked.block(300) == frames).all()
+        assert (blocked.getFinalValues() == stepped.getFinalValues()).all()
+
+
+def test_final_values():
+    parameter_labels = testutils.generate_parameter_labels()
+    ParList.setIndexes(parameter_labels, parameter_labels)
+    for t_constant in [7.0, 10.0, 15.0, 25.0]:
+        target, initial = generate_command(parameter_labels, t_constant)
+        command = MotorCommand(target, initial, 1.0)
+        assert np.allclose(command.getFinalValues(), initial)
+
+
+def test_state_space():
+    parameter_labels = testutils.generate_parameter_labels()
+    ParList.setIndexes(parameter_labels, parameter_labels)
+    for t_constant in [7.0, 10.0, 15.0, 25.0]:
+        target, initial = generate_command(parameter_labels, t_constant)
+        closed = MotorCommand(target, initial, 1.0)
+        stepped = StateSpaceCommand(target, initial, 1.0)
+        blocked = StateSpaceCommand(target, initial, 1.0)
+        expected = closed.block(300)
+        frames = np.array(list(stepped.y() for _ in range(300)))
+        assert np.allclose(frames, expected, rtol=1e-9, atol=1e-9)
+        assert np.allclose(stepped.getFinalValues(), closed.getFinalValues(), rtol=1e-9, atol=1e-9)
+        # Blocks, including partially kept ones, are the same as single frames
+        assert (blocked.block(100) == frames[:100]).all()
+        blocked.block(150)
+        blocked.keep(50)
+        assert (blocked.block(150) == frames[150:]).all()
+        assert (blocked.getFinalValues() == stepped.getFinalValues()).all()
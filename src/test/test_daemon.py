@@ -0,0 +1,102 @@
+# -------------------------------------------------------------------------------
+# Name:        test_daemon
+# Purpose:     Tests for the synthesis daemon.
+#              The functions to be tested are: SynthesisDaemon, request()
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Concurrent clients must get the same audio files as the utterances rendered one at a time from rest,
+# whatever the order in which they're served, even when the queue is smaller than the number of clients.
+# Failures are reported to the client that made the request, and don't stop the daemon.
+# Audio files written in the background must exist once their path reaches the client, and failed writes
+# must reach it as failures.
+# The mediator is built as in conftest, with a mock synthesizer
+
+# Global imports
+import io
+import os
+import json
+import socket
+from threading import Thread
+import numpy as np
+from scipy.io import wavfile
+# Local imports
+from ..mediator import SynthesisDaemon
+from ..mediator._daemon import request
+from .conftest import make_mediator
+
+UTTERANCES = ['ba', 'glia', 'mulina', 'dai_lu']
+
+
+def test_daemon(environment, tmp_path):
+    expected = {}
+    reference = make_mediator(tmp_path / 'reference')
+    os.makedirs(tmp_path / 'reference')
+    for utterance in UTTERANCES:
+        reference.restart()
+        expected[utterance] = os.path.basename(reference.save(utterance, reference.render(utterance)))
+    os.makedirs(tmp_path / 'served')
+    path = str(tmp_path / 'daemon.sock')
+    daemon = SynthesisDaemon(make_mediator(tmp_path / 'served'), path, queue_size=1)
+    server = Thread(target=daemon.serve)
+    server.start()
+    results = {}
+
+    def client(utterances):
+        for utterance in utterances:
+            results[utterance] = request(path, utterance, audio=True)
+    clients = list(Thread(target=client, args=([u, 'xq'] if i == 0 else [u], )) for i, u in enumerate(UTTERANCES))
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    # Any number of requests over the same connection
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        stream = connection.makefile('rwb')
+        stream.write(b'{"command": "stats"}\nnot json\n')
+        stream.flush()
+        stats = json.loads(stream.readline())['stats']
+        assert 'Malformed request' in json.loads(stream.readline())['error']
+    daemon.shutdown()
+    server.join()
+    assert not os.path.exists(path)
+    for utterance in UTTERANCES:
+        a_file, error, content = results[utterance]
+        assert error is None and os.path.basename(a_file) == expected[utterance]
+        rate, audio = wavfile.read(io.BytesIO(content))
+        assert rate == 44100 and np.array_equal(audio, wavfile.read(a_file)[1])
+    a_file, error, content = results['xq']
+    assert a_file is None and content is None and error
+    assert stats['requests'] == {'served': 4, 'failed': 1, 'queued': 0, 'capacity': 1}
+    assert stats['production']['counters']['utterances'] == 4
+
+
+def test_writer(environment, tmp_path):
+    os.makedirs(tmp_path / 'served')
+    path = str(tmp_path / 'daemon.sock')
+    daemon = SynthesisDaemon(make_mediator(tmp_path / 'served', writer_threads=1), path)
+    server = Thread(target=daemon.serve)
+    server.start()
+    try:
+        results = list(request(path, utterance) for utterance in UTTERANCES)
+        written = list(os.path.exists(a_file) for a_file, error, content in results)  # As the responses arrive
+    finally:
+        daemon.shutdown()
+        server.join()
+    assert all(error is None for a_file, error, content in results) and all(written)
+    # The folder of the audio files is gone: every write fails
+    missing = str(tmp_path / 'missing.sock')
+    daemon = SynthesisDaemon(make_mediator(tmp_path / 'missing', writer_threads=1), missing)
+    server = Thread(target=daemon.serve)
+    server.start()
+    try:
+        a_file, error, content = request(missing, 'ba')
+        stats = daemon.stats()
+    finally:
+        daemon.shutdown()
+        server.join()
+    assert a_file is None and error.startswith('Unable to write ')
+    assert stats['requests']['failed'] == 1
@@ -0,0 +1,44 @@
+# -------------------------------------------------------------------------------
+# Name:        test_log
+# Purpose:     Tests for the log of the trajectories.
+#              The functions to be tested are: TrajectoryLog
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The log must hold every appended frame (one in n with decimation n), in order, however many
+# frames exceed its initial capacity; once saved, the file must hold the same trajectories
+
+# Global imports
+import numpy as np
+# Local imports
+from ..mediator._log import TrajectoryLog
+
+
+def test_log():
+    states, targets = np.random.rand(1000, 7), np.random.rand(1000, 7)
+    for decimation in [1, 3]:
+        log = TrajectoryLog(7, decimation, capacity=16)
+        for s, t in zip(states, targets):
+            log.append(s, t)
+        assert len(log) == len(states[::decimation])
+        assert np.array_equal(log.states(), states[::decimation])
+        assert np.array_equal(log.targets(), targets[::decimation])
+        assert np.array_equal(log.frames(), np.arange(0, 1000, decimation))
+        log.clear()
+        assert len(log) == 0 and log.states().shape == (0, 7)
+        log.append(states[0], targets[0])
+        assert np.array_equal(log.states(), states[:1])
+
+
+def test_save(tmp_path):
+    log = TrajectoryLog(3)
+    for i in range(10):
+        log.append(np.full(3, i), np.full(3, -i))
+    path = log.save(str(tmp_path) + '/', 'ba')
+    assert path.startswith(str(tmp_path) + '/ba - trajectories - ') and path.endswith('.npy')
+    saved = np.load(path)
+    assert np.array_equal(saved[0], log.states()) and np.array_equal(saved[1], log.targets())
+    assert log.save(str(tmp_path) + '/', 'ba') == path  # Named after the content
+    assert sorted(p.name for p in tmp_path.iterdir()) == [path.split('/')[-1]]
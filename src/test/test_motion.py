@@ -1,7 +1,8 @@
 # -------------------------------------------------------------------------------
 # Name:        test_motion
 # Purpose:     Tests for critical methods for the motion of the articulators.
-#              The functions to be tested are: MotorPhonemePrograms.time(), VocalTract.time()
+#              The functions to be tested are: MotorPhonemePrograms.time(), VocalTract.time(),
+#              and their block counterparts MotorPhonemePrograms.block(), VocalTract.block()
 #
 # Author:      Roberto Sautto
 #
@@ -24,7 +25,6 @@
 # Global imports
 import random
 import numpy as np
-import matplotlib.pyplot as pl
 # Local imports
 from ..model_components.phonological_level import MotorPhonemePrograms
 from . import testutils
@@ -41,6 +41,10 @@ class MockSynth:
     def dump(self, state):
         pass
 
+    # This is the method used by VocalTract.block()
+    def dumpBlock(self, vframes, gframes):
+        pass
+
 
 # There seems to be a caching issue with parameter_list, so this is needed:
 class MockParInfo:
@@ -71,6 +75,7 @@ class MockParInfo:
 
 
 def plot(states_log, targets_log, parameter_labels, mins=None, maxs=None):
+    import matplotlib.pyplot as pl
     toPlot = np.array(states_log).T
     targets = np.array(targets_log).T
 
@@ -204,3 +209,109 @@ def test_motion():
         error = np.square(vt.getState() - case[1]).mean()
         # 0.04 is the maximum error after which a target is considered reached
         assert error <= 0.04, case[2] + " Reached: "+str(vt.getState()) + ". Expected: "+str(case[1])
+
+
+# MotorPhonemePrograms.block() must produce the same frames as the per-frame loop above
+def test_block():
+    # Simulating execution environment
+    parameter_labels = testutils.generate_parameter_labels()
+    mins, maxs = testutils.generate_parameter_bounds(parameter_labels)
+    ParList.setIndexes(parameter_labels, parameter_labels)
+    MockParInfo.setParInfo(parameter_labels, mins, maxs)
+    State.setValidationFunction(MockParInfo.validate)
+    # VTParametersInfo hasn't been set (see _parameters_lists.py)
+    State.asTargetParameters = WorkingParList.asTargetParameters
+    MotorPhonemePrograms.setSanitizingFunction(MockParInfo.mock_expected)
+
+    initial_state = generate_parameter_list(parameter_labels, mins, maxs)
+    plan = list(case[0] for case in generate_cases(parameter_labels, mins, maxs))
+    stepped = MotorPhonemePrograms(initial_state)
+    vt_stepped = VocalTract(MockSynth(), 1, initial_state)
+    stepped.addPlan(plan)
+
+    # Frame by frame
+    state_log = []
+    done = False
+    while not done and len(state_log) < 20000:
+        done, new = stepped.time(vt_stepped.getState())
+        vt_stepped.time(WorkingParList(new), parameter_labels)
+        state_log.append(new)
+    # In blocks of frames, whose size must not matter, nor the size of the windows
+    for chunk, window in [(97, 32), (1, 1), (20000, 1), (5000, 4096)]:
+        blocked = MotorPhonemePrograms(initial_state, window=window)
+        vt_blocked = VocalTract(MockSynth(), 1, initial_state)
+        blocked.addPlan(plan)
+        block_log = []
+        done = False
+        while not done and len(block_log) < 20000:
+            done, frames = blocked.block(vt_blocked.getState(), chunk)
+            vt_blocked.block(frames, parameter_labels)
+            block_log.extend(frames)
+        assert done, "Timeout while producing the plan"
+        assert (np.array(state_log) == np.array(block_log)).all()
+        assert (vt_stepped.getState() == vt_blocked.getState()).all()
+    # Only on the quality reduction grid, whose frames and switches must be those of the frames above
+    for chunk, q in [(97, 10), (20000, 3), (1, 1), (5000, 64)]:
+        sparse = MotorPhonemePrograms(initial_state)
+        vt_sparse = VocalTract(MockSynth(), q, initial_state)
+        sparse.addPlan(plan)
+        grid_log = []
+        done = False
+        while not done and vt_sparse.counter < 20000:
+            phase, q = vt_sparse.getGrid()
+            done, count, indices, frames, last = sparse.sparseBlock(vt_sparse.getState(), chunk, phase, q)
+            assert ((indices + phase + 1) % q == 0).all()
+            vt_sparse.sparseBlock(count, indices, frames, last, parameter_labels)
+            grid_log.extend(frames)
+        assert done and vt_sparse.counter == len(state_log)
+        assert (np.array(state_log[q-1::q]) == np.array(grid_log)).all()
+        assert (vt_stepped.getState() == vt_sparse.getState()).all()
+
+
+def test_convergence():
+    # Simulating execution environment
+    parameter_labels = testutils.generate_parameter_labels()
+    mins, maxs = testutils.generate_parameter_bounds(parameter_labels)
+    ParList.setIndexes(parameter_labels, parameter_labels)
+    MockParInfo.setParInfo(parameter_labels, mins, maxs)
+    State.setValidationFunction(MockParInfo.validate)
+    # VTParametersInfo hasn't been set (see _parameters_lists.py)
+    State.asTargetParameters = WorkingParList.asTargetParameters
+    MotorPhonemePrograms.setSanitizingFunction(MockParInfo.mock_expected)
+
+    initial_state = generate_parameter_list(parameter_labels, mins, maxs)
+    plan = list(case[0] for case in generate_cases(parameter_labels, mins, maxs))
+    for i, target in enumerate(plan):
+        target.label = str(i)
+    weights = np.random.uniform(0.0, 2.0, len(parameter_labels))
+    # Each convergence setting must behave the same frame by frame and in blocks
+    for metric, err, weights, max_frames in [('range', 0.0004, None, 0), ('range', 0.0004, weights, 0),
+                                             ('mse', 0.04, weights, 0), ('mse', 0.04, None, 25)]:
+        stepped = MotorPhonemePrograms(initial_state, 1000, err, metric=metric, weights=weights, max_frames=max_frames)
+        blocked = MotorPhonemePrograms(initial_state, 1000, err, metric=metric, weights=weights, max_frames=max_frames)
+        vt_stepped, vt_blocked = VocalTract(MockSynth(), 1, initial_state), VocalTract(MockSynth(), 1, initial_state)
+        stepped.addPlan(plan)
+        blocked.addPlan(plan)
+        state_log = []
+        done = False
+        while not done and len(state_log) < 20000:
+            done, new = stepped.time(vt_stepped.getState())
+            vt_stepped.time(WorkingParList(new), parameter_labels)
+            state_log.append(new)
+        block_log = []
+        done = False
+        while not done and len(block_log) < 20000:
+            done, frames = blocked.block(vt_blocked.getState(), 97)
+            vt_blocked.block(frames, parameter_labels)
+            block_log.extend(frames)
+        assert done, "Timeout while producing the plan"
+        assert (np.array(state_log) == np.array(block_log)).all()
+        # Every target is reported, and the frames of the report are those produced,
+        # but for the one produced once the plan is over
+        report = blocked.getReport()
+        assert report == stepped.getReport()
+        assert list(label for label, frames, capped in report) == list(str(i) for i in range(len(plan)))
+        assert sum(frames for label, frames, capped in report) == len(block_log) - 1
+        if max_frames:
+            assert all(frames <= max_frames for label, frames, capped in report)
+            assert any(capped for label, frames, capped in report)
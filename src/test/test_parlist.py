@@ -17,8 +17,10 @@
 
 # Global imports
 import random
+import numpy as np
 # Local imports
 from ..model_components._parameters_lists import State, ParList
+from ..model_components.vocal_tract._parameters_information import VTParametersInfo
 from . import testutils
 
 
@@ -70,3 +72,50 @@ def test_update():
         expected = case[2]
         state.update(key, new)
         assert state.get(key) == expected, "Failed with key="+str(key)+", new="+str(new)+", expected="+str(expected)
+
+
+# State.updateWorking() must be equivalent to State.update() on every working parameter,
+# and State.asFrame() must follow the order of the vocal and glottal labels
+def test_update_working():
+    parameter_labels = testutils.generate_parameter_labels()
+    mins, maxs = testutils.generate_parameter_bounds(parameter_labels)
+    split = random.randrange(len(parameter_labels)+1)
+    vocal, glottal = parameter_labels[:split], parameter_labels[split:]
+    working = random.sample(parameter_labels, len(parameter_labels))
+    ParList.setIndexes(vocal + glottal, working, vocal, glottal)
+
+    def validate(k: str, val: float) -> float:
+        return min(max(val, mins[k]), maxs[k])
+    State._validate, original = validate, State._validate
+
+    bulk, single = State(), State()
+    for _ in range(25):
+        values = list(random.triangular(-10.0, 10.0) for _ in working)
+        bulk.updateWorking(values)
+        for k, v in zip(working, values):
+            single.update(k, v)
+        assert (bulk.asTargetParameters() == single.asTargetParameters()).all()
+        assert list(bulk.asTargetParameters()) == list(validate(k, v) for k, v in zip(working, values))
+        v_frame, g_frame = bulk.asFrame()
+        assert list(v_frame) == list(bulk.get(k) for k in vocal)
+        assert list(g_frame) == list(bulk.get(k) for k in glottal)
+    State._validate = original
+
+
+# VTParametersInfo.validate_array() must clamp whole arrays as validate() clamps each parameter
+def test_validate_array():
+    parameter_labels = testutils.generate_parameter_labels()
+    mins, maxs = testutils.generate_parameter_bounds(parameter_labels)
+    # VTParametersInfo can't be built without the api, so its bounds are set directly
+    original = VTParametersInfo._working_labels
+    VTParametersInfo._working_labels = parameter_labels
+    info = VTParametersInfo.__new__(VTParametersInfo)
+    info._mins, info._maxs = mins, maxs
+    info._alignBounds()
+
+    frames = np.random.triangular(-12.0, 0.0, 12.0, (50, len(parameter_labels)))
+    frames[0] = list(mins[k] for k in parameter_labels)  # On boundary
+    expected = list(list(info.validate(k, v) for k, v in zip(parameter_labels, frame)) for frame in frames)
+    assert (info.validate_array(frames) == np.array(expected)).all()
+    assert (info.sanitize_parameter_list(list(frames[1])) == np.array(expected[1])).all()
+    VTParametersInfo._working_labels = original
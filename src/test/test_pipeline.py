@@ -0,0 +1,115 @@
+# -------------------------------------------------------------------------------
+# Name:        test_pipeline
+# Purpose:     Tests for the pipeline of the interactive path.
+#              The functions to be tested are: Pipeline, and Mediator.run() with a pipeline
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Utterances produced through the pipeline must give the same audio files as those produced one at a time,
+# with or without the cache; failures to plan must be reported as they are without the pipeline.
+# The stages run by the planner and by the synthesis process must be recorded in the statistics of the mediator.
+# Profiled utterances are produced by the mediator on its own.
+# When tracing, the timeline must hold the spans of every stage, in the process they ran in.
+# Audio files are named after their content, so the same files mean the same audio.
+# The mediator is built as in conftest, on the fake api (see fake_vtl.py), which the synthesis process uses too
+
+# Global imports
+import os
+import json
+import contextlib
+import pytest
+# Local imports
+from ..mediator._cache import UtteranceCache
+from ..model_components import Synthesizer
+from .fake_vtl import FakeVTL
+from .conftest import make_mediator, interactive
+
+SEQUENCE = ['ba', 'glia', 'mulina', 'ba', 'dai_lu']
+
+
+def synthesizer():
+    with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+        return Synthesizer('', '', 1000, 10, FakeVTL())
+
+
+def pipelined(folder, cache=None, trace_path=None):
+    return make_mediator(folder, cache, synth=synthesizer(), api=FakeVTL(), writer_threads=1, writer_queue=2,
+                         writer_sync=2, pipeline=2, trace_path=trace_path)
+
+
+def messages(mediator):
+    result = []
+    while not mediator._output.empty():
+        result.append(mediator._output.get()[1])
+    return result
+
+
+@pytest.mark.parametrize('cache', [False, True])
+def test_pipeline(environment, tmp_path, cache):
+    serial_folder, piped_folder = tmp_path / 'serial', tmp_path / 'piped'
+    os.makedirs(serial_folder)
+    os.makedirs(piped_folder)
+    serial = make_mediator(serial_folder, synth=synthesizer())
+    piped = pipelined(piped_folder, UtteranceCache(8, 'signature') if cache else None)
+    piped._pipeline.start()
+    for i in range(2):  # With the cache, the second time every utterance is cached
+        serial.restart()
+        piped.restart()
+        for utterance in SEQUENCE:
+            interactive(serial, utterance)
+            piped._input.put(('say', ({}, utterance)))  # Planned ahead
+        for utterance in SEQUENCE:
+            piped._command_switch()
+    piped.close()
+    serial.close()
+    reports = messages(piped)
+    assert sum(1 for m in reports if 'has been synthesized' in m) == 2 * len(SEQUENCE)
+    assert sum(1 for m in reports if 'from the cache' in m) == (len(SEQUENCE) if cache else 0)
+    assert sorted(os.listdir(serial_folder)) == sorted(os.listdir(piped_folder))
+    # The synthesis process reports its stages, the planner its own
+    stages = piped.stats()['production']['stages']
+    assert stages['synthesis']['calls'] == stages['output']['calls'] == stages['planning']['calls'] == 2 * len(SEQUENCE)
+    assert piped.writerStats()['files'] == 2 * len(SEQUENCE)
+
+
+def test_run(environment, tmp_path):
+    piped = pipelined(tmp_path)
+    piped.start()
+    for options, utterance in [({}, 'ba'), ({}, 'xq'), ({'profile': True}, 'glia')]:
+        piped._input.put(('say', (options, utterance)))
+    reports = []
+    while sum(1 for m in reports if 'has been synthesized' in m) < 2:
+        reports.append(piped._output.get(timeout=60)[1])
+    piped.kill()
+    piped.join()
+    assert any('Unable to plan for xq' in m for m in reports)
+    # The profiled utterance is synthesized by the mediator, and its profile saved next to it
+    assert any("The profile of 'glia'" in m for m in reports)
+    assert sorted(name.split(' - ')[0] + os.path.splitext(name)[1] for name in os.listdir(tmp_path)) == \
+        ['ba.wav', 'glia.pstats', 'glia.txt', 'glia.wav']
+
+
+def test_trace(environment, tmp_path):
+    piped = pipelined(tmp_path, trace_path=str(tmp_path / 'traces'))
+    piped.start()
+    for utterance in ['ba', 'glia']:
+        piped._input.put(('say', ({}, utterance)))
+    reports = []
+    while sum(1 for m in reports if 'has been synthesized' in m) < 2:
+        reports.append(piped._output.get(timeout=60)[1])
+    piped.kill()
+    piped.join()
+    traces = list((tmp_path / 'traces').glob('trace - *.json'))
+    assert len(traces) == 1
+    with open(str(traces[0])) as t_file:
+        events = json.load(t_file)['traceEvents']
+    spans = list(e for e in events if e['ph'] == 'X')
+    tracks = dict((e['tid'], e['args']['name']) for e in events if e['ph'] == 'M')
+    names = set((e['name'], tracks[e['tid']]) for e in spans)
+    assert {('ba', 'utterances'), ('glia', 'utterances'), ('a', 'targets')} <= names
+    assert set(e['name'] for e in spans) >= {'command switch', 'planning', 'motion', 'synthesis', 'output'}
+    processes = dict((e['name'], e['pid']) for e in spans)
+    assert processes['synthesis'] != processes['motion'] == os.getpid()
+    assert all(e['dur'] >= 0 for e in spans)
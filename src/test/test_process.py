@@ -0,0 +1,76 @@
+# -------------------------------------------------------------------------------
+# Name:        test_process
+# Purpose:     Tests for the mediator run in a process of its own.
+#              The functions to be tested are: MediatorProcess
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The process must behave as the mediator thread does: commands are answered through the queues,
+# failures to initialize are raised on creation, and killing it stops it, whether it's been started or not.
+# As the real mediator needs VocalTractLab, the process runs a mediator standing in for it,
+# which answers every command with a message, and records its lifecycle in the results
+
+# Global imports
+import os
+import pytest
+# Local imports
+from ..mediator import MediatorProcess
+from ..utils import HSFCThread, UnrecoverableException
+
+
+class EchoMediator(HSFCThread):
+    def __init__(self, input_queue, output_queue):
+        super(EchoMediator, self).__init__(input_queue, output_queue)
+        print('Initializing echo mediator...')
+
+    def run(self):
+        while self.live():
+            command = self._next()
+            if command is None:
+                break
+            self._output.put(('message', (os.getpid(), command)))
+        self.close()
+
+    def close(self):
+        self._output.put(('message', 'closed'))
+
+
+class FailingMediator(EchoMediator):
+    def __init__(self, input_queue, output_queue):
+        super(FailingMediator, self).__init__(input_queue, output_queue)
+        raise UnrecoverableException('Initialization failed')
+
+
+def queues():
+    return MediatorProcess.context.JoinableQueue(0), MediatorProcess.context.JoinableQueue(0)
+
+
+def test_process():
+    mediator_input, interface_input = queues()
+    mediator = MediatorProcess(mediator_input, interface_input, EchoMediator)
+    mediator.start()
+    mediator_input.put(('say', ({}, 'ba')))
+    kind, (pid, command) = interface_input.get(timeout=30)
+    assert kind == 'message' and command == ('say', ({}, 'ba')) and pid != os.getpid()
+    assert mediator.is_alive()
+    mediator.kill()
+    mediator.join(30)
+    assert not mediator.is_alive()
+    assert interface_input.get(timeout=30) == ('message', 'closed')
+
+
+def test_kill_before_start():
+    mediator_input, interface_input = queues()
+    mediator = MediatorProcess(mediator_input, interface_input, EchoMediator)
+    mediator.kill()
+    mediator.join(30)
+    assert not mediator.is_alive()
+    assert interface_input.get(timeout=30) == ('message', 'closed')
+
+
+def test_failure():
+    mediator_input, interface_input = queues()
+    with pytest.raises(UnrecoverableException, match='Initialization failed'):
+        MediatorProcess(mediator_input, interface_input, FailingMediator)
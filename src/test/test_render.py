@@ -0,0 +1,140 @@
+# -------------------------------------------------------------------------------
+# Name:        test_render
+# Purpose:     Tests for the offline rendering path of the mediator.
+#              The functions to be tested are: Mediator.render(), Mediator.restart(),
+#              the logging of the trajectories of Mediator.time(), profiling, Mediator.stats()
+#              and Mediator.flush()
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Mediator.render() must send to the synthesizer exactly the frames that the interactive
+# path (Mediator.time() frame by frame, followed by Mediator.speak()) sends, for any sequence
+# of utterances. After Mediator.restart(), an utterance must be produced as from a fresh system.
+# Trajectories are only logged when requested, and logging them must not change the audio;
+# the same goes for profiling, whose reports are saved next to the audio file.
+# Both paths must give the same statistics of motion.
+# The real targets and time constants are used; the api is replaced by a mock synthesizer
+# which records the frames it is asked to synthesize.
+
+# Global imports
+import os
+import pstats
+import numpy as np
+import pytest
+# Local imports
+from ..mediator._log import TrajectoryLog
+from ..mediator._cache import UtteranceCache
+from ..model_components.phonological_level import MotorCommand, StateSpaceCommand
+from ..utils import RecoverableException
+from .conftest import WORKING, make_mediator, interactive
+
+UTTERANCES = ['ba', 'glia', 'mulina', 'ba', 'dai_lu', 'zia']
+
+
+@pytest.mark.parametrize('engine', [MotorCommand, StateSpaceCommand])
+@pytest.mark.parametrize('sparse_qred', [0, 10])  # Every frame, or those on the grid only (see Mediator._move())
+def test_render(environment, tmp_path, engine, sparse_qred):
+    stepped = make_mediator(tmp_path, engine=engine)
+    rendered = make_mediator(tmp_path, engine=engine, sparse_qred=sparse_qred)
+    for utterance in UTTERANCES:
+        interactive(stepped, utterance)
+        rendered.render(utterance)
+    stepped_frames = stepped._vt._VocalTract__synth.synthesized
+    rendered_frames = rendered._vt._VocalTract__synth.synthesized
+    assert len(stepped_frames) == len(rendered_frames) == len(UTTERANCES)
+    for a, b in zip(stepped_frames, rendered_frames):
+        assert a.shape == b.shape and (a == b).all()
+
+
+def test_restart(environment, tmp_path):
+    fresh, used = make_mediator(tmp_path), make_mediator(tmp_path)
+    expected = fresh.render('mulina')
+    used.render('glia_ba')
+    used.restart()
+    used.render('mulina')
+    a = fresh._vt._VocalTract__synth.synthesized[-1]
+    b = used._vt._VocalTract__synth.synthesized[-1]
+    assert len(expected) == len(a) and a.shape == b.shape and (a == b).all()
+
+
+def test_timeout(environment, tmp_path):
+    mediator = make_mediator(tmp_path)
+    mediator._max_time_letter = 10  # No utterance can be completed
+    with pytest.raises(RecoverableException):
+        mediator.render('ba')
+
+
+def test_logging(environment, tmp_path, monkeypatch):
+    plain, logged = make_mediator(tmp_path), make_mediator(tmp_path)
+    decimated = make_mediator(tmp_path, log_decimation=3)
+    appended = []
+    original = TrajectoryLog.append
+    monkeypatch.setattr(TrajectoryLog, 'append', lambda self, *a: appended.append(1) or original(self, *a))
+    interactive(plain, 'glia')
+    assert not appended  # Not requested
+    interactive(logged, 'glia', {'log': True})
+    interactive(decimated, 'glia', {'log': True})
+    a, b, c = (m._vt._VocalTract__synth.synthesized[-1] for m in (plain, logged, decimated))
+    assert a.shape == b.shape == c.shape and (a == b).all() and (a == c).all()
+    files = sorted(tmp_path.glob('glia - trajectories - *.npy'))
+    assert len(files) == 2
+    full, every_third = sorted((np.load(str(f)) for f in files), key=len, reverse=True)
+    assert full.shape == (2, len(appended) // 2, len(WORKING))
+    assert np.array_equal(every_third, full[:, ::3])
+    assert len(logged._log) == 0  # Cleared for the next utterance
+
+
+def test_stats(environment, tmp_path):
+    stepped, rendered = make_mediator(tmp_path), make_mediator(tmp_path)
+    cached = make_mediator(tmp_path, UtteranceCache(8, 'signature'))
+    for utterance in ['ba', 'glia', 'ba']:
+        interactive(stepped, utterance)
+        for mediator in (stepped, rendered, cached):
+            if mediator is not stepped:
+                mediator.render(utterance)
+            mediator.restart()
+    stepped._input.put(('stats', None))
+    stepped._command_switch()
+    assert stepped._current_utterance is None
+    messages = list(stepped._output.get_nowait()[1] for i in range(stepped._output.qsize()))
+    assert len(messages) == 4 and messages[-1].startswith('production:') and 'frames_per_target' in messages[-1]
+    a, b, c = (m.stats()['production'] for m in (stepped, rendered, cached))
+    assert a['counters'] == b['counters'] == {'utterances': 3} and c['counters'] == {'utterances': 2, 'cached': 1}
+    assert a['stages']['motion']['calls'] == b['stages']['motion']['calls'] == 3
+    assert a['stages']['motion']['amount'] == b['stages']['motion']['amount']
+    assert a['stages']['planning']['amount'] == b['stages']['planning']['amount'] > 0
+    assert a['stages']['synthesis']['amount'] == a['stages']['output']['amount'] > 0
+    assert a['frames_per_utterance'] == a['stages']['motion']['amount'] / 3
+    assert cached.stats()['cache']['hits'] == 1
+
+
+def test_profile(environment, tmp_path):
+    plain, profiled = make_mediator(tmp_path / 'plain'), make_mediator(tmp_path)
+    os.makedirs(tmp_path / 'plain')
+    interactive(plain, 'glia')
+    interactive(profiled, 'glia', {'profile': True})
+    a, b = (m._vt._VocalTract__synth.synthesized[-1] for m in (plain, profiled))
+    assert a.shape == b.shape and (a == b).all()
+    assert profiled._profiler is None
+    audio = list(tmp_path.glob('glia - *.wav'))
+    assert len(audio) == 1
+    base = str(audio[0])[:-len('.wav')]
+    assert 'makePlan' in str(pstats.Stats(base + '.pstats').stats)
+    with open(base + ' - profile.txt') as summary:
+        text = summary.read()
+    assert text.startswith('Peak traced memory: ') and 'Slowest functions' in text
+
+
+# With the audio written in the background, paths can only be handed out once flush() returns
+def test_flush(environment, tmp_path):
+    mediator = make_mediator(tmp_path, writer_threads=1)
+    a_file = mediator.save('ba', mediator.render('ba'))
+    assert mediator.flush() == {} and os.path.exists(a_file)
+    missing = make_mediator(tmp_path / 'missing', writer_threads=1)
+    a_file = missing.save('ba', missing.render('ba'))
+    failures = missing.flush()
+    assert list(failures) == [a_file] and not os.path.exists(a_file)
+    mediator.close()
+    missing.close()
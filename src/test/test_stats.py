@@ -0,0 +1,50 @@
+# -------------------------------------------------------------------------------
+# Name:        test_stats
+# Purpose:     Tests for the counters and timers of production.
+#              The functions to be tested are: Stats, formatStats() and dumpStats()
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Stages must add up their calls, seconds and amounts, whichever thread records them, and the rates
+# must be derived from them; the statistics must be displayed and saved as they are
+
+# Global imports
+import json
+from threading import Thread
+# Local imports
+from ..utils import Stats, formatStats, dumpStats
+
+
+def test_stats():
+    stats = Stats()
+    assert stats.snapshot()['frames_per_utterance'] == 0.0  # Nothing to divide yet
+    threads = list(Thread(target=lambda: [stats.record('motion', 0.5, 100) for i in range(100)]) for k in range(4))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.record('planning', 1.0, 8)
+    stats.record('synthesis', 2.0, 5.0)
+    stats.count('utterances', 400)
+    snapshot = stats.snapshot()
+    assert snapshot['stages']['motion'] == {'calls': 400, 'seconds': 200.0, 'amount': 40000}
+    assert snapshot['counters'] == {'utterances': 400}
+    assert snapshot['frames_per_utterance'] == 100.0
+    assert snapshot['frames_per_target'] == 5000.0
+    assert snapshot['synthesis_rate'] == 2.5
+    assert snapshot['production_rate'] == 5.0 / 203.0
+
+
+def test_output(tmp_path):
+    stats = Stats()
+    stats.record('output', 0.25, 1.5)
+    full = {'production': stats.snapshot(), 'cache': None}
+    text = formatStats(full)
+    assert 'production:\n  uptime: ' in text and '    output:\n      calls: 1\n      seconds: 0.25\n' in text
+    assert text.endswith('cache: None')
+    dumpStats(str(tmp_path / 'stats.json'), full)
+    with open(str(tmp_path / 'stats.json')) as s_file:
+        assert json.load(s_file) == full
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['stats.json']
@@ -0,0 +1,58 @@
+# -------------------------------------------------------------------------------
+# Name:        test_synthesizer
+# Purpose:     Tests for the frame buffers of the synthesizer, and its streaming mode.
+#              The functions to be tested are: Synthesizer.dump(), Synthesizer.dumpBlock(),
+#              Synthesizer.__call__(), Synthesizer.startStream(), Synthesizer.endStream()
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The api is replaced by a pure-Python fake (see fake_vtl.py), whose audio only depends
+# on each frame: streaming must then produce the same audio as a synthesis at once,
+# while never holding more frames than a block and its overlaps.
+
+# Global imports
+import numpy as np
+# Local imports
+from ..model_components.vocal_tract import Synthesizer
+from .fake_vtl import FakeVTL, VOCAL, GLOTTAL
+
+
+def generate_frames(number):
+    return np.random.uniform(-1.0, 1.0, (number, len(VOCAL))), np.random.uniform(0.0, 800.0, (number, len(GLOTTAL)))
+
+
+def test_buffers():
+    api = FakeVTL()
+    synth = Synthesizer('', '', 1000, 10, api)
+    vframes, gframes = generate_frames(1000)  # More than the initial capacity
+    for i in range(300):
+        synth.dump([vframes[i], gframes[i]])
+    synth.dumpBlock(vframes[300:], gframes[300:])
+    audio = synth()
+    expected = np.tanh(vframes.mean(axis=1) + gframes.mean(axis=1) / 1000.0) * 0.5
+    assert len(audio) == 1000 * 441
+    assert (audio[::441] == np.int16(expected * (2 ** 15 - 1))).all()
+    # The buffers are reused after flushing
+    synth.flush()
+    synth.dumpBlock(vframes[:10], gframes[:10])
+    assert (synth()[::441] == np.int16(expected[:10] * (2 ** 15 - 1))).all()
+
+
+def test_stream():
+    api = FakeVTL()
+    synth = Synthesizer('', '', 1000, 10, api)
+    vframes, gframes = generate_frames(1234)
+    synth.dumpBlock(vframes, gframes)
+    expected = synth()
+    synth.flush()
+
+    chunks = []
+    synth.startStream(chunks.append, 50, 5)
+    for i in range(0, 1234, 7):  # Frames arrive in small blocks
+        synth.dumpBlock(vframes[i:i+7], gframes[i:i+7])
+    synth.endStream()
+    assert len(chunks) > 1
+    assert (np.concatenate(chunks) == expected).all()
+    assert max(api.synthesized[1:]) <= 50 + 2 * 5
@@ -53,13 +53,13 @@ def generate_cases():
             fl = ''.join(list(random.choice(pr) for _ in range(random.randrange(1, 10))))
         cases.append('help ' + fl + ' help')
         fl = '-p'
-        while bool(re.match(r'^(( )*|-p)\Z', fl)):  # This would make it acceptable
+        while bool(re.match(r'^(( )*|-p|-l|-t)\Z', fl)):  # This would make it acceptable
             fl = ''.join(list(random.choice(pr.strip()) for _ in range(random.randrange(1, 10))))
         cases.append('say ' + fl + ' ba')
     # Malformed arguments:
     while len(cases) < 100:
         argument = 'help'
-        while argument in ['help', 'exit', 'say', 'commands']:
+        while argument in ['help', 'exit', 'say', 'stats', 'commands']:
             argument = ''.join(list(random.choice(ascii_lowercase+'_') for _ in range(random.randrange(1, 20))))
         cases.append('help ' + argument)
         cases.append('exit ' +
@@ -205,13 +205,18 @@ def test_system():
     expected_results = ["help [command|'commands']\n", "  This command displays explanatory text for (command)\n",
                         "  'help commands' displays a list of available commands\n",
                         "Here is a list of available commands:\n", "  exit\n", "  help [command]\n",
-                        "  say [-p] word(_word)*\n", "say [-p] word(_word)*\n",
+                        "  say [-p] [-l] [-t] word(_word)*\n", "  stats\n", "say [-p] [-l] [-t] word(_word)*\n",
                         "  This command synthesizes the utterance. Words must be separated by '_'\n",
                         "  Allowed syllables are: b[aiu], d[aiu], ghi, g[au], gli, gli[au], "
                         "l[aiu], m[aiu], n[aiu], v[aiu], z[aiu]\n",
                         "  It's advised to only use: ba, da, di, ga, gli, glia, gli, gliu, la, li, lu, "
                         "ma, mi, mu, na, ni, nu, va, vi, vu, za, zi, zu\n",
                         "  Setting the flag -p will show the trajectory of single articulators before synthesis\n",
+                        "  Setting the flag -l will save the trajectories, and their targets, as a .npy file "
+                        "in the output folder\n",
+                        "  Setting the flag -t will profile the production, saving the profile and the largest "
+                        "allocations\n",
+                        "  next to the audio file\n",
                         "exit\n", "  This command terminates outstanding threads and exits the program\n",
                         "  Warning: this command will kill any ongoing synthesis jobs\n"]
     for i in range(len(expected_results)):
@@ -0,0 +1,116 @@
+# -------------------------------------------------------------------------------
+# Name:        test_thread
+# Purpose:     Tests for the shutdown of the threads waiting on their queues,
+#              and for the backpressure of the bounded ones.
+#              The functions to be tested are: HSFCThread.kill(), HSFCThread._next(),
+#              HSFCThread._forward(), InputGate
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# A thread blocked on its empty input queue must wake up and stop as soon as it's killed,
+# and items queued before the kill must still be received in order by a thread that is running.
+# A thread forwarding to a full queue must wait for room, and give up once it's killed
+
+# Global imports
+import time
+from queue import Queue
+from threading import Thread
+# Local imports
+from ..utils import HSFCThread
+from ..user_interface import InputGate
+
+
+class Consumer(HSFCThread):
+    def __init__(self, input_queue, output_queue):
+        super(Consumer, self).__init__(input_queue, output_queue)
+
+    def run(self):
+        while self.live():
+            item = self._next()
+            if item is None:
+                break
+            self._forward(item)
+
+
+def test_kill_while_waiting():
+    consumer = Consumer(Queue(0), Queue(0))
+    consumer.start()
+    consumer.kill()
+    consumer.join(5)
+    assert not consumer.is_alive()
+    assert not consumer.live()
+
+
+def test_items_before_kill():
+    input_queue = Queue(0)
+    output_queue = Queue(0)
+    consumer = Consumer(input_queue, output_queue)
+    consumer.start()
+    for i in range(10):
+        input_queue.put(i)
+    input_queue.join()  # Every item has been received
+    consumer.kill()
+    consumer.join(5)
+    assert not consumer.is_alive()
+    assert list(output_queue.get_nowait() for _ in range(10)) == list(range(10))
+    assert input_queue.empty()
+
+
+def test_kill_with_full_queue():
+    input_queue = Queue(1)
+    input_queue.put(0)
+    consumer = Consumer(input_queue, Queue(0))
+    consumer.kill()  # Must not wait for room
+    assert not consumer.live()
+
+
+def test_forward_waits_for_room():
+    input_queue = Queue(0)
+    output_queue = Queue(2)
+    consumer = Consumer(input_queue, output_queue)
+    consumer.start()
+    for i in range(5):
+        input_queue.put(i)
+    time.sleep(0.3)
+    assert output_queue.qsize() == 2  # The consumer is waiting for room
+    assert input_queue.qsize() == 2  # and receives nothing meanwhile
+    received = list(output_queue.get(timeout=5) for _ in range(5))
+    assert received == list(range(5))
+    consumer.kill()
+    consumer.join(5)
+    assert not consumer.is_alive()
+
+
+def test_forward_gives_up_when_killed():
+    output_queue = Queue(1)
+    output_queue.put(-1)
+    consumer = Consumer(Queue(0), output_queue)
+    consumer.start()
+    consumer._input.put(0)
+    time.sleep(0.2)
+    consumer.kill()
+    consumer.join(5)
+    assert not consumer.is_alive()
+    assert output_queue.get_nowait() == -1
+    assert output_queue.empty()
+
+
+def test_gate():
+    gate = InputGate(2)
+    assert gate.enter(timeout=1) and gate.enter(timeout=1)
+    assert gate.waiting() == 2
+    assert not gate.enter(timeout=0.1)  # Full
+    entered = []
+    reader = Thread(target=lambda: entered.append(gate.enter()))
+    reader.start()
+    time.sleep(0.1)
+    assert not entered  # The reader waits for an input to be processed
+    gate.leave()
+    reader.join(5)
+    assert entered == [True]
+    assert gate.waiting() == 2
+    gate.leave()
+    gate.leave()
+    assert gate.waiting() == 0
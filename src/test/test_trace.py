@@ -0,0 +1,45 @@
+# -------------------------------------------------------------------------------
+# Name:        test_trace
+# Purpose:     Tests for the timeline of production.
+#              The functions to be tested are: Tracer, startTracing() and stopTracing()
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Spans must nest as the blocks they trace, on the thread or track they're recorded on, and be saved
+# in the trace event format; nothing must be recorded while tracing is off
+
+# Global imports
+import json
+import threading
+# Local imports
+from ..utils import tracer, startTracing, stopTracing
+
+
+def test_tracer(tmp_path):
+    with tracer().span('off'):
+        pass
+    assert not tracer().enabled and tracer().events() == []
+    traced = startTracing()
+    assert tracer() is traced and startTracing() is traced
+    with tracer().span('outer', 'test'):
+        with tracer().span('inner', 'test', args={'n': 1}):
+            pass
+        start = tracer().now()
+        tracer().complete('ba', start, start + 5, 'test', 'targets')
+    worker = threading.Thread(target=lambda: tracer().complete('other', 0, 1), name='worker')
+    worker.start()
+    worker.join()
+    assert stopTracing() is traced and not tracer().enabled
+    traced.extend([{'name': 'merged', 'ph': 'X', 'ts': 0, 'dur': 1, 'pid': 0, 'tid': 0}])
+    traced.save(str(tmp_path / 'trace.json'))
+    with open(str(tmp_path / 'trace.json')) as t_file:
+        events = json.load(t_file)['traceEvents']
+    spans = dict((e['name'], e) for e in events if e['ph'] == 'X')
+    names = dict((e['tid'], e['args']['name']) for e in events if e['ph'] == 'M')
+    outer, inner = spans['outer'], spans['inner']
+    assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+    assert inner['args'] == {'n': 1} and inner['tid'] == outer['tid'] == threading.get_ident()
+    assert names[spans['ba']['tid']] == 'targets' and spans['ba']['dur'] == 5
+    assert names[spans['other']['tid']] == 'worker' and 'merged' in spans
@@ -0,0 +1,65 @@
+# -------------------------------------------------------------------------------
+# Name:        test_writer
+# Purpose:     Tests for the background writer of audio files.
+#              The functions to be tested are: AudioWriter, outputAudio() and contentFile()
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Files written in the background must be the same as those written synchronously, and be complete
+# once the writer is flushed. Names depend on the content alone, so that different audio never
+# overwrites other audio, however quickly it's written. Failed writes are reported, and don't stop the writer
+
+# Global imports
+import os
+import numpy as np
+# Local imports
+from ..utils import AudioWriter, outputAudio
+from ..utils._writer import contentFile
+
+
+def audio(i):
+    return (np.sin(np.arange(4410) * (i + 1) / 10) * 10000).astype(np.int16)
+
+
+def test_names():
+    assert contentFile('out/', 'ba', 44100, audio(0)) == contentFile('out/', 'ba', 44100, audio(0))
+    assert contentFile('out/', 'ba', 44100, audio(0)) != contentFile('out/', 'ba', 44100, audio(1))
+    assert contentFile('out/', 'ba', 44100, audio(0)) != contentFile('out/', 'ba', 22050, audio(0))
+    assert contentFile('out/', 'ba', 44100, audio(0)).startswith('out/ba - ')
+
+
+def test_writer(tmp_path):
+    synchronous, background = str(tmp_path / 's') + '/', str(tmp_path / 'b') + '/'
+    os.makedirs(synchronous)
+    os.makedirs(background)
+    writer = AudioWriter(threads=2, queue_size=2, sync=3)
+    paths = []
+    for i in list(range(10)) + [0, 1]:  # The last two are already written
+        expected = outputAudio(synchronous, 'ba', 44100, audio(i))
+        paths.append((expected, writer.submit(background, 'ba', 44100, audio(i))))
+    writer.flush()
+    for expected, path in paths:
+        with open(expected, 'rb') as e_file, open(path, 'rb') as a_file:
+            assert e_file.read() == a_file.read()
+    assert sorted(os.listdir(synchronous)) == sorted(os.listdir(background))
+    assert len(os.listdir(background)) == 10  # No temporary files are left
+    stats = writer.stats()
+    assert (stats['files'], stats['skipped'], stats['failures'], stats['pending']) == (12, 2, 0, 0)
+    assert stats['bytes'] == sum(os.path.getsize(background + f) for f in os.listdir(background))
+    assert stats['syncs'] >= 4 and stats['throughput'] > 0
+    writer.close()
+
+
+def test_failure(tmp_path):
+    failed = []
+    writer = AudioWriter(failed=lambda path, ex: failed.append(path))
+    missing = writer.submit(str(tmp_path / 'missing') + '/', 'ba', 44100, audio(0))
+    written = writer.submit(str(tmp_path) + '/', 'ba', 44100, audio(0))
+    assert list(writer.flush()) == [missing]
+    assert writer.flush() == {}  # Each failure is returned once
+    writer.close()
+    assert failed == [missing]
+    assert os.path.exists(written)
+    assert writer.stats()['failures'] == 1 and writer.stats()['files'] == 1
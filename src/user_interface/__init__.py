@@ -1 +1,2 @@
 from ._interface import UserInterface
+from ._interface import InputGate
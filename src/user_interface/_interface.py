@@ -10,23 +10,56 @@
 # -------------------------------------------------------------------------------
 
 # Global imports
-from queue import Queue, Empty
+from queue import Queue
+from threading import Semaphore, Lock
 # Local imports
-from ..utils import RecoverableException, UnrecoverableException, HSFCThread, CommandException
+from ..utils import RecoverableException, UnrecoverableException, HSFCThread, CommandException, tracer
 from ._interface_utils import parse, help_text
 from ._interface_utils import unknown_command, help_function
 
 
+# Bounds the user inputs waiting for the interface: the reader of the inputs enters the gate before putting
+# each in the input queue of the interface, which leaves it once the input has been processed.
+# The input queue itself is not bounded, as the messages of the mediator go through it as well,
+# and the mediator must never wait for the interface
+class InputGate:
+    def __init__(self, limit):
+        self.__slots = Semaphore(limit)
+        self.__lock = Lock()  # Guards the count
+        self.__waiting = 0
+
+    # Waits for room for an input, for at most timeout seconds; returns whether it's been found
+    def enter(self, timeout=None):
+        if not self.__slots.acquire(timeout=timeout):
+            return False
+        with self.__lock:
+            self.__waiting += 1
+        return True
+
+    def leave(self):
+        with self.__lock:
+            self.__waiting -= 1
+        self.__slots.release()
+
+    # Inputs read and not yet processed
+    def waiting(self):
+        with self.__lock:
+            return self.__waiting
+
+
 class UserInterface(HSFCThread):
     def __init__(self, input_queue: Queue,  # Input to the interface
-                 mediator_input: Queue):  # Output from the interface
+                 mediator_input: Queue,  # Output from the interface
+                 gate: InputGate = None):  # Bounds the user inputs in input_queue, if any
         super(UserInterface, self).__init__(input_queue, mediator_input)
+        self._gate = gate
 
         # Command dictionary:
         self._commands = {
             'exit': self._exit,
             'help': help_function,
-            'say': self._say
+            'say': self._say,
+            'stats': self._stats
         }
 
         self._UI_changes = {
@@ -35,19 +68,23 @@ class UserInterface(HSFCThread):
         }
 
     def _say(self, flags, argument):
-        if argument == 'say' or len(flags) > 1:
+        if argument == 'say' or len(flags) > len(set(flags)):
             raise CommandException("Wrong form: "
                                    "say " + ''.join(list(f+' ' for f in flags)) + argument +
                                    "\n" + help_text['say'])
-        toPlot = False
-        if len(flags) != 0:
-            found = False
-            if '-p' in flags:
-                toPlot = True
-                found = True
-            if not found:
-                raise CommandException("Unrecognised flag.\n" + help_text['say'])
-        self._output.put((toPlot, argument))
+        say_flags = {'-p': 'plot', '-l': 'log', '-t': 'profile'}
+        if any(f not in say_flags for f in flags):
+            raise CommandException("Unrecognised flag.\n" + help_text['say'])
+        self._forward(('say', (dict((say_flags[f], True) for f in flags), argument)))
+
+    # The statistics are displayed by the mediator, once it's done with the utterance it's producing,
+    # along with the inputs waiting for the interface
+    def _stats(self, flags, argument):
+        if flags or argument:
+            raise CommandException("Wrong form: "
+                                   "stats " + ''.join(list(f+' ' for f in flags)) + argument +
+                                   "\n" + help_text['stats'])
+        self._forward(('stats', {'inputs': self._gate.waiting()} if self._gate is not None else {}))
 
     def _exit(self, flags, argument):
         if flags or argument:
@@ -73,17 +110,16 @@ class UserInterface(HSFCThread):
             self._terminate("The interface must terminate because: \n" + str(ex))
 
     def _process_user_input(self, user_input):
-        command_label, flags, argument = parse(user_input)
-        command = self._commands.get(command_label, None)
-        if command:
-            command(flags, argument)
-        else:
-            unknown_command(command_label)
+        with tracer().span('input', 'interface', args={'input': user_input}):
+            command_label, flags, argument = parse(user_input)
+            command = self._commands.get(command_label, None)
+            if command:
+                command(flags, argument)
+            else:
+                unknown_command(command_label)
 
     def _handle_exception(self, ex):
-        if isinstance(ex, Empty):
-            pass
-        elif isinstance(ex, CommandException):
+        if isinstance(ex, CommandException):
             print(str(ex))
         elif isinstance(ex, RecoverableException):
             print(str(ex))
@@ -93,12 +129,18 @@ class UserInterface(HSFCThread):
     def run(self):
         while self.live():
             try:
-                # Extract input
-                kind, item = self._input.get_nowait()
-                self._input.task_done()
+                # Extract input, waiting for it
+                message = self._next()
+                if message is None:
+                    break
+                kind, item = message
                 # Execute appropriately
                 if kind == "input":
-                    self._process_user_input(item)
+                    try:
+                        self._process_user_input(item)
+                    finally:
+                        if self._gate is not None:
+                            self._gate.leave()
                 else:
                     self._process_UI_changes(kind, item)
             except Exception as ex:
@@ -20,7 +20,8 @@ help_text = {
         "Here is a list of available commands:\n"
         "  exit\n"
         "  help [command]\n"
-        "  say [-p] word(_word)*",
+        "  say [-p] [-l] [-t] word(_word)*\n"
+        "  stats",
     "help":
         "help [command|'commands']\n"
         "  This command displays explanatory text for (command)\n"
@@ -30,12 +31,20 @@ help_text = {
         "  This command terminates outstanding threads and exits the program\n"
         "  Warning: this command will kill any ongoing synthesis jobs",
     "say":
-        "say [-p] word(_word)*\n"
+        "say [-p] [-l] [-t] word(_word)*\n"
         "  This command synthesizes the utterance. Words must be separated by '_'\n"
         "  Allowed syllables are: b[aiu], d[aiu], ghi, g[au], gli, gli[au], l[aiu], m[aiu], n[aiu], v[aiu], z[aiu]\n"
         "  It's advised to only use: ba, da, di, ga, gli, glia, gli, gliu, la, li, lu, "
         "ma, mi, mu, na, ni, nu, va, vi, vu, za, zi, zu\n"
-        "  Setting the flag -p will show the trajectory of single articulators before synthesis"
+        "  Setting the flag -p will show the trajectory of single articulators before synthesis\n"
+        "  Setting the flag -l will save the trajectories, and their targets, as a .npy file in the output folder\n"
+        "  Setting the flag -t will profile the production, saving the profile and the largest allocations\n"
+        "  next to the audio file",
+    "stats":
+        "stats\n"
+        "  This command displays the counters and timers of production: time spent planning, moving, synthesizing\n"
+        "  and writing, frames per utterance and per target, and seconds of audio per second of work\n"
+        "  They are displayed once the utterance being produced is done, and saved on exit"
 }
 
 
@@ -11,10 +11,15 @@
 
 # Global imports
 from threading import Thread, Event
-from queue import Queue
+from queue import Queue, Full
 
 
+# Both threads block on their input queue while idle, rather than polling it
+# Queues may be bounded: a thread putting in a full queue waits for room (see _forward()), which holds back
+# whoever feeds that thread in turn
 class HSFCThread(Thread):
+    stop_signal = None  # Put in the input queue to wake up and stop the thread
+
     def __init__(self, input_queue: Queue, output_queue: Queue):
         super(HSFCThread, self).__init__()
         # Queues
@@ -25,8 +30,35 @@ class HSFCThread(Thread):
 
     # Checking function for run()
     def live(self):
-        return not self._kill.isSet()  # The "not" is a mere readibility sugar
+        return not self._kill.is_set()  # The "not" is a mere readibility sugar
 
     # Safely kills the thread
+    # The stop signal wakes the thread up if it's waiting on its input queue; if the queue is full,
+    # the thread isn't waiting on it, and will find out at its next check of live()
     def kill(self):
         self._kill.set()
+        try:
+            self._input.put_nowait(HSFCThread.stop_signal)
+        except Full:
+            pass
+
+    # Puts the item in the output queue, waiting for room while the thread is alive
+    # Returns whether it's been put
+    def _forward(self, item):
+        while True:
+            try:
+                self._output.put(item, timeout=0.1)
+                return True
+            except Full:
+                if not self.live():
+                    return False
+
+    # Waits for the next item in the input queue
+    # Returns None when the thread has been killed, in which case the thread must not go on
+    def _next(self):
+        item = self._input.get()
+        self._input.task_done()
+        if item is HSFCThread.stop_signal:
+            self._kill.set()
+            return None
+        return item
@@ -1,2 +1,5 @@
-from ._utils import extractFileInfo, outputAudio, RecoverableException, UnrecoverableException, CommandException
+from ._utils import extractFileInfo, outputAudio, AudioStream, RecoverableException, UnrecoverableException, CommandException
 from ._HSFC_thread import HSFCThread
+from ._writer import AudioWriter
+from ._stats import Stats, formatStats, dumpStats
+from ._trace import tracer, startTracing, stopTracing
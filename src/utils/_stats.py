@@ -0,0 +1,80 @@
+# -------------------------------------------------------------------------------
+# Name:        stats
+# Purpose:     Counters and timers of the stages of production, so that the time
+#              spent on each utterance can be told apart and followed over time
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Global imports
+import os
+import json
+import time
+from threading import Lock
+
+
+# Calls, seconds and amount of work of each stage, along with plain counters of events.
+# The amount depends on the stage: targets for planning, frames for motion,
+# and seconds of audio for synthesis and output.
+# Stages are recorded once per utterance, rather than per frame, to keep the overhead out of the loop;
+# records may come from other threads (e.g. those of the pipeline)
+class Stats:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__stages = {}  # stage: [calls, seconds, amount]
+        self.__counters = {}
+        self.__start = time.perf_counter()
+
+    def record(self, stage, seconds, amount=0):
+        with self.__lock:
+            entry = self.__stages.setdefault(stage, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += amount
+
+    def count(self, counter, n=1):
+        with self.__lock:
+            self.__counters[counter] = self.__counters.get(counter, 0) + n
+
+    # Returns the stages and counters so far, along with the rates derived from them:
+    # frames per utterance moved and per target planned, and seconds of audio per second
+    # of synthesis and per second spent in any stage
+    def snapshot(self):
+        with self.__lock:
+            stages = dict((stage, {'calls': c, 'seconds': s, 'amount': a})
+                          for stage, (c, s, a) in self.__stages.items())
+            counters = dict(self.__counters)
+        empty = {'calls': 0, 'seconds': 0.0, 'amount': 0}
+        motion, planning, synthesis = (stages.get(k, empty) for k in ('motion', 'planning', 'synthesis'))
+        busy = sum(stage['seconds'] for stage in stages.values())
+
+        def ratio(a, b):
+            return a / b if b > 0 else 0.0
+        return {'uptime': time.perf_counter() - self.__start, 'stages': stages, 'counters': counters,
+                'frames_per_utterance': ratio(motion['amount'], motion['calls']),
+                'frames_per_target': ratio(motion['amount'], planning['amount']),
+                'synthesis_rate': ratio(synthesis['amount'], synthesis['seconds']),
+                'production_rate': ratio(synthesis['amount'], busy)}
+
+
+# Formats statistics, as nested dictionaries (see Stats.snapshot()), as indented lines
+def formatStats(stats, indent=''):
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            lines.append(indent + key + ':')
+            lines.append(formatStats(value, indent + '  ') if value else indent + '  none')
+        elif isinstance(value, float):
+            lines.append(indent + key + ': ' + '%.4g' % value)
+        else:
+            lines.append(indent + key + ': ' + str(value))
+    return '\n'.join(lines)
+
+
+# Writes statistics as JSON at path; it's written aside and then moved, so that it's never read incomplete
+def dumpStats(path, stats):
+    temporary = path + '.' + str(os.getpid()) + '.tmp'
+    with open(temporary, 'w') as s_file:
+        json.dump(stats, s_file, indent=2, sort_keys=True)
+    os.replace(temporary, path)
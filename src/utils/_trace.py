@@ -0,0 +1,123 @@
+# -------------------------------------------------------------------------------
+# Name:        trace
+# Purpose:     Records a timeline of the stages of production, on every thread and
+#              process, and saves it in the trace event format, so that it can
+#              be opened with chrome://tracing or https://ui.perfetto.dev
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# The tracer is global to the process, as spans are recorded by components that don't know each other
+# (the interface, the mediator, the motor programs...); until startTracing(), it's a tracer that records nothing.
+# Timestamps are taken from the monotonic clock of the system, so that those of different processes
+# can be merged (see Tracer.extend())
+
+# Global imports
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+# Records spans as complete events ('X'), each with its start and duration, in microseconds
+# Spans are on the thread that records them, unless a track is given: tracks are timelines of their own,
+# e.g. for spans that don't nest with those of the thread
+class Tracer:
+    enabled = True
+
+    def __init__(self):
+        self.__events = []  # Appending is atomic, so no lock is needed
+        self.__pid = os.getpid()
+        self.__tracks = {}  # Names of the tracks, by their id
+        self.__threads = {}  # Names of the threads, by their id
+
+    @staticmethod
+    def now():
+        return time.perf_counter_ns() // 1000
+
+    # Records a span from start to end, as given by now()
+    def complete(self, name, start, end, category='', track=None, args=None):
+        if track is None:
+            thread = threading.current_thread()
+            tid = thread.ident
+            self.__threads.setdefault(tid, thread.name)
+        else:
+            tid = self.__tracks.setdefault(track, -1 - len(self.__tracks))
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': end - start,
+                 'pid': self.__pid, 'tid': tid}
+        if args:
+            event['args'] = args
+        self.__events.append(event)
+
+    # Records the span of the block
+    @contextmanager
+    def span(self, name, category='', track=None, args=None):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, start, self.now(), category, track, args)
+
+    # Returns the events recorded so far, along with the names of their threads and tracks
+    def events(self):
+        names = list(self.__threads.items()) + list((tid, track) for track, tid in self.__tracks.items())
+        return list(self.__events) + list({'name': 'thread_name', 'ph': 'M', 'pid': self.__pid, 'tid': tid,
+                                           'args': {'name': name}} for tid, name in names)
+
+    # Adds events recorded by another tracer, e.g. in another process
+    def extend(self, events):
+        self.__events.extend(events)
+
+    # Saves the events at path, as a JSON trace; it's written aside and then moved
+    def save(self, path):
+        temporary = path + '.' + str(self.__pid) + '.tmp'
+        with open(temporary, 'w') as t_file:
+            json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'}, t_file)
+        os.replace(temporary, path)
+
+
+# Stands for the tracer while tracing is off
+class _NullTracer:
+    enabled = False
+
+    @staticmethod
+    def now():
+        return 0
+
+    def complete(self, name, start, end, category='', track=None, args=None):
+        pass
+
+    @contextmanager
+    def span(self, name, category='', track=None, args=None):
+        yield
+
+    def events(self):
+        return []
+
+    def extend(self, events):
+        pass
+
+
+_tracer = _NullTracer()
+
+
+# The tracer of the process
+def tracer():
+    return _tracer
+
+
+# Starts recording spans in the process, returning the tracer
+def startTracing():
+    global _tracer
+    if not _tracer.enabled:
+        _tracer = Tracer()
+    return _tracer
+
+
+# Stops recording spans in the process, returning the tracer that recorded them (see Tracer.save())
+def stopTracing():
+    global _tracer
+    stopped, _tracer = _tracer, _NullTracer()
+    return stopped
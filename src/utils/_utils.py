@@ -10,8 +10,14 @@
 # -------------------------------------------------------------------------------
 
 # Global imports
-from scipy.io import wavfile
+import os
+import wave
+from itertools import count
 from datetime import datetime
+# Local imports
+from ._writer import contentFile, writeAudio
+
+_audio_sequence = count()  # Distinguishes audio files output within the same second
 
 
 # Exception utilities:
@@ -40,8 +46,34 @@ def extractFileInfo(path):
         return info
 
 
-# Outputs audio to to file
+# Path of a new audio file for the label, for audio whose content isn't known in advance (see contentFile())
+# The process id and a sequence number keep names unique across concurrent processes
+def _audioFile(path, label):
+    return path + (label if label else 'audio') +\
+        ' - ' + datetime.now().strftime("%d-%m-%Y-%H.%M.%S") +\
+        ' - ' + str(os.getpid()) + '-' + str(next(_audio_sequence)) + '.wav'
+
+
+# Outputs audio to file, returning its path (see AudioWriter to write it in the background)
 def outputAudio(path, label, sampling_rate, audio):
-    a_file = path + (label if label else 'audio') +\
-             ' - ' + datetime.now().strftime("%d-%m-%Y-%H.%M.%S") + '.wav'
-    wavfile.write(a_file, sampling_rate, audio)
+    a_file = contentFile(path, label, sampling_rate, audio)
+    writeAudio(a_file, sampling_rate, audio)
+    return a_file
+
+
+# Audio file written incrementally, one chunk of np.int16 samples at a time
+class AudioStream:
+    def __init__(self, path, label, sampling_rate):
+        self.path = _audioFile(path, label)
+        self.__file = wave.open(self.path, 'wb')
+        self.__file.setnchannels(1)
+        self.__file.setsampwidth(2)
+        self.__file.setframerate(sampling_rate)
+
+    def write(self, chunk):
+        self.__file.writeframes(chunk.astype('<i2').tobytes())
+
+    # Completes the file, returning its path
+    def close(self):
+        self.__file.close()
+        return self.path
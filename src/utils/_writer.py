@@ -0,0 +1,149 @@
+# -------------------------------------------------------------------------------
+# Name:        writer
+# Purpose:     Writes audio files in the background, so that the mediator can
+#              go on with the next utterance while the last one is being written
+#
+# Last mod:    18/10/2026
+# Licence:     <your licence>
+# -------------------------------------------------------------------------------
+
+# Global imports
+import os
+import time
+import hashlib
+from queue import Queue
+from threading import Thread, Lock
+from itertools import count
+
+_temporary_sequence = count()  # Distinguishes the temporary files of concurrent writes
+
+
+# Path of the audio file for the label and its content: the same audio always gets the same name,
+# and different audio never does, however close in time it's written
+def contentFile(path, label, sampling_rate, audio):
+    digest = hashlib.sha1(str(sampling_rate).encode() + audio.dtype.str.encode() + audio.tobytes()).hexdigest()
+    return path + (label if label else 'audio') + ' - ' + digest[:16] + '.wav'
+
+
+# Writes the audio at a_file: it's written aside and then moved, so that the file is never seen incomplete
+# Returns the number of bytes written, 0 if the file already existed (its content is the same, see contentFile())
+def writeAudio(a_file, sampling_rate, audio):
+    from scipy.io import wavfile  # Only loaded when writing, as it's slow to import
+    if os.path.exists(a_file):
+        return 0
+    temporary = a_file + '.' + str(os.getpid()) + '-' + str(next(_temporary_sequence)) + '.tmp'
+    wavfile.write(temporary, sampling_rate, audio)
+    written = os.path.getsize(temporary)
+    os.replace(temporary, a_file)
+    return written
+
+
+# A pool of threads writing the audio submitted through a bounded queue: once the queue is full,
+# submit() waits for room, so that the audio waiting to be written doesn't grow without bounds.
+# Written files are synced to disk in batches of sync files (and whenever the writers are idle),
+# rather than one at a time
+class AudioWriter:
+    stop_signal = None  # Put in the queue to stop a writer thread
+
+    def __init__(self, threads=1, queue_size=8, sync=8, failed=None):
+        self.__queue = Queue(queue_size)
+        self.__sync = max(sync, 1)  # Files written before they're synced
+        self.__failed = failed  # Called with the path and the exception of any failed write
+        self.__unsynced = []  # Written files, yet to be synced
+        self.__failed_writes = {}  # Paths and exceptions of the writes failed since the last flush()
+        self.__lock = Lock()  # Guards the statistics and the unsynced files
+        # Statistics:
+        self.files = 0
+        self.skipped = 0  # Files that already existed
+        self.failures = 0
+        self.bytes = 0
+        self.syncs = 0
+        self.busy = 0.0  # Seconds spent writing and syncing, over all threads
+        self.__threads = list(Thread(target=self.__work, daemon=True) for i in range(max(threads, 1)))
+        for thread in self.__threads:
+            thread.start()
+
+    # Queues the audio to be written, returning the path of its file
+    def submit(self, path, label, sampling_rate, audio):
+        a_file = contentFile(path, label, sampling_rate, audio)
+        self.__queue.put((a_file, sampling_rate, audio))
+        return a_file
+
+    def __work(self):
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is AudioWriter.stop_signal:
+                    return
+                start = time.perf_counter()
+                a_file, sampling_rate, audio = item
+                try:
+                    written = writeAudio(a_file, sampling_rate, audio)
+                except Exception as ex:  # A failed write must not stop the writer
+                    with self.__lock:
+                        self.failures += 1
+                        self.__failed_writes[a_file] = ex
+                    if self.__failed is not None:
+                        self.__failed(a_file, ex)
+                    continue
+                with self.__lock:
+                    self.files += 1
+                    if written:
+                        self.bytes += written
+                        self.__unsynced.append(a_file)
+                    else:
+                        self.skipped += 1
+                    batch = self.__take(len(self.__unsynced) >= self.__sync or self.__queue.empty())
+                self.__syncFiles(batch)
+                with self.__lock:
+                    self.busy += time.perf_counter() - start
+            finally:
+                self.__queue.task_done()
+
+    # Takes the unsynced files if they are to be synced
+    def __take(self, condition):
+        if not condition or not self.__unsynced:
+            return []
+        batch, self.__unsynced = self.__unsynced, []
+        return batch
+
+    # Syncs the given files, and their folders, to disk
+    def __syncFiles(self, batch):
+        if not batch:
+            return
+        for name in batch + sorted(set(os.path.dirname(os.path.abspath(f)) for f in batch)):
+            try:
+                fd = os.open(name, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError:  # e.g. folders can't be synced on some systems; the data is written anyway
+                pass
+        with self.__lock:
+            self.syncs += 1
+
+    # Waits until all the submitted audio has been written and synced
+    # Returns the writes failed since the last flush, as {path: exception}
+    def flush(self):
+        self.__queue.join()
+        with self.__lock:
+            batch = self.__take(True)
+            failed, self.__failed_writes = self.__failed_writes, {}
+        self.__syncFiles(batch)
+        return failed
+
+    # Writes the remaining audio, then stops the writer threads
+    def close(self):
+        self.flush()
+        for thread in self.__threads:
+            self.__queue.put(AudioWriter.stop_signal)
+        for thread in self.__threads:
+            thread.join()
+
+    # Statistics of the writes so far; the throughput is in bytes per second spent writing
+    def stats(self):
+        with self.__lock:
+            return {'files': self.files, 'skipped': self.skipped, 'failures': self.failures, 'bytes': self.bytes,
+                    'syncs': self.syncs, 'pending': self.__queue.qsize(), 'seconds': self.busy,
+                    'throughput': self.bytes / self.busy if self.busy > 0 else 0.0}